@@ -0,0 +1,67 @@
+"""Tests for tools/ic10_network_sim.py."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+
+from ic10_network_sim import FeatureNetwork  # noqa: E402
+
+SETUP = """# Handshake
+
+## Name contract
+
+- IC Housing: `writer`
+- IC Housing: `clearer`
+- Logic Memory: `cmd_type`
+
+## Scripts
+
+- `handshake_post.ic10` on housing name `writer`
+- `handshake_take.ic10` on housing name `clearer`
+"""
+
+SCRIPT = """define MEMH HASH("StructureLogicMemory")
+define CTYPE HASH("cmd_type")
+main:
+sbn MEMH CTYPE Setting {value}
+yield
+j main
+"""
+
+
+class ChannelChangesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.feature = Path(tmp.name) / "Handshake"
+        self.feature.mkdir()
+        (self.feature / "Setup.md").write_text(SETUP, encoding="utf-8")
+        (self.feature / "handshake_post.ic10").write_text(SCRIPT.format(value=1), encoding="utf-8")
+        (self.feature / "handshake_take.ic10").write_text(SCRIPT.format(value=0), encoding="utf-8")
+
+    def channel(self, skip_idle: bool):
+        report = FeatureNetwork(self.feature).run(10, skip_idle=skip_idle)
+        return next(c for c in report.channels if c.name == "cmd_type")
+
+    def test_same_tick_write_then_clear_counts(self) -> None:
+        for skip_idle in (False, True):
+            with self.subTest(skip_idle=skip_idle):
+                channel = self.channel(skip_idle)
+                self.assertEqual(channel.changes, 20)
+                self.assertEqual((channel.first, channel.last), (0, 9))
+                self.assertEqual(channel.value, 0.0)
+
+    def test_watchers_stack(self) -> None:
+        net = FeatureNetwork(self.feature)
+        seen: list[str] = []
+        net.watch(lambda device, op, logic_type, value: seen.append(op))
+        channel = next(c for c in net.run(1).channels if c.name == "cmd_type")
+        self.assertEqual(channel.changes, 2)
+        self.assertIn("write", seen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,7 +16,9 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
+
+from repo_files import DiskFiles
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -27,13 +29,17 @@ def _is_int_like(value: Any) -> bool:
     return isinstance(value, int) and not isinstance(value, bool)
 
 
+def _is_revision_id(value: Any) -> bool:
+    return _is_int_like(value) and value > 0
+
+
 def _is_number_like(value: Any) -> bool:
     return (isinstance(value, int) or isinstance(value, float)) and not isinstance(value, bool)
 
 
-def _load_json(path: Path) -> tuple[Any | None, str | None]:
+def _load_json(path: Path, files: DiskFiles) -> tuple[Any | None, str | None]:
     try:
-        return json.loads(path.read_text(encoding="utf-8")), None
+        return json.loads(files.read_text(path)), None
     except OSError as e:
         return None, f"read error: {e}"
     except json.JSONDecodeError as e:
@@ -66,10 +72,11 @@ def _check_device_schema(
     device_path: Path,
     expected_wiki_title: str | None,
     *,
+    files: DiskFiles,
     errors: list[str],
     warnings: list[str],
 ) -> None:
-    data, err = _load_json(device_path)
+    data, err = _load_json(device_path, files)
     if err:
         errors.append(f"{device_path}: {err}")
         return
@@ -100,6 +107,8 @@ def _check_device_schema(
                 continue
             if not isinstance(source[key], str):
                 errors.append(f"{device_path}: source.{key} must be a string")
+        if "revisionId" in source and not _is_revision_id(source["revisionId"]):
+            errors.append(f"{device_path}: source.revisionId must be a positive integer when present")
         if isinstance(source.get("wikiTitle"), str) and expected_wiki_title:
             if source["wikiTitle"] != expected_wiki_title:
                 errors.append(
@@ -169,10 +178,11 @@ def _check_recipe_catalog_schema(
     expected_page_title: str | None,
     expected_recipe_count: int | None,
     *,
+    files: DiskFiles,
     errors: list[str],
     warnings: list[str],
 ) -> None:
-    data, err = _load_json(recipe_path)
+    data, err = _load_json(recipe_path, files)
     if err:
         errors.append(f"{recipe_path}: {err}")
         return
@@ -203,6 +213,8 @@ def _check_recipe_catalog_schema(
                 continue
             if not isinstance(source[key], str):
                 errors.append(f"{recipe_path}: source.{key} must be a string")
+        if "revisionId" in source and not _is_revision_id(source["revisionId"]):
+            errors.append(f"{recipe_path}: source.revisionId must be a positive integer when present")
 
         if isinstance(source.get("wikiTitle"), str) and expected_page_title:
             if source["wikiTitle"] != expected_page_title:
@@ -302,43 +314,32 @@ def _check_recipe_catalog_schema(
         )
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Validate catalog index and device JSON files")
-    parser.add_argument(
-        "--catalog-dir",
-        default="catalog",
-        help="Catalog root directory (default: catalog)",
-    )
-    args = parser.parse_args()
+def check(catalog_dir: Path, files: Optional[DiskFiles] = None) -> tuple[int, list[str]]:
+    """Run the check; return (exit code, output lines)."""
 
-    catalog_dir = (ROOT / args.catalog_dir).resolve()
+    files = files or DiskFiles()
     index_path = catalog_dir / "index.json"
     devices_dir = catalog_dir / "devices"
     recipes_dir = catalog_dir / "recipes"
     recipes_index_path = recipes_dir / "index.json"
 
-    if not index_path.exists():
-        print(f"ERROR: index not found: {index_path}")
-        return 2
-    if not devices_dir.exists():
-        print(f"ERROR: devices dir not found: {devices_dir}")
-        return 2
+    if not files.exists(index_path):
+        return 2, [f"ERROR: index not found: {index_path}"]
+    if not files.exists(devices_dir):
+        return 2, [f"ERROR: devices dir not found: {devices_dir}"]
 
     errors: list[str] = []
     warnings: list[str] = []
 
-    index, err = _load_json(index_path)
+    index, err = _load_json(index_path, files)
     if err:
-        print(f"ERROR: {index_path}: {err}")
-        return 1
+        return 1, [f"ERROR: {index_path}: {err}"]
     if not isinstance(index, dict):
-        print(f"ERROR: {index_path}: top-level must be an object")
-        return 1
+        return 1, [f"ERROR: {index_path}: top-level must be an object"]
 
     devices = index.get("devices")
     if not isinstance(devices, list):
-        print(f"ERROR: {index_path}: 'devices' must be an array")
-        return 1
+        return 1, [f"ERROR: {index_path}: 'devices' must be an array"]
 
     seen_titles: set[str] = set()
     seen_files: set[str] = set()
@@ -373,29 +374,30 @@ def main() -> int:
         referenced_files.add(rel_file)
 
         device_path = catalog_dir / rel_file
-        if not device_path.exists():
+        if not files.exists(device_path):
             errors.append(f"{where}: missing file: {device_path}")
             continue
 
         _check_device_schema(
             device_path,
             wiki_title,
+            files=files,
             errors=errors,
             warnings=warnings,
         )
 
-    for p in sorted(devices_dir.glob("*.json")):
+    for p in files.glob(devices_dir, "*.json"):
         rel = f"devices/{p.name}"
         if rel not in referenced_files:
             errors.append(f"{index_path}: orphan device file not indexed: {rel}")
 
-    if recipes_dir.exists() or recipes_index_path.exists():
-        if not recipes_index_path.exists():
+    if files.exists(recipes_dir) or files.exists(recipes_index_path):
+        if not files.exists(recipes_index_path):
             errors.append(f"{catalog_dir}: recipes dir exists but recipes/index.json is missing")
-        elif not recipes_dir.exists():
+        elif not files.exists(recipes_dir):
             errors.append(f"{catalog_dir}: recipes/index.json exists but recipes dir is missing")
         else:
-            recipes_index, err = _load_json(recipes_index_path)
+            recipes_index, err = _load_json(recipes_index_path, files)
             if err:
                 errors.append(f"{recipes_index_path}: {err}")
             elif not isinstance(recipes_index, dict):
@@ -447,7 +449,7 @@ def main() -> int:
                         referenced_recipe_files.add(rel_file)
 
                         recipe_path = catalog_dir / rel_file
-                        if not recipe_path.exists():
+                        if not files.exists(recipe_path):
                             errors.append(f"{where}: missing file: {recipe_path}")
                             continue
 
@@ -456,11 +458,12 @@ def main() -> int:
                             wiki_title,
                             page_title,
                             recipe_count,
+                            files=files,
                             errors=errors,
                             warnings=warnings,
                         )
 
-                    for p in sorted(recipes_dir.rglob("*.json")):
+                    for p in files.glob(recipes_dir, "**/*.json"):
                         rel = p.relative_to(catalog_dir).as_posix()
                         if rel == "recipes/index.json":
                             continue
@@ -469,17 +472,31 @@ def main() -> int:
                                 f"{recipes_index_path}: orphan recipe file not indexed: {rel}"
                             )
 
-    for msg in errors:
-        print(f"ERROR: {msg}")
-    for msg in warnings:
-        print(f"WARN:  {msg}")
+    out = [f"ERROR: {msg}" for msg in errors]
+    out.extend(f"WARN:  {msg}" for msg in warnings)
 
     if errors:
-        print(f"FAILED: {len(errors)} error(s), {len(warnings)} warning(s)")
-        return 1
+        out.append(f"FAILED: {len(errors)} error(s), {len(warnings)} warning(s)")
+        return 1, out
 
-    print(f"OK: catalog check passed ({len(warnings)} warning(s))")
-    return 0
+    out.append(f"OK: catalog check passed ({len(warnings)} warning(s))")
+    return 0, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate catalog index and device JSON files")
+    parser.add_argument(
+        "--catalog-dir",
+        default="catalog",
+        help="Catalog root directory (default: catalog)",
+    )
+    args = parser.parse_args()
+
+    catalog_dir = (ROOT / args.catalog_dir).resolve()
+    status, out = check(catalog_dir)
+    for line in out:
+        print(line)
+    return status
 
 
 if __name__ == "__main__":
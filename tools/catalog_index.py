@@ -0,0 +1,259 @@
+"""Compiled device catalog index.
+
+`catalog/index.json` only maps wiki titles to files, so answering "can I read
+`Temperature` on prefab hash X" means loading every `catalog/devices/*.json`.
+This module compiles the device files into one generated index (default:
+`build/cache/catalog_index.json`) keyed by `itemHash`, `itemName` and
+`wikiTitle`, with each device's parameter/output names and `modeValues`
+already extracted. Loading it is one read.
+
+The compiled index records the size and modification time of every device
+file it was built from. On load, the device folder is listed and stat'ed
+(no reads); only device files that were added or changed are parsed again,
+and the index file is rewritten only when something changed.
+
+Read/write follows the catalog schema: `io.parameters` are writable and also
+readable, `io.outputs` are readable.
+
+Examples
+    python tools/catalog_index.py
+    python tools/catalog_index.py StructureGasSensor Temperature
+    python tools/catalog_index.py -1252983604
+    python tools/catalog_index.py Gas_Sensor --rebuild
+
+Exit codes
+  0 - index up to date (and the lookup matched)
+  1 - device not found, or it has no such logic type
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CATALOG_DIR = ROOT / "catalog"
+DEFAULT_INDEX = ROOT / "build" / "cache" / "catalog_index.json"
+INDEX_VERSION = 1  # bump when the compiled layout changes
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    wiki_title: str
+    file: str  # relative to the catalog dir, e.g. devices/Gas_Sensor.json
+    item_name: Optional[str]
+    item_hash: Optional[int]
+    parameters: frozenset[str]
+    outputs: frozenset[str]
+    mode_values: tuple[dict, ...] = ()
+
+    def can_read(self, logic_type: str) -> bool:
+        return logic_type in self.outputs or logic_type in self.parameters
+
+    def can_write(self, logic_type: str) -> bool:
+        return logic_type in self.parameters
+
+
+def _names(fields: Any) -> list[str]:
+    if not isinstance(fields, list):
+        return []
+    return sorted({f["name"] for f in fields if isinstance(f, dict) and isinstance(f.get("name"), str)})
+
+
+def _compile_device(rel_file: str, data: Any) -> dict[str, Any]:
+    """Compiled record for one device file (invalid parts compile to empty)."""
+
+    data = data if isinstance(data, dict) else {}
+    source = data.get("source") if isinstance(data.get("source"), dict) else {}
+    identity = data.get("identity") if isinstance(data.get("identity"), dict) else {}
+    io = data.get("io") if isinstance(data.get("io"), dict) else {}
+    item_hash = identity.get("itemHash")
+    mode_values = io.get("modeValues")
+    return {
+        "wikiTitle": source.get("wikiTitle") if isinstance(source.get("wikiTitle"), str) else Path(rel_file).stem,
+        "file": rel_file,
+        "itemName": identity.get("itemName") if isinstance(identity.get("itemName"), str) else None,
+        "itemHash": item_hash if isinstance(item_hash, int) and not isinstance(item_hash, bool) else None,
+        "parameters": _names(io.get("parameters")),
+        "outputs": _names(io.get("outputs")),
+        "modeValues": [m for m in mode_values if isinstance(m, dict)] if isinstance(mode_values, list) else [],
+    }
+
+
+def _to_info(record: dict[str, Any]) -> DeviceInfo:
+    return DeviceInfo(
+        wiki_title=record["wikiTitle"],
+        file=record["file"],
+        item_name=record["itemName"],
+        item_hash=record["itemHash"],
+        parameters=frozenset(record["parameters"]),
+        outputs=frozenset(record["outputs"]),
+        mode_values=tuple(record["modeValues"]),
+    )
+
+
+class CatalogIndex:
+    """Device lookups by prefab hash, item name or wiki title."""
+
+    def __init__(self, records: list[dict[str, Any]], rebuilt: int = 0) -> None:
+        self.devices: dict[str, DeviceInfo] = {}
+        self.by_hash: dict[int, DeviceInfo] = {}
+        self.by_name: dict[str, DeviceInfo] = {}
+        self.rebuilt = rebuilt  # device files parsed on this load
+        for record in sorted(records, key=lambda r: r["file"]):
+            info = _to_info(record)
+            self.devices.setdefault(info.wiki_title, info)
+            if info.item_hash is not None:
+                self.by_hash.setdefault(info.item_hash, info)
+            if info.item_name is not None:
+                self.by_name.setdefault(info.item_name, info)
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def lookup(self, key: Union[int, str]) -> Optional[DeviceInfo]:
+        """Find a device by prefab hash (int or numeric text), item name or wiki title."""
+
+        if isinstance(key, int):
+            return self.by_hash.get(key)
+        text = key.strip()
+        try:
+            return self.by_hash.get(int(text))
+        except ValueError:
+            pass
+        return self.by_name.get(text) or self.devices.get(text)
+
+
+def _stat(path: Path) -> Optional[list[int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_compiled(index_path: Path) -> dict[str, Any]:
+    try:
+        data = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    return data
+
+
+def _write_compiled(index_path: Path, payload: dict[str, Any]) -> None:
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = index_path.with_name(index_path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=1, sort_keys=True, ensure_ascii=False) + "\n", encoding="utf-8")
+        os.replace(tmp, index_path)
+    except OSError:
+        pass  # a read-only checkout still gets a (slower) load
+
+
+def load_index(
+    catalog_dir: Path = CATALOG_DIR,
+    index_path: Path = DEFAULT_INDEX,
+    *,
+    rebuild: bool = False,
+) -> CatalogIndex:
+    """Load the compiled index, re-parsing only device files that changed."""
+
+    devices_dir = catalog_dir / "devices"
+    compiled = {} if rebuild else _read_compiled(index_path)
+    if compiled.get("catalogDir") != str(catalog_dir.resolve()):
+        compiled = {}
+    old_sources: dict[str, list[int]] = compiled.get("sources") or {}
+    old_records: dict[str, dict[str, Any]] = compiled.get("devices") or {}
+
+    sources: dict[str, list[int]] = {}
+    records: dict[str, dict[str, Any]] = {}
+    rebuilt = 0
+    paths = sorted(devices_dir.glob("*.json")) if devices_dir.is_dir() else []
+    for path in paths:
+        rel = f"devices/{path.name}"
+        stat = _stat(path)
+        if stat is None:
+            continue
+        if old_sources.get(rel) == stat and rel in old_records:
+            records[rel] = old_records[rel]
+        else:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = None
+            records[rel] = _compile_device(rel, data)
+            rebuilt += 1
+        sources[rel] = stat
+
+    if rebuilt or sources != old_sources:
+        _write_compiled(
+            index_path,
+            {
+                "version": INDEX_VERSION,
+                "catalogDir": str(catalog_dir.resolve()),
+                "sources": sources,
+                "devices": records,
+            },
+        )
+    return CatalogIndex(list(records.values()), rebuilt=rebuilt)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the compiled device catalog index and query it")
+    parser.add_argument("device", nargs="?", help="Prefab hash, item name or wiki title to look up")
+    parser.add_argument("logic_type", nargs="?", help="Logic type to check on the device (e.g. Temperature)")
+    parser.add_argument(
+        "--catalog-dir",
+        default="catalog",
+        help="Catalog root directory (default: catalog)",
+    )
+    parser.add_argument(
+        "--index",
+        default=str(DEFAULT_INDEX),
+        help="Compiled index file (default: build/cache/catalog_index.json under the repo)",
+    )
+    parser.add_argument("--rebuild", action="store_true", help="Re-parse every device file")
+    args = parser.parse_args()
+
+    catalog_dir = (ROOT / args.catalog_dir).resolve()
+    if not (catalog_dir / "devices").is_dir():
+        print(f"ERROR: devices dir not found: {catalog_dir / 'devices'}")
+        return 2
+
+    index = load_index(catalog_dir, Path(args.index), rebuild=args.rebuild)
+    print(f"catalog index: {len(index)} device(s), {index.rebuilt} re-parsed")
+    if args.device is None:
+        return 0
+
+    info = index.lookup(args.device)
+    if info is None:
+        print(f"not found: {args.device}")
+        return 1
+    print(f"{info.wiki_title} ({info.file}): itemName={info.item_name} itemHash={info.item_hash}")
+    if args.logic_type is None:
+        print(f"  parameters: {', '.join(sorted(info.parameters)) or '-'}")
+        print(f"  outputs: {', '.join(sorted(info.outputs)) or '-'}")
+        for mode in info.mode_values:
+            print(f"  mode {mode.get('value')}: {mode.get('meaning')}")
+        return 0
+
+    read = "read" if info.can_read(args.logic_type) else ""
+    write = "write" if info.can_write(args.logic_type) else ""
+    access = "/".join(a for a in (read, write) if a)
+    if not access:
+        print(f"  {args.logic_type}: not available")
+        return 1
+    print(f"  {args.logic_type}: {access}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
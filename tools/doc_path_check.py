@@ -14,6 +14,9 @@ from __future__ import annotations
 import argparse
 import re
 from pathlib import Path
+from typing import Optional
+
+from repo_files import DiskFiles
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -58,55 +61,62 @@ def _normalize_candidate(token: str) -> str | None:
     return token
 
 
-def _iter_doc_files(root: Path, globs: tuple[str, ...]) -> list[Path]:
+def _iter_doc_files(root: Path, globs: tuple[str, ...], files: DiskFiles) -> list[Path]:
     out: list[Path] = []
     for pat in globs:
-        out.extend(root.glob(pat))
-    return sorted({p.resolve() for p in out if p.is_file()})
-
+        out.extend(files.glob(root, pat))
+    return sorted({p.resolve() for p in out})
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Validate path-like references in docs")
-    parser.add_argument(
-        "--root",
-        default=".",
-        help="Repo root (default: current repo root)",
-    )
-    args = parser.parse_args()
 
-    root = (ROOT / args.root).resolve()
-    if not root.exists():
-        print(f"ERROR: root not found: {root}")
-        return 2
+def check(root: Path, files: Optional[DiskFiles] = None) -> tuple[int, list[str]]:
+    """Run the check; return (exit code, output lines)."""
 
-    docs = _iter_doc_files(root, DOC_GLOBS)
+    files = files or DiskFiles()
+    docs = _iter_doc_files(root, DOC_GLOBS, files)
     if not docs:
-        print("ERROR: no docs found to scan")
-        return 2
+        return 2, ["ERROR: no docs found to scan"]
 
     missing: list[str] = []
     pattern = re.compile(r"`([^`]+)`")
 
     for doc in docs:
         rel_doc = doc.relative_to(root)
-        for line_no, line in enumerate(doc.read_text(encoding="utf-8").splitlines(), start=1):
+        for line_no, line in enumerate(files.read_text(doc).splitlines(), start=1):
             for m in pattern.finditer(line):
                 token = m.group(1)
                 candidate = _normalize_candidate(token)
                 if not candidate:
                     continue
                 path = (root / candidate).resolve()
-                if not path.exists():
+                if not files.exists(path):
                     missing.append(f"{rel_doc}:{line_no}: {candidate}")
 
     if missing:
-        for msg in missing:
-            print(f"ERROR: missing path reference: {msg}")
-        print(f"FAILED: {len(missing)} missing path reference(s)")
-        return 1
+        out = [f"ERROR: missing path reference: {msg}" for msg in missing]
+        out.append(f"FAILED: {len(missing)} missing path reference(s)")
+        return 1, out
+
+    return 0, [f"OK: doc path check passed ({len(docs)} doc files scanned)"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate path-like references in docs")
+    parser.add_argument(
+        "--root",
+        default=".",
+        help="Repo root (default: current repo root)",
+    )
+    args = parser.parse_args()
+
+    root = (ROOT / args.root).resolve()
+    if not root.exists():
+        print(f"ERROR: root not found: {root}")
+        return 2
 
-    print(f"OK: doc path check passed ({len(docs)} doc files scanned)")
-    return 0
+    status, out = check(root)
+    for line in out:
+        print(line)
+    return status
 
 
 if __name__ == "__main__":
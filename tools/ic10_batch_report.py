@@ -0,0 +1,253 @@
+"""Batch network operation cost report for IC10 scripts.
+
+Counts the batch device operations (`lb`, `sb`, `lbn`, `sbn`, `lbs`, `lbns`,
+`sbs`, `sbns`) each loop iteration can issue and ranks scripts and labels by
+load. Batch operations are broadcast over the whole data network, so on a
+large network they dominate a script's cost far more than its line count.
+
+Model
+- One loop iteration is one tick segment: from the line after a
+  `yield`/`sleep` (or line 0) to the next `yield`/`sleep`, following the
+  control-flow graph from `tools/ic10_cfg.py` (subroutine calls included).
+- Per-iteration count is the worst case over all branch outcomes.
+- Per-second rate divides by how long the segment's ending waits:
+  `yield` = one tick (0.5 s), `sleep N` = N seconds (at least one tick).
+- A loop that can repeat a batch op without yielding is reported as
+  unbounded; yield-less loops with no batch ops (busy waits) add nothing.
+
+Examples
+    python tools/ic10_batch_report.py "modular scripts/"
+    python tools/ic10_batch_report.py scripts/ --top 10
+    python tools/ic10_batch_report.py scripts/ --fail-above 40
+
+Exit codes
+  0 - report printed (and no script above --fail-above, when given)
+  1 - one or more scripts exceed --fail-above ops/s (or are unbounded)
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from ic10_cfg import build_cfg, context_graph, is_cyclic, strongly_connected_components
+from ic10_parse import BATCH_OPCODES, Ic10ParseError, Program, iter_ic10_files, parse_file
+from ic10_sim import TICK_SECONDS
+
+
+DEFAULT_TOP = 20
+
+
+@dataclass
+class SegmentLoad:
+    entry: int
+    ops: float
+    seconds: float
+    by_opcode: Counter[str] = field(default_factory=Counter)
+    by_label: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def per_second(self) -> float:
+        if math.isinf(self.ops):
+            return math.inf
+        return self.ops / self.seconds if math.isfinite(self.seconds) else 0.0
+
+
+@dataclass
+class ScriptLoad:
+    path: Path
+    program: Program
+    segments: list[SegmentLoad]
+
+    @property
+    def worst(self) -> Optional[SegmentLoad]:
+        return max(self.segments, key=lambda s: (s.per_second, s.ops), default=None)
+
+
+def _period_seconds(program: Program, line_index: int) -> float:
+    """How long the chip waits after the tick-ending line (inf at program end)."""
+
+    line = program.lines[line_index]
+    if line.opcode == "yield":
+        return TICK_SECONDS
+    if line.opcode == "sleep":
+        value = program.resolve_constant(program.resolve_alias(line.args[0])) if line.args else 0.0
+        return max(TICK_SECONDS, value if value is not None else TICK_SECONDS)
+    return math.inf
+
+
+def analyze(program: Program) -> list[SegmentLoad]:
+    cfg = build_cfg(program)
+    graph = context_graph(cfg, cfg.entries)
+    succ = graph.succ
+
+    # Condense loops: a loop without batch ops costs nothing extra per
+    # iteration; a loop containing one makes the segment unbounded.
+    comps = strongly_connected_components(succ)
+    comp_of = {node: ci for ci, comp in enumerate(comps) for node in comp}
+    comp_weight: list[float] = []
+    for comp in comps:
+        ops = sum(1 for n in comp if program.lines[graph.line(n)].opcode in BATCH_OPCODES)
+        comp_weight.append(math.inf if ops and is_cyclic(comp, succ) else float(ops))
+    comp_succ = [
+        sorted({comp_of[t] for n in comp for t in succ[n]} - {ci}) for ci, comp in enumerate(comps)
+    ]
+
+    loads: list[SegmentLoad] = []
+    for entry in cfg.entries:
+        start = comp_of[graph.start(entry)]
+        # Tarjan emits sinks first, so reversed indices are a topological order.
+        dist = {start: comp_weight[start]}
+        prev: dict[int, int] = {}
+        for ci in range(start, -1, -1):
+            if ci not in dist:
+                continue
+            for t in comp_succ[ci]:
+                cand = dist[ci] + comp_weight[t]
+                if t not in dist or cand > dist[t]:
+                    dist[t] = cand
+                    prev[t] = ci
+
+        best: Optional[tuple[float, float, int, float]] = None
+        for ci, ops in dist.items():
+            ends = [n for n in comps[ci] if not succ[n]]
+            if not ends:
+                continue
+            seconds = min(_period_seconds(program, graph.line(n)) for n in ends)
+            rate = ops / seconds if math.isfinite(seconds) else 0.0
+            if best is None or (rate, ops) > (best[0], best[1]):
+                best = (rate, ops, ci, seconds)
+        if best is None:
+            continue
+
+        _, ops, ci, seconds = best
+        load = SegmentLoad(entry, ops, seconds if math.isfinite(seconds) else math.inf)
+        while True:
+            for node in comps[ci]:
+                line = program.lines[graph.line(node)]
+                if line.opcode in BATCH_OPCODES:
+                    load.by_opcode[line.opcode] += 1
+                    load.by_label[program.label_for(line.index) or "(top)"] += 1
+            if ci not in prev:
+                break
+            ci = prev[ci]
+        loads.append(load)
+    return loads
+
+
+def _fmt(value: float, digits: int = 1) -> str:
+    if math.isinf(value):
+        return "unbounded"
+    return f"{value:.{digits}f}" if digits else str(int(value))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rank IC10 scripts by batch network operation load")
+    parser.add_argument("path", help="File or directory to analyze")
+    parser.add_argument(
+        "--ext",
+        action="append",
+        default=[],
+        help="File extension(s) to include when analyzing a directory (repeatable). Example: --ext .ic10",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP,
+        help=f"How many labels to list in the label ranking (default: {DEFAULT_TOP})",
+    )
+    parser.add_argument("--all", action="store_true", help="Also list scripts with no batch ops")
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        default=None,
+        help="Exit 1 when any script exceeds this many batch ops per second",
+    )
+    parser.add_argument("--json", action="store_true", help="Emit a JSON report instead of text")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Path not found: {path}")
+        return 2
+
+    exts = args.ext or ([".ic10", ".ic"] if path.is_dir() else [])
+    scripts: list[ScriptLoad] = []
+    for f in iter_ic10_files(path, exts):
+        try:
+            program = parse_file(f)
+        except (Ic10ParseError, OSError, UnicodeDecodeError) as e:
+            print(f"{f}: {e}")
+            return 2
+        scripts.append(ScriptLoad(f, program, analyze(program)))
+
+    ranked = sorted(
+        (s for s in scripts if s.worst is not None),
+        key=lambda s: (s.worst.per_second, s.worst.ops),
+        reverse=True,
+    )
+    if not args.all:
+        ranked = [s for s in ranked if s.worst.ops]
+
+    label_rows: list[tuple[float, int, str, str]] = []
+    for s in ranked:
+        for seg in s.segments:
+            for label, count in seg.by_label.items():
+                rate = count / seg.seconds if math.isfinite(seg.seconds) else 0.0
+                label_rows.append((rate, count, str(s.path), label))
+    best_rows: dict[tuple[str, str], tuple[float, int, str, str]] = {}
+    for row in label_rows:
+        key = (row[2], row[3])
+        if key not in best_rows or row[:2] > best_rows[key][:2]:
+            best_rows[key] = row
+    labels = sorted(best_rows.values(), reverse=True)[: args.top]
+
+    if args.json:
+        payload = {
+            "scripts": [
+                {
+                    "path": str(s.path),
+                    "opsPerIteration": s.worst.ops,
+                    "opsPerSecond": s.worst.per_second,
+                    "entry": s.program.describe(s.worst.entry),
+                    "byOpcode": dict(s.worst.by_opcode),
+                }
+                for s in ranked
+            ],
+            "labels": [
+                {"path": p, "label": label, "opsPerIteration": c, "opsPerSecond": r}
+                for r, c, p, label in labels
+            ],
+        }
+        print(json.dumps(payload, indent=2, default=str))
+    else:
+        print("Scripts by batch ops (worst loop iteration = one tick segment):")
+        print(f"  {'rank':>4}  {'ops/iter':>9}  {'ops/s':>9}  script")
+        for rank, s in enumerate(ranked, start=1):
+            w = s.worst
+            mix = ", ".join(f"{op} x{n}" for op, n in sorted(w.by_opcode.items()))
+            print(
+                f"  {rank:>4}  {_fmt(w.ops, 0):>9}  {_fmt(w.per_second):>9}  {s.path}"
+                f"  [{s.program.describe(w.entry)}]" + (f"  {mix}" if mix else "")
+            )
+        if labels:
+            print("Labels by batch ops:")
+            for rank, (rate, count, p, label) in enumerate(labels, start=1):
+                print(f"  {rank:>4}  {count:>9}  {_fmt(rate):>9}  {p}:{label}")
+
+    if args.fail_above is not None:
+        over = [s for s in ranked if s.worst.per_second > args.fail_above]
+        for s in over:
+            print(f"{s.path}: {_fmt(s.worst.per_second)} batch ops/s (limit {args.fail_above:g})")
+        return 1 if over else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,257 @@
+"""Static worst-case instructions-between-yields checker for IC10 scripts.
+
+Builds the control-flow graph of each script (`tools/ic10_cfg.py`) and computes,
+for every point where a game tick can start (line 0 and the line after each
+`yield`/`sleep`), the longest path to the next `yield`/`sleep` (or end of
+program). Every line on the path counts, matching `tools/ic10_sim.py`.
+
+A script fails when:
+- a tick segment can run more than `--budget` instructions, or
+- a loop can run without passing a `yield`/`sleep` (unbounded per tick).
+
+Branch conditions are not evaluated, so the result is a safe upper bound.
+Subroutine calls (`jal` ... `j ra`) are followed with their return address,
+so calling the same helper twice per loop is not mistaken for a loop.
+
+Examples
+    python tools/ic10_budget_check.py scripts/solar_named_tracking/solar_named_tracking.ic10
+    python tools/ic10_budget_check.py scripts/ --ext .ic10 --budget 100
+    python tools/ic10_budget_check.py "modular scripts/" --report
+
+Exit codes
+  0 - all files within budget
+  1 - one or more files exceed the budget (or loop without yielding)
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+from ic10_cfg import (
+    Cfg,
+    build_cfg,
+    context_graph,
+    is_cyclic,
+    loop_labels,
+    strongly_connected_components,
+)
+from ic10_parse import Ic10ParseError, Program, iter_ic10_files, parse_file
+
+
+DEFAULT_BUDGET = 128
+
+
+@dataclass(frozen=True)
+class Violation:
+    path: Path
+    message: str
+
+
+@dataclass(frozen=True)
+class Segment:
+    entry: int
+    cost: float
+    path: tuple[int, ...]
+    loops: tuple[str, ...] = ()
+
+    @property
+    def end(self) -> int:
+        return self.path[-1]
+
+
+@dataclass
+class BudgetAnalysis:
+    program: Program
+    cfg: Cfg
+    segments: list[Segment]
+    per_label: dict[str, float]
+
+    @property
+    def worst(self) -> float:
+        return max((s.cost for s in self.segments), default=0.0)
+
+
+def analyze(program: Program) -> BudgetAnalysis:
+    cfg = build_cfg(program)
+    graph = context_graph(cfg, cfg.entries)
+    succ = graph.succ
+    comps = strongly_connected_components(succ)
+
+    # Longest path from each state to a tick end (state inclusive). Tarjan
+    # yields components sinks-first, so successors are always ready.
+    tail = [0.0] * len(succ)
+    best_next = [-1] * len(succ)
+    cyclic: set[int] = set()
+    for comp in comps:
+        if is_cyclic(comp, succ):
+            cyclic.update(comp)
+            for node in comp:
+                tail[node] = math.inf
+            continue
+        node = comp[0]
+        best = 0.0
+        for s in succ[node]:
+            if tail[s] > best:
+                best, best_next[node] = tail[s], s
+        tail[node] = 1 + best
+
+    order = [c[0] for c in reversed(comps) if not is_cyclic(c, succ)]
+    segments: list[Segment] = []
+    per_label: dict[str, float] = {}
+    for entry in cfg.entries:
+        start = graph.start(entry)
+        reach = _reachable(succ, start)
+        if math.isinf(tail[start]):
+            loops = loop_labels(program, {graph.line(n) for n in reach & cyclic})
+            segments.append(Segment(entry, math.inf, (entry,), tuple(loops)))
+            for node in reach:
+                label = program.lines[graph.line(node)].label
+                if label:
+                    per_label[label] = math.inf
+            continue
+
+        path = [start]
+        while best_next[path[-1]] != -1:
+            path.append(best_next[path[-1]])
+        segments.append(Segment(entry, tail[start], tuple(graph.line(n) for n in path)))
+
+        # Longest entry->state distance, then the worst tick through each label.
+        head = {start: 1.0}
+        for node in order:
+            if node not in head:
+                continue
+            for s in succ[node]:
+                head[s] = max(head.get(s, 0.0), head[node] + 1)
+        for node, dist in head.items():
+            label = program.lines[graph.line(node)].label
+            if label:
+                per_label[label] = max(per_label.get(label, 0.0), dist + tail[node] - 1)
+
+    return BudgetAnalysis(program, cfg, segments, per_label)
+
+
+def _reachable(succ: list[list[int]], start: int) -> set[int]:
+    seen = {start}
+    stack = [start]
+    while stack:
+        for t in succ[stack.pop()]:
+            if t not in seen:
+                seen.add(t)
+                stack.append(t)
+    return seen
+
+
+def _fmt_cost(cost: float) -> str:
+    return "unbounded" if math.isinf(cost) else str(int(cost))
+
+
+def check_file(path: Path, budget: int) -> tuple[list[Violation], BudgetAnalysis | None]:
+    try:
+        program = parse_file(path)
+    except UnicodeDecodeError:
+        return [Violation(path=path, message="not valid UTF-8 text")], None
+    except OSError as e:
+        return [Violation(path=path, message=f"read error: {e}")], None
+    except Ic10ParseError as e:
+        return [Violation(path=path, message=f"parse error: {e}")], None
+
+    analysis = analyze(program)
+    violations: list[Violation] = []
+    for seg in analysis.segments:
+        start = program.describe(seg.entry)
+        if math.isinf(seg.cost):
+            violations.append(
+                Violation(
+                    path=path,
+                    message=(
+                        f"tick starting at {start} can loop without yield/sleep "
+                        f"(loop through: {', '.join(seg.loops)})"
+                    ),
+                )
+            )
+        elif seg.cost > budget:
+            end_line = program.lines[seg.end]
+            ends = end_line.opcode if end_line.opcode in ("yield", "sleep") else "end"
+            violations.append(
+                Violation(
+                    path=path,
+                    message=(
+                        f"tick starting at {start} can run {_fmt_cost(seg.cost)} instructions "
+                        f"before {ends} at {program.describe(seg.end)} (budget {budget})"
+                    ),
+                )
+            )
+    return violations, analysis
+
+
+def _report_lines(path: Path, analysis: BudgetAnalysis) -> list[str]:
+    program = analysis.program
+    out = [f"{path}: worst {_fmt_cost(analysis.worst)} instructions per tick"]
+    for seg in analysis.segments:
+        out.append(
+            f"  from {program.describe(seg.entry)}: {_fmt_cost(seg.cost)}"
+            + ("" if math.isinf(seg.cost) else f" -> {program.describe(seg.end)}")
+        )
+    for label in sorted(analysis.per_label, key=lambda k: program.labels[k]):
+        out.append(f"  label {label}: {_fmt_cost(analysis.per_label[label])}")
+    for i in analysis.cfg.indirect:
+        out.append(f"  note: indirect jump at {program.describe(i)} assumed to reach any label")
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check worst-case IC10 instructions between yields")
+    parser.add_argument("path", help="File or directory to check")
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=DEFAULT_BUDGET,
+        help=f"Maximum instructions allowed per tick segment (default: {DEFAULT_BUDGET})",
+    )
+    parser.add_argument(
+        "--ext",
+        action="append",
+        default=[],
+        help="File extension(s) to include when checking a directory (repeatable). Example: --ext .ic10",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Print per-entry and per-label worst-case costs for every file",
+    )
+
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Path not found: {path}")
+        return 2
+
+    exts = args.ext
+    if path.is_dir() and not exts:
+        exts = [".ic10", ".ic"]
+
+    all_violations: list[Violation] = []
+    for f in iter_ic10_files(path, exts):
+        violations, analysis = check_file(f, budget=args.budget)
+        all_violations.extend(violations)
+        if args.report and analysis is not None:
+            for text in _report_lines(f, analysis):
+                print(text)
+
+    if not all_violations:
+        print("OK")
+        return 0
+
+    for v in all_violations:
+        print(f"{v.path}: {v.message}")
+
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,393 @@
+"""Control-flow graph over parsed IC10 programs.
+
+One node per source line (every line costs one instruction slot when the chip
+steps over it, see `tools/ic10_sim.py`). Edges follow IC10 jump semantics:
+- `j`/`jal`/`b*`/`b*al` to labels or absolute line numbers
+- `br*`/`jr` relative offsets (constant operands; a label operand is its line
+  number, exactly as in-game)
+- `j ra` / `b* ... ra` return to a call site (`jal`, `b*al`)
+- any other register-valued target may reach every label (flagged as indirect)
+
+`Cfg.succ` is the context-insensitive graph: `j ra` may return to every call
+site. That is the right shape for dataflow passes. Per-tick path analyses
+should use `context_graph()`, which tracks the return address stack so a
+subroutine called twice in one loop does not look like a loop by itself.
+
+`yield` and `sleep` lines end a game tick. Analyses that reason "per tick"
+treat them as sinks and start new segments at the following line.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from ic10_parse import RA_INDEX, TICK_END_OPCODES, Line, Program, register_ref
+
+
+MAX_CALL_DEPTH = 8
+
+# Opcodes whose first operand is not a destination register.
+NO_DEST_OPCODES = frozenset(
+    {
+        "s", "ss", "sb", "sbn", "sbs", "sbns", "sd", "put", "poke", "push", "clr",
+        "alias", "define", "yield", "sleep", "hcf",
+    }
+)
+
+_CONDITION_ARITY = {
+    "eq": 2, "ne": 2, "lt": 2, "le": 2, "gt": 2, "ge": 2,
+    "eqz": 1, "nez": 1, "ltz": 1, "lez": 1, "gtz": 1, "gez": 1,
+    "ap": 3, "na": 3, "apz": 2, "naz": 2, "nan": 1, "nanz": 1,
+    "dse": 1, "dns": 1,
+}
+
+
+def branch_shape(opcode: str) -> Optional[tuple[int, bool, bool]]:
+    """Return (target_arg_index, relative, links_ra) for branch opcodes."""
+
+    if opcode in ("j", "jal"):
+        return 0, False, opcode == "jal"
+    if opcode == "jr":
+        return 0, True, False
+    if opcode.startswith("br") and opcode[2:] in _CONDITION_ARITY:
+        return _CONDITION_ARITY[opcode[2:]], True, False
+    if opcode.startswith("b") and opcode.endswith("al") and opcode[1:-2] in _CONDITION_ARITY:
+        return _CONDITION_ARITY[opcode[1:-2]], False, True
+    if opcode.startswith("b") and opcode[1:] in _CONDITION_ARITY:
+        return _CONDITION_ARITY[opcode[1:]], False, False
+    return None
+
+
+def is_conditional(opcode: str) -> bool:
+    return opcode not in ("j", "jal", "jr") and branch_shape(opcode) is not None
+
+
+def register_def(program: Program, line: Line) -> Optional[int]:
+    """Register a line writes directly (None for stores, branches, directives)."""
+
+    opcode = line.opcode
+    if opcode is None or opcode in NO_DEST_OPCODES or branch_shape(opcode) is not None:
+        return None
+    if not line.args:
+        return None
+    ref = register_ref(program.resolve_alias(line.args[0]))
+    return ref[1] if ref is not None and ref[0] == 0 else None
+
+
+def register_uses(program: Program, line: Line) -> set[int]:
+    """Registers a line reads, including pointer registers of `rr1`/`dr1` operands."""
+
+    if line.opcode is None or line.opcode in ("alias", "define"):
+        return set()
+    start = 1 if register_def(program, line) is not None else 0
+    out: set[int] = set()
+    for token in line.args[start:]:
+        target = program.resolve_alias(token)
+        ref = register_ref(target)
+        if ref is None and target.startswith("dr"):
+            ref = register_ref(target[1:].split(":", 1)[0])
+        if ref is not None:
+            out.add(ref[1])
+    return out
+
+
+@dataclass(frozen=True)
+class Flow:
+    """Where control can go after one line."""
+
+    fall: Optional[int] = None
+    targets: tuple[int, ...] = ()
+    returns: bool = False
+    links: bool = False
+    indirect: bool = False
+
+
+@dataclass
+class Cfg:
+    program: Program
+    flows: list[Flow]
+    succ: list[list[int]]
+    tick_ends: set[int] = field(default_factory=set)
+    call_returns: list[int] = field(default_factory=list)
+    indirect: list[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.succ)
+
+    @property
+    def entries(self) -> list[int]:
+        """Lines where a game tick can start executing (0 and after yield/sleep)."""
+
+        out = {0} if self.succ else set()
+        out.update(i + 1 for i in self.tick_ends if i + 1 < len(self.succ))
+        return sorted(out)
+
+    def preds(self) -> list[list[int]]:
+        out: list[list[int]] = [[] for _ in self.succ]
+        for node, targets in enumerate(self.succ):
+            for t in targets:
+                out[t].append(node)
+        return out
+
+    def tick_succ(self, node: int) -> list[int]:
+        """Successors within one tick (none after a yield/sleep)."""
+
+        return [] if node in self.tick_ends else self.succ[node]
+
+    def reachable(self, start: int, *, within_tick: bool = False) -> set[int]:
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            nexts = self.tick_succ(node) if within_tick else self.succ[node]
+            for t in nexts:
+                if t not in seen:
+                    seen.add(t)
+                    stack.append(t)
+        return seen
+
+
+def _resolve_target(program: Program, line: Line, token: str, relative: bool) -> Optional[int]:
+    if token in program.labels:
+        value: Optional[float] = float(program.labels[token])
+    else:
+        value = program.resolve_constant(token)
+    if value is None:
+        return None
+    return line.index + int(value) if relative else int(value)
+
+
+def _line_flow(program: Program, line: Line, n: int) -> Flow:
+    i = line.index
+    nxt = i + 1 if i + 1 < n else None
+    opcode = line.opcode
+    if opcode is None or opcode in TICK_END_OPCODES:
+        return Flow(fall=nxt)
+    if opcode == "hcf":
+        return Flow()
+
+    shape = branch_shape(opcode)
+    if shape is None or len(line.args) <= shape[0]:
+        return Flow(fall=nxt)
+
+    arg_index, relative, links = shape
+    fall = None if opcode in ("j", "jal", "jr") else nxt
+    token = program.resolve_alias(line.args[arg_index])
+    target = _resolve_target(program, line, token, relative)
+    if target is not None:
+        targets = (target,) if 0 <= target < n else ()
+        return Flow(fall=fall, targets=targets, links=links)
+    if register_ref(token) == (0, RA_INDEX) and not relative:
+        return Flow(fall=fall, returns=True, links=links)
+    return Flow(
+        fall=fall,
+        targets=tuple(sorted(set(program.labels.values()))),
+        links=links,
+        indirect=True,
+    )
+
+
+def build_cfg(program: Program) -> Cfg:
+    n = len(program.lines)
+    flows = [_line_flow(program, line, n) for line in program.lines]
+    tick_ends = {line.index for line in program.lines if line.opcode in TICK_END_OPCODES}
+    call_returns = sorted(
+        {i + 1 for i, f in enumerate(flows) if f.links and i + 1 < n}
+    )
+
+    succ: list[list[int]] = []
+    for f in flows:
+        out = set(f.targets)
+        if f.fall is not None:
+            out.add(f.fall)
+        if f.returns:
+            out.update(call_returns)
+        succ.append(sorted(out))
+
+    return Cfg(
+        program=program,
+        flows=flows,
+        succ=succ,
+        tick_ends=tick_ends,
+        call_returns=call_returns,
+        indirect=[i for i, f in enumerate(flows) if f.indirect],
+    )
+
+
+def relocate_targets(program: Program, keep: list[int]) -> dict[int, str]:
+    """New jump operands for kept lines once only `keep` lines (in order) survive.
+
+    Numeric targets and `br*`/`jr` offsets (including a label used as an
+    offset) are rewritten so each jump lands on the same instruction; a jump
+    to a dropped line lands on the next kept one. Absolute label operands
+    need no change and are left out. Returns {line index: new operand}.
+    """
+
+    new_index = {orig: new for new, orig in enumerate(keep)}
+
+    def new_position(target: int) -> int:
+        if target < 0:
+            return target
+        for orig in keep:
+            if orig >= target:
+                return new_index[orig]
+        return len(keep) + max(0, target - len(program.lines))
+
+    out: dict[int, str] = {}
+    for orig in keep:
+        line = program.lines[orig]
+        shape = branch_shape(line.opcode or "")
+        if shape is None or len(line.args) <= shape[0]:
+            continue
+        k, relative, _ = shape
+        token = line.args[k]
+        if token in program.labels:
+            if not relative:
+                continue
+            value: Optional[float] = float(program.labels[token])
+        else:
+            value = program.resolve_constant(program.resolve_alias(token))
+        if value is None:
+            continue
+        if relative:
+            new = str(new_position(orig + int(value)) - new_index[orig])
+        else:
+            new = str(new_position(int(value)))
+        if new != token:
+            out[orig] = new
+    return out
+
+
+# (line, return-address stack, unknown returns taken so far)
+State = tuple[int, tuple[int, ...], int]
+
+
+@dataclass
+class ContextGraph:
+    """Within-tick graph over (line, return-address stack) states."""
+
+    states: list[State]
+    succ: list[list[int]]
+    index: dict[State, int]
+
+    def line(self, state: int) -> int:
+        return self.states[state][0]
+
+    def start(self, line: int) -> int:
+        return self.index[(line, (), 0)]
+
+
+def _context_successors(cfg: Cfg, state: State) -> list[State]:
+    line, stack, unwound = state
+    if line in cfg.tick_ends:
+        return []
+    flow = cfg.flows[line]
+    out: list[State] = []
+    if flow.fall is not None:
+        out.append((flow.fall, stack, unwound))
+    pushed = stack
+    if flow.links and line + 1 < len(cfg):
+        pushed = (stack + (line + 1,))[-MAX_CALL_DEPTH:]
+    for t in flow.targets:
+        out.append((t, pushed, unwound))
+    if flow.returns:
+        if stack:
+            out.append((stack[-1], stack[:-1], unwound))
+        elif unwound < MAX_CALL_DEPTH:
+            # Return address unknown (the tick started inside a subroutine, or
+            # `ra` came off the stack): return to every call site. Counting
+            # these keeps chained unknown returns from forming fake loops.
+            out.extend((r, (), unwound + 1) for r in cfg.call_returns)
+    return out
+
+
+def context_graph(cfg: Cfg, starts: Iterable[int]) -> ContextGraph:
+    states: list[State] = []
+    index: dict[State, int] = {}
+    succ: list[list[int]] = []
+    pending: list[State] = []
+
+    def intern(state: State) -> int:
+        if state not in index:
+            index[state] = len(states)
+            states.append(state)
+            succ.append([])
+            pending.append(state)
+        return index[state]
+
+    for start in starts:
+        intern((start, (), 0))
+    while pending:
+        state = pending.pop()
+        node = index[state]
+        succ[node] = sorted({intern(s) for s in _context_successors(cfg, state)})
+
+    return ContextGraph(states=states, succ=succ, index=index)
+
+
+def strongly_connected_components(succ: list[list[int]]) -> list[list[int]]:
+    """Tarjan's SCC (iterative), components in reverse topological order."""
+
+    index_of: dict[int, int] = {}
+    low: dict[int, int] = {}
+    on_stack: set[int] = set()
+    stack: list[int] = []
+    out: list[list[int]] = []
+    counter = 0
+
+    for root in range(len(succ)):
+        if root in index_of:
+            continue
+        work: list[tuple[int, int]] = [(root, 0)]
+        index_of[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, pos = work[-1]
+            if pos < len(succ[node]):
+                work[-1] = (node, pos + 1)
+                nxt = succ[node][pos]
+                if nxt not in index_of:
+                    index_of[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, 0))
+                elif nxt in on_stack:
+                    low[node] = min(low[node], index_of[nxt])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index_of[node]:
+                comp: list[int] = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    comp.append(member)
+                    if member == node:
+                        break
+                out.append(sorted(comp))
+    return out
+
+
+def is_cyclic(comp: list[int], succ: list[list[int]]) -> bool:
+    return len(comp) > 1 or comp[0] in succ[comp[0]]
+
+
+def cyclic_nodes(succ: list[list[int]]) -> set[int]:
+    """Nodes that sit on at least one cycle."""
+
+    out: set[int] = set()
+    for comp in strongly_connected_components(succ):
+        if is_cyclic(comp, succ):
+            out.update(comp)
+    return out
+
+
+def loop_labels(program: Program, lines: Iterable[int]) -> list[str]:
+    labels = {program.label_for(n) or f"line {n + 1}" for n in lines}
+    return sorted(labels)
@@ -0,0 +1,311 @@
+"""Command-token round-trip latency tracing for modular features.
+
+Runs a feature on the simulated shared network (`tools/ic10_network_sim.py`)
+and follows every command of the token protocol in
+`docs/modular_master_worker_pattern.md`:
+- published - the tick a chip writes a new value to `cmd_token` `Setting`
+  (the command type is `cmd_type` `Setting` at that moment; the protocol
+  writes the type first)
+- observed - for every other chip, the first tick it reads the `Setting` of
+  `cmd_token` or `cmd_type` after the command was published (a chip later in
+  the per-tick order can observe in the same tick: latency 0). Other logic
+  types do not count: a setup guard that only checks the channels'
+  `PrefabHash` never observes
+- acted - the first tick at or after observing that the chip's own
+  `db Setting` status changed, within `--window` ticks
+
+Only the latest command is attributed: a read after the next command was
+published counts for the next one. Chips that read the channels but never
+change status show up as observers without a round trip.
+
+Latency depends on where each chip sits in the per-tick order, which the game
+does not fix. `--orders N` repeats the run with N chip orders (the name
+contract order, then N-1 seeded shuffles) and pools the samples, so the
+histograms show best and worst placements as workers are added.
+
+Reported per command type: how many commands, histograms (in ticks) of
+published -> observed, observed -> acted and published -> acted (round trip),
+and per observer chip the mean latencies and how many commands it missed.
+
+Examples
+    python tools/ic10_cmd_trace.py "modular scripts/SatCom"
+    python tools/ic10_cmd_trace.py "modular scripts/AutolatheVendStock" --ticks 400 --orders 8
+    python tools/ic10_cmd_trace.py "modular scripts/SatCom" --devices satcom_env.json --json
+
+Exit codes
+  0 - traced (at least one command was published)
+  1 - no command was published, or a chip faulted or exhausted its line budget
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from ic10_network_sim import FeatureNetwork, NetworkReport
+from ic10_parse import Ic10ParseError
+from ic10_sim import DEFAULT_TICK_BUDGET, Device
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_TICKS = 400
+DEFAULT_WINDOW = 20
+TOKEN_CHANNEL = "cmd_token"
+TYPE_CHANNEL = "cmd_type"
+BAR_WIDTH = 40
+
+
+@dataclass
+class Command:
+    token: float
+    type: Optional[float]  # None: the feature has no cmd_type channel
+    publisher: str
+    published: int
+    order: int  # which --orders run
+    observed: dict[str, int] = field(default_factory=dict)  # housing -> tick
+    acted: dict[str, int] = field(default_factory=dict)  # housing -> tick
+
+
+class CommandTracer:
+    """Collects `Command`s from one feature network run."""
+
+    def __init__(self, net: FeatureNetwork, *, order: int = 0, window: int = DEFAULT_WINDOW) -> None:
+        if TOKEN_CHANNEL not in net.devices:
+            raise ValueError(f"{net.feature} has no `{TOKEN_CHANNEL}` Logic Memory in its name contract")
+        self.net = net
+        self.order = order
+        self.window = window
+        self.commands: list[Command] = []
+        self.tick = 0
+        self._token = net.devices[TOKEN_CHANNEL].fields.get("Setting", 0.0)
+        self._status = {report.housing: chip.housing.read("Setting") for chip, report in net.chips}
+        net.watch(self._access)
+
+    def _access(self, device: Device, op: str, logic_type: str, value: float) -> None:
+        who = self.net.current
+        if who is None or logic_type != "Setting" or device.name not in (TOKEN_CHANNEL, TYPE_CHANNEL):
+            return
+        if op == "write":
+            if device.name == TOKEN_CHANNEL and value != self._token:
+                self._token = value
+                type_device = self.net.devices.get(TYPE_CHANNEL)
+                command_type = type_device.fields.get("Setting", 0.0) if type_device is not None else None
+                self.commands.append(Command(value, command_type, who, self.tick, self.order))
+            return
+        if self.commands:
+            command = self.commands[-1]
+            if who != command.publisher and who not in command.observed:
+                command.observed[who] = self.tick
+
+    def on_tick(self, tick: int) -> None:
+        for chip, report in self.net.chips:
+            status = chip.housing.read("Setting")
+            if status == self._status[report.housing]:
+                continue
+            self._status[report.housing] = status
+            if self.commands:
+                command = self.commands[-1]
+                seen = command.observed.get(report.housing)
+                if seen is not None and report.housing not in command.acted and tick - seen <= self.window:
+                    command.acted[report.housing] = tick
+        self.tick = tick + 1
+
+
+def trace(
+    feature_dir: Path,
+    *,
+    ticks: int = DEFAULT_TICKS,
+    orders: int = 1,
+    window: int = DEFAULT_WINDOW,
+    env: Optional[dict[str, Any]] = None,
+    chip_overrides: Optional[dict[str, str]] = None,
+    budget: int = DEFAULT_TICK_BUDGET,
+) -> tuple[list[Command], list[NetworkReport]]:
+    commands: list[Command] = []
+    reports: list[NetworkReport] = []
+    for order in range(orders):
+        net = FeatureNetwork(
+            feature_dir,
+            chip_overrides=chip_overrides,
+            env=env,
+            budget=budget,
+            order_seed=order if order else None,
+        )
+        tracer = CommandTracer(net, order=order, window=window)
+        reports.append(net.run(ticks, on_tick=tracer.on_tick))
+        commands.extend(tracer.commands)
+    return commands, reports
+
+
+def _number(value: Optional[float]) -> str:
+    if value is None:
+        return "?"
+    return f"{value:.0f}" if value == int(value) else f"{value:g}"
+
+
+def histogram(samples: list[int]) -> list[str]:
+    if not samples:
+        return ["      (no samples)"]
+    counts = Counter(samples)
+    peak = max(counts.values())
+    ordered = sorted(samples)
+    out = [
+        f"      n={len(samples)} min {ordered[0]} median {ordered[len(ordered) // 2]} max {ordered[-1]} "
+        f"mean {sum(samples) / len(samples):.2f}"
+    ]
+    for value in range(ordered[0], ordered[-1] + 1):
+        count = counts.get(value, 0)
+        if count:
+            bar = "#" * max(1, round(count * BAR_WIDTH / peak))
+            out.append(f"      {value:>4} | {bar} {count}")
+    return out
+
+
+def latencies(commands: list[Command]) -> dict[str, list[int]]:
+    result: dict[str, list[int]] = {"observed": [], "acted": [], "roundTrip": []}
+    for c in commands:
+        for who, seen in c.observed.items():
+            result["observed"].append(seen - c.published)
+            if who in c.acted:
+                result["acted"].append(c.acted[who] - seen)
+                result["roundTrip"].append(c.acted[who] - c.published)
+    return result
+
+
+def observer_rows(
+    commands: list[Command], housings: list[str]
+) -> list[tuple[str, int, int, Optional[float], Optional[float]]]:
+    """(housing, commands observed, commands missed, mean observe latency, mean round trip) per chip."""
+
+    rows = []
+    for housing in housings:
+        mine = [c for c in commands if c.publisher != housing]
+        seen = [c.observed[housing] - c.published for c in mine if housing in c.observed]
+        trips = [c.acted[housing] - c.published for c in mine if housing in c.acted]
+        if not seen:
+            continue
+        rows.append(
+            (
+                housing,
+                len(seen),
+                len(mine) - len(seen),
+                sum(seen) / len(seen),
+                sum(trips) / len(trips) if trips else None,
+            )
+        )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Trace cmd_token command latency across a modular feature's chips")
+    parser.add_argument("feature", help="Feature folder, e.g. \"modular scripts/SatCom\"")
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=DEFAULT_TICKS,
+        help=f"Game ticks per run (default: {DEFAULT_TICKS})",
+    )
+    parser.add_argument("--orders", type=int, default=1, help="Runs with different per-tick chip orders (default: 1)")
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help=f"Ticks after observing within which a status change counts as acting (default: {DEFAULT_WINDOW})",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=DEFAULT_TICK_BUDGET,
+        help=f"Per-tick instruction budget (default: {DEFAULT_TICK_BUDGET})",
+    )
+    parser.add_argument("--devices", help="JSON device specs keyed by device name (see tools/ic10_network_sim.py)")
+    parser.add_argument(
+        "--chip",
+        action="append",
+        default=[],
+        metavar="SCRIPT=HOUSING",
+        help="Run SCRIPT (file name) in HOUSING instead of the matched housing (repeatable)",
+    )
+    parser.add_argument("--json", action="store_true", help="Emit every traced command as JSON")
+    args = parser.parse_args()
+
+    feature_dir = ROOT / args.feature
+    if not (feature_dir / "Setup.md").is_file():
+        print(f"ERROR: no Setup.md in {args.feature}")
+        return 2
+    if args.ticks < 1 or args.orders < 1 or args.window < 0 or args.budget < 1:
+        print("ERROR: --ticks, --orders and --budget must be >= 1, --window >= 0")
+        return 2
+    overrides: dict[str, str] = {}
+    for spec in args.chip:
+        script, _, housing = spec.partition("=")
+        if not script or not housing:
+            print(f"ERROR: bad --chip {spec!r} (expected SCRIPT=HOUSING)")
+            return 2
+        overrides[Path(script).name] = housing
+    env: Optional[dict[str, Any]] = None
+    if args.devices:
+        try:
+            env = json.loads(Path(args.devices).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"ERROR: cannot read devices file {args.devices}: {e}")
+            return 2
+
+    try:
+        commands, reports = trace(
+            feature_dir,
+            ticks=args.ticks,
+            orders=args.orders,
+            window=args.window,
+            env=env,
+            chip_overrides=overrides,
+            budget=args.budget,
+        )
+    except (Ic10ParseError, ValueError, OSError) as e:
+        print(f"ERROR: {e}")
+        return 2
+    faulted = [c for r in reports for c in r.chips if c.errors or c.overruns]
+
+    if args.json:
+        print(json.dumps({"commands": [asdict(c) for c in commands]}, indent=2))
+        return 0 if commands and not faulted else 1
+
+    housings = [c.housing for c in reports[0].chips]
+    print(
+        f"{reports[0].feature}: {len(housings)} chip(s), {args.orders} chip order(s) x {args.ticks} tick(s); "
+        f"{len(commands)} command(s) published"
+    )
+    by_type: dict[Optional[float], list[Command]] = defaultdict(list)
+    for c in commands:
+        by_type[c.type].append(c)
+    for command_type in sorted(by_type, key=lambda t: (t is None, t or 0)):
+        group = by_type[command_type]
+        publishers = ", ".join(sorted({c.publisher for c in group}))
+        print(f"cmd_type {_number(command_type)}: {len(group)} command(s) from {publishers}")
+        samples = latencies(group)
+        for key, title in (
+            ("observed", "published -> observed"),
+            ("acted", "observed -> acted"),
+            ("roundTrip", "round trip"),
+        ):
+            print(f"    {title} (ticks)")
+            print("\n".join(histogram(samples[key])))
+        print(f"    {'observer':<24} {'seen':>5} {'missed':>6} {'observe':>8} {'round trip':>10}")
+        for housing, seen, missed, observe, trip in observer_rows(group, housings):
+            trip_text = f"{trip:.2f}" if trip is not None else "-"
+            print(f"    {housing:<24} {seen:>5} {missed:>6} {observe:>8.2f} {trip_text:>10}")
+    for c in faulted:
+        print(f"FAILED: {c.housing}: {(c.errors or ['line budget exhausted'])[0]}")
+    if not commands:
+        print("FAILED: no command was published (check --devices / --ticks)")
+    return 0 if commands and not faulted else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,320 @@
+"""Paste-limit-aware IC10 minifier with line-level source maps.
+
+Turns a readable script into a paste artifact:
+- strips comments and drops blank / comment-only lines
+- drops labels nothing refers to and merges labels that fall through to the
+  same line (`a:` directly followed by `b:` becomes one label)
+- shortens `alias` and label names (most used first, never shadowing an
+  opcode, register, device pin, constant or any word already in the script)
+- remaps numeric jump targets and `br*`/`jr` offsets so every jump still
+  lands on the same instruction
+- verifies the result with `check_file` from `tools/ic10_size_check.py`
+
+`define` names are kept: they are compile-time constants and often the only
+hint of what a tuning value means when reading the chip in-game.
+
+Each output `<name>.ic10` gets a `<name>.map.json` next to it. `lines[N]` is
+the 1-based source line of in-game line N (the chip editor counts from 0), so
+an in-game error on line N can be traced with `--line N`.
+
+Register-valued jumps (`j r0` with a computed line number) cannot be remapped
+and are reported as notes; `jal`/`j ra` pairs are safe.
+
+`--optimize` first runs the constant-folding/peephole passes from
+`tools/ic10_optimize.py`; the source map still points at the readable script.
+
+Examples
+    python tools/ic10_minify.py scripts/purge_valve/purge_valve.ic10
+    python tools/ic10_minify.py "modular scripts/SatCom/" --out build/satcom
+    python tools/ic10_minify.py scripts/pipe_temp_valve/pipe_temp_valve.ic10 --optimize
+    python tools/ic10_minify.py build/ic10/scripts/purge_valve/purge_valve.map.json --line 42
+
+Exit codes
+  0 - minified output written and within paste limits
+  1 - one or more outputs still exceed paste limits
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from ic10_cfg import branch_shape, build_cfg, relocate_targets
+from ic10_optimize import optimize
+from ic10_parse import (
+    BATCH_MODES,
+    CONSTANTS,
+    Ic10ParseError,
+    Program,
+    device_ref,
+    iter_ic10_files,
+    parse_file,
+    parse_number,
+    parse_source,
+    register_ref,
+)
+from ic10_sim import BINARY_MATH, CONDITIONS, UNARY_MATH
+from ic10_size_check import DEFAULT_MAX_BYTES, DEFAULT_MAX_COLS, DEFAULT_MAX_LINES, check_file
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_OUT = ROOT / "build" / "ic10"
+MAP_SUFFIX = ".map.json"
+
+_PLAIN_OPCODES = (
+    "move alias define j jal jr select rand l s ls ss lr ld sd lb lbn lbs lbns "
+    "sb sbn sbs sbns push pop peek poke get put clr yield sleep hcf "
+    "sdse sdns bdse bdns bdseal bdnsal brdse brdns"
+).split()
+
+
+def _opcode_names() -> set[str]:
+    names = set(_PLAIN_OPCODES) | set(UNARY_MATH) | set(BINARY_MATH)
+    for suffix in CONDITIONS:
+        names.update({f"s{suffix}", f"b{suffix}", f"b{suffix}al", f"br{suffix}"})
+    return names
+
+
+@dataclass
+class Minified:
+    source: Path
+    text: str
+    lines: list[int]  # in-game line -> 1-based source line
+    labels: dict[str, str] = field(default_factory=dict)  # new -> old
+    aliases: dict[str, str] = field(default_factory=dict)  # new -> old
+    notes: list[str] = field(default_factory=list)
+
+    def source_map(self, output: Path) -> dict:
+        return {
+            "source": _display(self.source),
+            "output": _display(output),
+            "lines": self.lines,
+            "labels": self.labels,
+            "aliases": self.aliases,
+        }
+
+
+def _display(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _short_names(reserved: set[str]) -> Iterator[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    for size in itertools.count(1):
+        for chars in itertools.product(letters, repeat=size):
+            name = "".join(chars)
+            # Keep clear of anything that reads like a register or device pin.
+            if name.lower() in reserved or name[0] in "rd":
+                continue
+            if parse_number(name) is not None or register_ref(name) or device_ref(name):
+                continue
+            yield name
+
+
+def _referenced_labels(program: Program) -> set[str]:
+    return {arg for line in program.lines for arg in line.args if arg in program.labels}
+
+
+def minify(program: Program, *, rename: bool = True) -> Minified:
+    lines = program.lines
+    referenced = _referenced_labels(program)
+
+    # Which source lines survive, and which label each merged label becomes.
+    keep: list[int] = []
+    canonical: dict[str, str] = {}
+    pending: Optional[str] = None
+    for line in lines:
+        if line.label is not None:
+            if line.label not in referenced:
+                continue
+            if pending is not None:
+                canonical[line.label] = pending
+                continue
+            pending = canonical[line.label] = line.label
+            keep.append(line.index)
+        elif line.opcode is not None:
+            keep.append(line.index)
+            pending = None
+
+    # Name shortening, most used symbols first.
+    names: dict[str, str] = {}
+    if rename:
+        uses: Counter[str] = Counter()
+        alias_names = [line.args[0] for line in lines if line.opcode == "alias" and line.args]
+        symbols = set(alias_names) | set(canonical.values())
+        for line in lines:
+            for arg in line.args:
+                if arg in canonical:
+                    uses[canonical[arg]] += 1
+                elif arg in symbols:
+                    uses[arg] += 1
+        reserved = _opcode_names() | {k.lower() for k in CONSTANTS} | {k.lower() for k in BATCH_MODES}
+        reserved |= {"sp", "ra"}
+        reserved |= {tok.lower() for line in lines for tok in (line.opcode or "",) + line.args}
+        reserved |= {name.lower() for name in program.defines}
+        fresh = _short_names(reserved)
+        for symbol in sorted(symbols, key=lambda s: (-uses[s], s)):
+            short = next(fresh)
+            names[symbol] = short if len(short) < len(symbol) else symbol
+
+    def rewrite(token: str) -> str:
+        if token in canonical:
+            token = canonical[token]
+        return names.get(token, token)
+
+    out: list[str] = []
+    notes: list[str] = []
+    cfg = build_cfg(program)
+    moved = relocate_targets(program, keep)
+    for orig in keep:
+        line = lines[orig]
+        if line.label is not None:
+            out.append(f"{rewrite(line.label)}:")
+            continue
+
+        args = [rewrite(arg) for arg in line.args]
+        if orig in moved:
+            args[branch_shape(line.opcode or "")[0]] = moved[orig]
+        if orig in cfg.indirect:
+            notes.append(
+                f"register jump at {program.describe(orig)} cannot be remapped; "
+                "make sure it only jumps to label values"
+            )
+        out.append(" ".join([line.opcode or ""] + args))
+
+    return Minified(
+        source=program.path or Path("<stdin>"),
+        text="\n".join(out) + "\n",
+        lines=[orig + 1 for orig in keep],
+        labels={rewrite(old): old for old in sorted(set(canonical.values()))},
+        aliases={names[a]: a for a in names if a not in canonical.values()},
+        notes=notes,
+    )
+
+
+def _lookup(map_path: Path, game_line: int) -> int:
+    try:
+        data = json.loads(map_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"ERROR: cannot read source map {map_path}: {e}")
+        return 2
+    lines = data.get("lines", [])
+    if not 0 <= game_line < len(lines):
+        print(f"ERROR: in-game line {game_line} is outside the script (0..{len(lines) - 1})")
+        return 2
+    source = data.get("source", "")
+    src_line = lines[game_line]
+    path = Path(source) if Path(source).is_absolute() else ROOT / source
+    try:
+        text = path.read_text(encoding="utf-8").splitlines()[src_line - 1].strip()
+    except (OSError, IndexError):
+        text = ""
+    print(f"in-game line {game_line} -> {source}:{src_line}" + (f": {text}" if text else ""))
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Minify IC10 scripts for pasting, with source maps")
+    parser.add_argument("path", help="Script file or directory (or a .map.json with --line)")
+    parser.add_argument(
+        "--out",
+        default=None,
+        help=f"Output file or directory (default: mirror under {_display(DEFAULT_OUT)}/)",
+    )
+    parser.add_argument(
+        "--ext",
+        action="append",
+        default=[],
+        help="File extension(s) to include when minifying a directory (repeatable). Example: --ext .ic10",
+    )
+    parser.add_argument("--keep-names", action="store_true", help="Do not shorten alias and label names")
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Fold constants and collapse instruction chains first (tools/ic10_optimize.py)",
+    )
+    parser.add_argument(
+        "--line",
+        type=int,
+        default=None,
+        help="With a .map.json path: print the source line for this in-game (0-based) line",
+    )
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Path not found: {path}")
+        return 2
+    if args.line is not None:
+        if not path.name.endswith(MAP_SUFFIX):
+            print(f"ERROR: --line needs a {MAP_SUFFIX} source map")
+            return 2
+        return _lookup(path, args.line)
+
+    exts = args.ext or ([".ic10", ".ic"] if path.is_dir() else [])
+    if args.out is not None:
+        out_root = Path(args.out)
+    else:
+        # Mirror the source tree: scripts/x/x.ic10 -> build/ic10/scripts/x/x.ic10
+        base = path if path.is_dir() else path.parent
+        try:
+            out_root = DEFAULT_OUT / base.resolve().relative_to(ROOT)
+        except ValueError:
+            out_root = DEFAULT_OUT
+
+    failed = False
+    for src in iter_ic10_files(path, exts):
+        if src.name.endswith(MAP_SUFFIX):
+            continue
+        try:
+            program = parse_file(src)
+        except (Ic10ParseError, OSError, UnicodeDecodeError) as e:
+            print(f"ERROR: {src}: {e}")
+            return 2
+
+        before = len(program.lines)
+        notes: list[str] = []
+        origin: Optional[list[int]] = None
+        if args.optimize:
+            optimized = optimize(program)
+            program = parse_source(optimized.text, src)
+            origin, notes = optimized.lines, optimized.notes
+        result = minify(program, rename=not args.keep_names)
+        if origin is not None:
+            result.lines = [origin[n - 1] for n in result.lines]
+        result.notes[:0] = notes
+        if path.is_dir():
+            dest = out_root / src.relative_to(path)
+        elif out_root.suffix:
+            dest = out_root
+        else:
+            dest = out_root / src.name
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_text(result.text, encoding="utf-8", newline="\n")
+        map_path = dest.with_name(dest.stem + MAP_SUFFIX)
+        map_path.write_text(json.dumps(result.source_map(dest), indent=2) + "\n", encoding="utf-8")
+
+        print(
+            f"{src} -> {_display(dest)}: {before} -> {len(result.lines)} lines, "
+            f"{len(src.read_bytes())} -> {len(result.text.encode('utf-8'))} bytes"
+        )
+        for note in result.notes:
+            print(f"  note: {note}")
+        for v in check_file(dest, DEFAULT_MAX_LINES, DEFAULT_MAX_COLS, DEFAULT_MAX_BYTES):
+            print(f"FAILED: {v.path}: {v.message}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
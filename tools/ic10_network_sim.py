@@ -0,0 +1,654 @@
+"""Multi-chip network simulator for modular master/worker features.
+
+Loads every chip of a `modular scripts/<feature>/` folder onto one shared
+data network and steps them together, using the feature's `Setup.md`:
+- `## Name contract` - one IC Housing per `IC Housing:` entry, one device
+  per other entry (``Logic Memory: `cmd_token` `` -> a `StructureLogicMemory`
+  named `cmd_token`, and so on)
+- which script runs in which housing - an explicit "housing name `x`" next to
+  the script name, otherwise the housing whose name words all appear in the
+  script name after the feature prefix (`satcom_worker_discover_1` ->
+  `discover_worker_1`, `autolathe_vend_stock_worker_machine_prep` ->
+  `machine_prep_worker`); `--chip SCRIPT=HOUSING` overrides
+- local wiring - `` `dN` -> ... `` lines under a script's heading or bullet.
+  A contract name in the line wires that device; otherwise the text names a
+  device shared by every chip that mentions it (`Autolathe`, `downstream
+  Stacker`)
+
+Device prefabs come from the contract kind (`IC Housing`, `Logic Memory`),
+from "`<hash>` (<name> prefab hash)" notes in Setup.md, or from the catalog
+(`catalog_index` lookup of the device title); anything else gets prefab hash 0.
+Deprecated placeholder scripts are skipped. Device fields read as 0 unless
+`--devices env.json` sets them, keyed by device name (or wiring text):
+
+    {"dish_1": {"fields": {"SignalStrength": [0, 0, 5]}}, "autolathe": {"reagents": {"Iron": 200}}}
+
+(the value is an `tools/ic10_sim.py` device spec; lists are per-tick traces).
+
+Schedule: each tick, traces are applied, then every chip runs one tick
+(until `yield`, `sleep`, the line budget or a fault) in name contract order,
+so a value a chip writes is visible to the chips after it in the same tick
+and to the chips before it on the next tick. The run is deterministic;
+`--order-seed N` shuffles the chip order (the game does not promise one).
+Ticks in which nothing can happen - every chip asleep in `sleep`, halted, or
+repeating a polling loop (`bdns ... yield`, `l ... yield`) over devices that
+are not changing - are skipped up to the next wake-up or trace change, with
+the same report stepping would give (see `tools/ic10_sim.py`);
+`--every-tick` steps them.
+
+Reported:
+- per chip: instructions, peak per tick, batch reads/writes (`lb*`/`sb*`),
+  direct device reads/writes, final status (`db Setting`)
+- per shared channel (`cmd_token`, `cmd_type`, `slotN`, `dataN`, other Logic
+  Memories): how often `Setting` changed, first/last tick and final value.
+  Every write that changes the value counts, so a handshake that sets and
+  clears a channel within one tick shows up as two changes
+- network traffic: batch operations, the devices they visited, per tick
+- end to end: the tick each `--until NAME.Field=VALUE` (or `!=`) condition
+  first held together (the run stops there), and the last tick any device
+  field changed
+
+Examples
+    python tools/ic10_network_sim.py "modular scripts/AutolatheVendStock" --ticks 400
+    python tools/ic10_network_sim.py "modular scripts/SatCom" --until "setup_guard.Setting=1"
+    python tools/ic10_network_sim.py "modular scripts/SatCom" --devices satcom_env.json --json
+
+Exit codes
+  0 - ran cleanly (and every `--until` condition was met)
+  1 - a chip faulted or exhausted its line budget, or `--until` was not met
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from catalog_index import CATALOG_DIR, CatalogIndex, load_index
+from ic10_parse import Ic10ParseError, ic10_hash, parse_file
+from ic10_sim import (
+    DEFAULT_TICK_BUDGET,
+    DEVICE_PINS,
+    IC_HOUSING_PREFAB,
+    TICK_SECONDS,
+    Chip,
+    Device,
+    Network,
+    TickResult,
+    TimeSkipper,
+    _device_from_spec,
+)
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_TICKS = 200
+KIND_PREFABS = {"IC Housing": IC_HOUSING_PREFAB, "Logic Memory": "StructureLogicMemory"}
+BATCH_READS = ("lb", "lbn", "lbs", "lbns")
+BATCH_WRITES = ("sb", "sbn", "sbs")
+DEVICE_READS = ("l", "ls", "lr", "ld")
+DEVICE_WRITES = ("s", "ss", "sd")
+
+CONTRACT_RE = re.compile(r"^\s*-\s*([A-Za-z][A-Za-z ]*?):\s*`([^`]+)`", re.MULTILINE)
+PREFAB_NOTE_RE = re.compile(r"`(-?\d+)`\s*\(([^)]*?)\s+prefab hash\)")
+SCRIPT_RE = re.compile(r"[A-Za-z0-9_]+\.ic10")
+PIN_RE = re.compile(r"^\s*-\s*`(d[0-5])`\s*->\s*(.+)$")
+HOUSING_NAME_RE = re.compile(r"housing name `([^`]+)`")
+CHANNEL_RE = re.compile(r"^(?:cmd_token|cmd_type|slot\d+|data\d+)$")
+UNTIL_RE = re.compile(r"^([^.=!]+)\.([A-Za-z]+)\s*(!=|=)\s*(\S+)$")
+
+
+@dataclass
+class FeatureSetup:
+    housings: list[str] = field(default_factory=list)
+    devices: list[tuple[str, str]] = field(default_factory=list)  # (kind, name)
+    prefab_notes: dict[str, int] = field(default_factory=dict)  # lowercased display name -> prefab hash
+    housing_of: dict[str, str] = field(default_factory=dict)  # script file -> explicit housing name
+    pins: dict[str, dict[str, str]] = field(default_factory=dict)  # script file -> pin -> wiring text
+
+
+def parse_setup(text: str) -> FeatureSetup:
+    setup = FeatureSetup()
+    contract = re.search(r"^## Name contract\s*$(.*?)(?=^## |\Z)", text, re.MULTILINE | re.DOTALL)
+    for kind, name in CONTRACT_RE.findall(contract.group(1) if contract else ""):
+        if kind == "IC Housing":
+            setup.housings.append(name)
+        else:
+            setup.devices.append((kind, name))
+    for value, display in PREFAB_NOTE_RE.findall(text):
+        setup.prefab_notes[display.strip().lower()] = int(value)
+
+    script: Optional[str] = None
+    for line in text.splitlines():
+        if line.startswith("## "):
+            script = None
+            continue
+        pin = PIN_RE.match(line)
+        if pin and script:
+            setup.pins.setdefault(script, {})[pin.group(1)] = pin.group(2).strip()
+            continue
+        scripts = SCRIPT_RE.findall(line)
+        if len(scripts) == 1 and (line.startswith("#") or line.lstrip().startswith("- ")):
+            script = Path(scripts[0]).name
+            explicit = HOUSING_NAME_RE.search(line)
+            if explicit:
+                setup.housing_of[script] = explicit.group(1)
+    return setup
+
+
+def _words(name: str) -> list[str]:
+    return [w for w in name.lower().split("_") if w]
+
+
+def match_housing(script_stem: str, feature: str, housings: list[str]) -> Optional[str]:
+    """The housing whose name words all appear in the script name after the feature prefix."""
+
+    words = _words(script_stem)
+    prefix = re.sub(r"[^a-z0-9]", "", feature.lower())
+    joined = ""
+    while words and prefix.startswith(joined + words[0]) and joined != prefix:
+        joined += words.pop(0)
+    candidates = [h for h in housings if set(_words(h)) <= set(words)]
+    return max(candidates, key=lambda h: (len(_words(h)), -housings.index(h)), default=None)
+
+
+def _catalog_prefab(words: list[str], catalog: CatalogIndex) -> Optional[int]:
+    """Catalog prefab hash of the device titled by the longest trailing run of `words`."""
+
+    for start in range(len(words)):
+        info = catalog.lookup("_".join(w[:1].upper() + w[1:] for w in words[start:]))
+        if info is not None:
+            return info.item_hash
+    return None
+
+
+def resolve_prefab(text: str, setup: FeatureSetup, catalog: CatalogIndex) -> int:
+    """Prefab hash for a contract kind or wiring text (0 when unknown)."""
+
+    clean = re.sub(r"\(.*?\)|`[^`]*`", " ", text).strip()
+    if clean in KIND_PREFABS:
+        return ic10_hash(KIND_PREFABS[clean])
+    lowered = clean.lower()
+    for display, value in setup.prefab_notes.items():
+        if display in lowered or display.endswith(lowered):
+            return value
+    words = re.findall(r"[A-Za-z]+", clean.split(" named ")[0])
+    return _catalog_prefab(words, catalog) or 0
+
+
+class WatchedDevice(Device):
+    """A named device that reports every logic read and write to `watch(device, op, logic_type, value)`."""
+
+    watch: Optional[Callable[[Device, str, str, float], None]] = None
+
+    def read(self, logic_type: str) -> float:
+        value = super().read(logic_type)
+        if self.watch is not None:
+            self.watch(self, "read", logic_type, value)
+        return value
+
+    def write(self, logic_type: str, value: float) -> None:
+        super().write(logic_type, value)
+        if self.watch is not None:
+            self.watch(self, "write", logic_type, value)
+
+
+class CountingNetwork(Network):
+    """A data network that counts the devices batch operations visit."""
+
+    visits: int = 0
+
+    def matching(self, prefab_hash: float, name_hash: Optional[float] = None) -> list[Device]:
+        found = super().matching(prefab_hash, name_hash)
+        self.visits += len(found)
+        return found
+
+
+@dataclass
+class ChipReport:
+    housing: str
+    script: str
+    executed: int = 0
+    peak: int = 0
+    batch_reads: int = 0
+    batch_writes: int = 0
+    device_reads: int = 0
+    device_writes: int = 0
+    overruns: int = 0
+    errors: list[str] = field(default_factory=list)
+    status: float = 0.0
+
+
+@dataclass
+class ChannelReport:
+    name: str
+    changes: int = 0
+    first: Optional[int] = None
+    last: Optional[int] = None
+    value: float = 0.0
+
+
+@dataclass
+class NetworkReport:
+    feature: str
+    ticks: int
+    chips: list[ChipReport]
+    channels: list[ChannelReport]
+    devices: int
+    batch_ops: int
+    visits: int
+    peak_batch_ops: int
+    peak_batch_tick: Optional[int]
+    last_change: Optional[int]
+    until: list[str]
+    until_met: Optional[int]
+    notes: list[str]
+
+    @property
+    def ok(self) -> bool:
+        faulted = any(c.errors or c.overruns for c in self.chips)
+        return not faulted and (not self.until or self.until_met is not None)
+
+
+class FeatureNetwork:
+    """Every chip and named device of one modular feature on one data network."""
+
+    def __init__(
+        self,
+        feature_dir: Path,
+        *,
+        chip_overrides: Optional[dict[str, str]] = None,
+        env: Optional[dict[str, Any]] = None,
+        budget: int = DEFAULT_TICK_BUDGET,
+        catalog_dir: Path = CATALOG_DIR,
+        order_seed: Optional[int] = None,
+    ) -> None:
+        self.feature = feature_dir.name
+        self.setup = parse_setup((feature_dir / "Setup.md").read_text(encoding="utf-8"))
+        self.network = CountingNetwork()
+        self.devices: dict[str, Device] = {}  # by name, or by lowercased wiring text for unnamed devices
+        self.chips: list[tuple[Chip, ChipReport]] = []
+        self.notes: list[str] = []
+        self.current: Optional[str] = None  # housing of the chip running right now
+        self._catalog = load_index(catalog_dir)
+        self._watchers: list[Callable[[Device, str, str, float], None]] = []
+
+        for name in self.setup.housings:
+            self._add(name, Device(prefab_hash=ic10_hash(IC_HOUSING_PREFAB), name=name))
+        for kind, name in self.setup.devices:
+            self._add(name, WatchedDevice(prefab_hash=resolve_prefab(kind, self.setup, self._catalog), name=name))
+
+        overrides = chip_overrides or {}
+        loaded: list[tuple[str, Path]] = []
+        for script in sorted(feature_dir.glob("*.ic10")):
+            if "deprecated placeholder" in "\n".join(script.read_text(encoding="utf-8").splitlines()[:5]).lower():
+                continue
+            housing = (
+                overrides.get(script.name)
+                or self.setup.housing_of.get(script.name)
+                or match_housing(script.stem, self.feature, self.setup.housings)
+            )
+            if housing is None:
+                housing = script.stem
+                self.notes.append(f"{script.name}: no IC Housing in the name contract matches; using '{housing}'")
+            taken = next((s for h, s in loaded if h == housing), None)
+            if taken is not None:
+                self.notes.append(f"{script.name}: housing '{housing}' already runs {taken.name}; not loaded")
+                continue
+            loaded.append((housing, script))
+
+        order = {name: i for i, name in enumerate(self.setup.housings)}
+        loaded.sort(key=lambda hs: (order.get(hs[0], len(order)), hs[0]))
+        if order_seed is not None:
+            random.Random(order_seed).shuffle(loaded)
+        for housing_name, script in loaded:
+            housing = self.devices.get(housing_name)
+            if housing is None:
+                housing = self._add(housing_name, Device(prefab_hash=ic10_hash(IC_HOUSING_PREFAB), name=housing_name))
+            pins: dict[str, Optional[Device]] = {pin: None for pin in DEVICE_PINS}
+            for pin, wiring in self.setup.pins.get(script.name, {}).items():
+                pins[pin] = self._wired_device(wiring)
+            chip = Chip(parse_file(script), housing=housing, pins=pins, network=self.network, budget=budget)
+            self.chips.append((chip, ChipReport(housing_name, script.name)))
+
+        for key, spec in (env or {}).items():
+            device = self.devices.get(key) or self.devices.get(key.lower())
+            if device is None:
+                raise ValueError(f"--devices: no device named '{key}' in {self.feature}")
+            _apply_spec(device, spec)
+
+    def _add(self, key: str, device: Device) -> Device:
+        self.devices[key] = self.network.add(device)
+        return device
+
+    def _wired_device(self, wiring: str) -> Device:
+        for name in re.findall(r"`([^`]+)`", wiring):
+            if name in self.devices:
+                return self.devices[name]
+        key = re.sub(r"\s+", " ", re.sub(r"\(.*?\)|`", " ", wiring)).strip().lower()
+        device = self.devices.get(key)
+        if device is None:
+            device = self._add(key, Device(prefab_hash=resolve_prefab(wiring, self.setup, self._catalog)))
+        return device
+
+    def _snapshot(self) -> dict[tuple[int, str], float]:
+        return {(id(d), k): v for d in self.network.devices for k, v in d.fields.items()}
+
+    def watch(self, callback: Callable[[Device, str, str, float], None]) -> None:
+        """Call `callback(device, "read" | "write", logic_type, value)` on every access to a named device.
+
+        `self.current` is the housing name of the chip making the access.
+        Callbacks added earlier keep being called.
+        """
+
+        self._watchers.append(callback)
+        for device in self.network.devices:
+            if isinstance(device, WatchedDevice):
+                device.watch = self._notify
+
+    def _notify(self, device: Device, op: str, logic_type: str, value: float) -> None:
+        for callback in self._watchers:
+            callback(device, op, logic_type, value)
+
+    def run(
+        self,
+        ticks: int,
+        until: Optional[list[tuple[str, str, str, float]]] = None,
+        on_tick: Optional[Callable[[int], None]] = None,
+        *,
+        skip_idle: bool = True,
+    ) -> NetworkReport:
+        """Step the chips for `ticks` ticks (or until every `until` condition holds).
+
+        `on_tick(tick)` runs after every tick; after a span of skipped ticks it
+        runs once, with the span's last tick.
+        """
+
+        until = until or []
+        channels = {
+            name: ChannelReport(name)
+            for kind, name in self.setup.devices
+            if kind == "Logic Memory" or CHANNEL_RE.match(name)
+        }
+        tick_writes: Counter[str] = Counter()  # channel -> changing writes in the last stepped tick
+
+        def observe(name: str, value: float) -> bool:
+            channel = channels[name]
+            if value == channel.value:
+                return False
+            channel.changes += 1
+            channel.first = tick if channel.first is None else channel.first
+            channel.last = tick
+            channel.value = value
+            return True
+
+        def reconcile() -> None:
+            # traces and seeded fields change channels without a write
+            for name in channels:
+                observe(name, self.devices[name].fields.get("Setting", 0.0))
+
+        def count_write(device: Device, op: str, logic_type: str, value: float) -> None:
+            # a write cleared again later in the same tick never reaches the snapshot
+            if op == "write" and logic_type == "Setting" and device.name in channels:
+                if observe(device.name, value):
+                    tick_writes[device.name] += 1
+
+        skipper = TimeSkipper([chip for chip, _ in self.chips], self.network) if skip_idle else None
+        batch_ops = peak_batch = 0
+        peak_tick: Optional[int] = None
+        last_change: Optional[int] = None
+        until_met: Optional[int] = None
+        ran = tick_visits = 0
+        changed = False
+        tick, span = 0, 1  # span > 1: a pass over skipped ticks
+        self.watch(count_write)
+        try:
+            while tick < ticks:
+                if span == 1:
+                    self.network.apply_traces(tick)
+                    tick_writes.clear()
+                else:
+                    skipper.skip_traces(tick)
+                reconcile()
+                before = self._snapshot()
+                visits = self.network.visits
+                tick_batch = 0
+                results: list[TickResult] = []
+                for chip, report in self.chips:
+                    counts = Counter(chip.opcode_counts)
+                    self.current = report.housing
+                    result = chip.run_tick(tick) if span == 1 else chip.skip(tick, span)
+                    self.current = None
+                    results.append(result)
+                    delta = chip.opcode_counts - counts
+                    report.executed += result.executed * span
+                    report.peak = max(report.peak, result.executed)
+                    report.batch_reads += sum(delta[op] for op in BATCH_READS)
+                    report.batch_writes += sum(delta[op] for op in BATCH_WRITES)
+                    report.device_reads += sum(delta[op] for op in DEVICE_READS)
+                    report.device_writes += sum(delta[op] for op in DEVICE_WRITES)
+                    tick_batch += sum(delta[op] for op in BATCH_READS + BATCH_WRITES)
+                    if result.end == "budget":
+                        report.overruns += span
+                    elif result.end == "error" and result.executed:
+                        report.errors.append(f"tick {tick}: {result.message}")
+                last = tick + span - 1
+                if span == 1:
+                    tick_visits = self.network.visits - visits
+                else:
+                    self.network.visits += tick_visits * span
+                if on_tick is not None:
+                    on_tick(last)
+                batch_ops += tick_batch
+                if tick_batch // span > peak_batch:
+                    peak_batch, peak_tick = tick_batch // span, tick
+
+                # a skipped tick changes what the tick before it changed while a chip repeats it
+                if span == 1:
+                    changed = self._snapshot() != before
+                elif not any(chip.state == "running" for chip, _ in self.chips):
+                    changed = False
+                if changed:
+                    last_change = last
+                if span > 1 and any(chip.state == "running" for chip, _ in self.chips):
+                    for name, writes in tick_writes.items():
+                        channels[name].changes += writes * span
+                        channels[name].last = last
+                reconcile()
+                ran = last + 1
+                if until and all(self._holds(c) for c in until):
+                    until_met, ran = tick, tick + 1
+                    break
+                if skipper is None or span > 1:
+                    tick, span = tick + span, 1
+                else:
+                    following = skipper.next_tick(tick, results, ticks)
+                    tick, span = tick + 1, max(1, following - tick - 1)
+        finally:
+            self._watchers.remove(count_write)
+
+        for chip, report in self.chips:
+            report.status = chip.housing.read("Setting")
+        return NetworkReport(
+            feature=self.feature,
+            ticks=ran,
+            chips=[r for _, r in self.chips],
+            channels=list(channels.values()),
+            devices=len(self.network.devices),
+            batch_ops=batch_ops,
+            visits=self.network.visits,
+            peak_batch_ops=peak_batch,
+            peak_batch_tick=peak_tick,
+            last_change=last_change,
+            until=[f"{n}.{f}{op}{v:g}" for n, f, op, v in until],
+            until_met=until_met,
+            notes=self.notes,
+        )
+
+    def _holds(self, condition: tuple[str, str, str, float]) -> bool:
+        name, logic_type, op, value = condition
+        current = self.devices[name].read(logic_type)
+        return current == value if op == "=" else current != value
+
+
+def _apply_spec(device: Device, spec: dict[str, Any]) -> None:
+    parsed = _device_from_spec({"name": device.name, **spec})
+    if "prefab" in spec or "prefabHash" in spec:
+        device.prefab_hash = parsed.prefab_hash
+    device.fields.update(parsed.fields)
+    device.traces.update(parsed.traces)
+    device.reagents.update(parsed.reagents)
+    if parsed.slots:
+        device.slots = parsed.slots
+
+
+def _number(value: float) -> str:
+    return f"{value:.0f}" if value == int(value) else f"{value:g}"
+
+
+def _seconds(tick: Optional[int]) -> str:
+    return "never" if tick is None else f"tick {tick} ({(tick + 1) * TICK_SECONDS:g} s)"
+
+
+def format_report(report: NetworkReport) -> list[str]:
+    out = [
+        f"{report.feature}: {len(report.chips)} chip(s), {report.devices} device(s) on one network, "
+        f"{report.ticks} tick(s) ({report.ticks * TICK_SECONDS:g} s)"
+    ]
+    width = max([len(c.housing) for c in report.chips] + [7])
+    out.append(
+        f"  {'housing':<{width}} {'instr':>7} {'max':>4} {'batch r/w':>11} {'device r/w':>11} {'status':>11}  script"
+    )
+    for c in report.chips:
+        out.append(
+            f"  {c.housing:<{width}} {c.executed:>7} {c.peak:>4} {f'{c.batch_reads}/{c.batch_writes}':>11} "
+            f"{f'{c.device_reads}/{c.device_writes}':>11} {_number(c.status):>11}  {c.script}"
+        )
+    for ch in report.channels:
+        span = f"ticks {ch.first}..{ch.last}" if ch.changes else "never written"
+        out.append(f"  channel {ch.name}: {ch.changes} change(s), {span}, Setting {_number(ch.value)}")
+    per_tick = report.batch_ops / report.ticks if report.ticks else 0.0
+    peak = ""
+    if report.peak_batch_tick is not None:
+        peak = f", peak {report.peak_batch_ops} at tick {report.peak_batch_tick}"
+    out.append(
+        f"  network: {report.batch_ops} batch op(s) visiting {report.visits} device(s); "
+        f"{per_tick:.1f} batch op(s)/tick{peak}"
+    )
+    out.append(f"  last state change: {_seconds(report.last_change)}")
+    if report.until:
+        out.append(f"  until {' and '.join(report.until)}: {_seconds(report.until_met)}")
+    for note in report.notes:
+        out.append(f"  note: {note}")
+    for c in report.chips:
+        if c.overruns:
+            out.append(f"  BUDGET: {c.housing}: {c.overruns} tick(s) exhausted the line budget")
+        for error in c.errors[:1]:
+            out.append(f"  ERROR: {c.housing}: {error}")
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run every chip of a modular feature on one simulated data network")
+    parser.add_argument("feature", help="Feature folder, e.g. \"modular scripts/SatCom\"")
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=DEFAULT_TICKS,
+        help=f"Game ticks to simulate (default: {DEFAULT_TICKS})",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=DEFAULT_TICK_BUDGET,
+        help=f"Per-tick instruction budget (default: {DEFAULT_TICK_BUDGET})",
+    )
+    parser.add_argument("--devices", help="JSON device specs keyed by device name (see module docstring)")
+    parser.add_argument(
+        "--chip",
+        action="append",
+        default=[],
+        metavar="SCRIPT=HOUSING",
+        help="Run SCRIPT (file name) in HOUSING instead of the matched housing (repeatable)",
+    )
+    parser.add_argument(
+        "--until",
+        action="append",
+        default=[],
+        metavar="NAME.Field=VALUE",
+        help="Stop when every condition holds (also NAME.Field!=VALUE; repeatable)",
+    )
+    parser.add_argument("--order-seed", type=int, help="Shuffle the per-tick chip order with this seed")
+    parser.add_argument(
+        "--every-tick",
+        action="store_true",
+        help="Step every tick instead of skipping ticks in which nothing can happen",
+    )
+    parser.add_argument("--json", action="store_true", help="Emit a JSON report instead of text")
+    args = parser.parse_args()
+
+    feature_dir = ROOT / args.feature
+    if not (feature_dir / "Setup.md").is_file():
+        print(f"ERROR: no Setup.md in {args.feature}")
+        return 2
+    if args.ticks < 1 or args.budget < 1:
+        print("ERROR: --ticks and --budget must be >= 1")
+        return 2
+    overrides: dict[str, str] = {}
+    for spec in args.chip:
+        script, _, housing = spec.partition("=")
+        if not script or not housing:
+            print(f"ERROR: bad --chip {spec!r} (expected SCRIPT=HOUSING)")
+            return 2
+        overrides[Path(script).name] = housing
+    env: Optional[dict[str, Any]] = None
+    if args.devices:
+        try:
+            env = json.loads(Path(args.devices).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"ERROR: cannot read devices file {args.devices}: {e}")
+            return 2
+
+    try:
+        net = FeatureNetwork(
+            feature_dir,
+            chip_overrides=overrides,
+            env=env,
+            budget=args.budget,
+            order_seed=args.order_seed,
+        )
+    except (Ic10ParseError, ValueError, OSError) as e:
+        print(f"ERROR: {e}")
+        return 2
+    until: list[tuple[str, str, str, float]] = []
+    for spec in args.until:
+        m = UNTIL_RE.match(spec)
+        if not m:
+            print(f"ERROR: bad --until {spec!r} (expected NAME.Field=VALUE or NAME.Field!=VALUE)")
+            return 2
+        name, logic_type, op, value = m.groups()
+        if name not in net.devices:
+            print(f"ERROR: --until: no device named '{name}' in {net.feature}")
+            return 2
+        try:
+            until.append((name, logic_type, op, float(value)))
+        except ValueError:
+            print(f"ERROR: bad --until value in {spec!r}")
+            return 2
+
+    report = net.run(args.ticks, until, skip_idle=not args.every_tick)
+    if args.json:
+        print(json.dumps(asdict(report), indent=2))
+    else:
+        print("\n".join(format_report(report)))
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,654 @@
+"""Constant-folding and peephole optimizer for IC10 scripts.
+
+Rewrites a readable script into an equivalent one with fewer instructions.
+Every instruction saved is a line saved against the 128-line limit, and one
+less instruction per tick when it sits in the main loop.
+
+Passes (rerun until nothing changes)
+- constant folding: arithmetic, compares and `select` whose operands are all
+  constants (`sub threshold TARGET_KPA HYST_KPA` becomes `move threshold 9750`),
+  and constant registers propagated into the lines that read them
+- offset folding: `sub tempC tempC KELVIN_TO_C` whose result is only read by
+  `<`/`<=`/`>`/`>=` compares against constants is dropped, and the compares
+  use the precomputed Kelvin value instead (same for `add`, and for `mul`/`div`
+  by a positive constant)
+- copy propagation: after `move desired current`, reads of `desired` read
+  `current` directly while neither register changes
+- chain collapsing: `op c ...` + `move d c` becomes `op d ...`, and
+  `s<cond> c a b` + `beqz`/`bnez c L` becomes one `b<cond> a b L`
+- cleanup: dead register writes, jumps to the next line, unused `define`s
+
+Analyses run on the control-flow graph from `tools/ic10_cfg.py` (liveness from
+`tools/ic10_regalloc.py`, reaching definitions here). Comments, labels and
+`alias` lines stay in place; numeric jump targets and `br*` offsets are
+remapped when lines are dropped.
+
+Limits
+- Folded compares are exact up to floating-point rounding at the threshold.
+- `beqz` fusion negates the compare (`slt` + `beqz` becomes `bge`), which
+  differs only when a reading is NaN.
+- Scripts with register-valued jumps (other than `j ra`) keep every line;
+  scripts with `rr1`/`dr1` indirect registers or rebound aliases only get the
+  line-level cleanups.
+
+Examples
+    python tools/ic10_optimize.py scripts/pipe_temp_hot_cold_valves/pipe_temp_hot_cold_valves.ic10
+    python tools/ic10_optimize.py scripts/
+    python tools/ic10_optimize.py scripts/purge_valve/purge_valve.ic10 --out /tmp/purge_valve.ic10
+    python tools/ic10_minify.py scripts/purge_valve/purge_valve.ic10 --optimize
+
+Exit codes
+  0 - report printed (and output written when requested)
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from ic10_cfg import Cfg, branch_shape, build_cfg, register_def, register_uses, relocate_targets
+from ic10_parse import SP_INDEX, Ic10ParseError, Line, Program, iter_ic10_files, parse_file, parse_source, register_ref
+from ic10_regalloc import RegallocError, check_supported, liveness
+from ic10_sim import BINARY_MATH, CONDITIONS, UNARY_MATH, Ic10RuntimeError
+
+
+GENERAL_REGISTERS = SP_INDEX  # r0..r15; sp/ra are never touched
+MAX_ROUNDS = 200
+ENTRY = -1  # pseudo definition: the value a register had when the chip started
+
+_NEGATE = {
+    "eq": "ne", "ne": "eq", "lt": "ge", "ge": "lt", "le": "gt", "gt": "le",
+    "eqz": "nez", "nez": "eqz", "ltz": "gez", "gez": "ltz", "lez": "gtz", "gtz": "lez",
+}
+_ORDERING = ("lt", "le", "gt", "ge", "ltz", "lez", "gtz", "gez")
+_OFFSET_INVERSE: dict[str, Callable[[float, float], float]] = {
+    # op -> how a threshold on the result maps back to the operand
+    "add": lambda c, k: c - k,
+    "sub": lambda c, k: c + k,
+    "mul": lambda c, k: c / k,
+    "div": lambda c, k: c * k,
+}
+# Lines whose only effect is writing their destination register.
+_PURE_OPCODES = frozenset(
+    {"move", "select", "l", "lb", "lbn", "lbs", "lbns", "ls", "lr", "ld", "get", "peek", "sdse", "sdns"}
+    | set(UNARY_MATH)
+    | set(BINARY_MATH)
+    | {f"s{suffix}" for suffix in CONDITIONS}
+)
+_BOOLEAN_OPCODES = frozenset({"sdse", "sdns"} | {f"s{suffix}" for suffix in CONDITIONS})
+
+
+@dataclass
+class Optimized:
+    source: Path
+    text: str
+    lines: list[int]  # output line -> 1-based source line
+    changes: list[str] = field(default_factory=list)
+    notes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Edits:
+    rewrite: dict[int, tuple[str, ...]] = field(default_factory=dict)  # line -> (opcode, *args)
+    delete: set[int] = field(default_factory=set)
+    changes: list[tuple[int, str]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.rewrite or self.delete)
+
+    def touched(self, *lines: int) -> bool:
+        return any(i in self.rewrite or i in self.delete for i in lines)
+
+
+@dataclass
+class _Facts:
+    program: Program
+    cfg: Cfg
+    preds: list[list[int]]
+    defs: list[Optional[int]]
+    live_out: list[set[int]]
+    reach: list[Optional[tuple[frozenset[int], ...]]]
+    registers: bool  # register passes are safe (no indirect registers / rebound aliases)
+    can_delete: bool  # dropping lines cannot break register-valued jumps
+
+    def reg(self, token: str) -> Optional[int]:
+        ref = register_ref(self.program.resolve_alias(token))
+        if ref is None or ref[0] != 0 or ref[1] >= GENERAL_REGISTERS:
+            return None
+        return ref[1]
+
+    def constant(self, token: str) -> Optional[float]:
+        return self.program.resolve_constant(self.program.resolve_alias(token))
+
+    def value_positions(self, line: Line) -> list[int]:
+        """Operand indexes read as values (a register or a constant fits)."""
+
+        if line.opcode is None or line.opcode in ("alias", "define"):
+            return []
+        start = 1 if self.defs[line.index] is not None else 0
+        shape = branch_shape(line.opcode)
+        target = shape[0] if shape is not None else None
+        return [k for k in range(start, len(line.args)) if k != target]
+
+    def fall_chain(self, j: int) -> Optional[int]:
+        """The code line that always runs right before `j` (only blank/comment lines between)."""
+
+        node = j
+        while True:
+            if self.preds[node] != [node - 1]:
+                return None
+            node -= 1
+            line = self.program.lines[node]
+            if line.opcode is not None:
+                return node
+            if line.label is not None:
+                return None
+
+
+def _literal(value: float) -> str:
+    if value == int(value) and abs(value) < 2**53:
+        return str(int(value))
+    return repr(value)
+
+
+def _reaching(cfg: Cfg, defs: list[Optional[int]]) -> list[Optional[tuple[frozenset[int], ...]]]:
+    """Forward may-analysis: which lines' writes can reach each line, per register."""
+
+    reach: list[Optional[tuple[frozenset[int], ...]]] = [None] * len(cfg)
+    if not reach:
+        return reach
+    reach[0] = tuple(frozenset({ENTRY}) for _ in range(GENERAL_REGISTERS))
+    work = [0]
+    while work:
+        node = work.pop()
+        out = reach[node]
+        d = defs[node]
+        if d is not None and d < GENERAL_REGISTERS:
+            out = out[:d] + (frozenset({node}),) + out[d + 1 :]
+        for t in cfg.succ[node]:
+            old = reach[t]
+            new = out if old is None else tuple(a | b for a, b in zip(old, out))
+            if new != old:
+                reach[t] = new
+                work.append(t)
+    return reach
+
+
+def _analyze(program: Program) -> _Facts:
+    cfg = build_cfg(program)
+    try:
+        check_supported(program)
+        registers = True
+    except RegallocError:
+        registers = False
+    defs = [register_def(program, line) for line in program.lines]
+    _, live_out = liveness(cfg)
+    return _Facts(
+        program=program,
+        cfg=cfg,
+        preds=cfg.preds(),
+        defs=defs,
+        live_out=live_out,
+        reach=_reaching(cfg, defs),
+        registers=registers,
+        can_delete=not cfg.indirect,
+    )
+
+
+def _code(opcode: Optional[str], args: tuple[str, ...]) -> str:
+    return " ".join((opcode or "",) + tuple(args))
+
+
+# ---- passes ---------------------------------------------------------------------
+
+
+def _folded_value(f: _Facts, line: Line) -> Optional[float]:
+    """Value of an arithmetic or compare line whose operands are all constants."""
+
+    opcode, args = line.opcode or "", line.args
+    consts = [f.constant(a) for a in args[1:]]
+    if None in consts:
+        return None
+    try:
+        if opcode in BINARY_MATH and len(args) == 3:
+            value = BINARY_MATH[opcode](*consts)
+        elif opcode in UNARY_MATH and len(args) == 2:
+            value = UNARY_MATH[opcode](*consts)
+        elif opcode.startswith("s") and opcode[1:] in CONDITIONS and len(args) == CONDITIONS[opcode[1:]][0] + 1:
+            value = 1.0 if CONDITIONS[opcode[1:]][1](*consts) else 0.0
+        else:
+            return None
+    except (Ic10RuntimeError, OverflowError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _fold_select(f: _Facts, line: Line) -> Optional[tuple[str, ...]]:
+    """`select` with a constant or boolean condition, or equal branches."""
+
+    args = line.args
+    if len(args) != 4:
+        return None
+    cond, a, b = (f.constant(t) for t in args[1:])
+    if cond is not None:
+        return ("move", args[0], args[2] if cond != 0 else args[3])
+    if args[2] == args[3]:
+        return ("move", args[0], args[2])
+    if (a, b) not in ((1, 0), (0, 1)):
+        return None
+    reg = f.reg(args[1])
+    sources = f.reach[line.index][reg] if reg is not None else frozenset({ENTRY})
+    if ENTRY in sources or any(f.program.lines[s].opcode not in _BOOLEAN_OPCODES for s in sources):
+        return None
+    return ("move", args[0], args[1]) if a == 1 else ("seqz", args[0], args[1])
+
+
+def _fold_constants(f: _Facts) -> _Edits:
+    edits = _Edits()
+    for line in f.program.lines:
+        i = line.index
+        if f.reach[i] is None or f.defs[i] is None or f.defs[i] >= GENERAL_REGISTERS:
+            continue
+        if line.opcode == "select":
+            new = _fold_select(f, line)
+        else:
+            value = _folded_value(f, line)
+            new = ("move", line.args[0], _literal(value)) if value is not None else None
+        if new is None:
+            continue
+        edits.rewrite[i] = new
+        edits.changes.append((i, f"folded `{_code(line.opcode, line.args)}` to `{_code(new[0], new[1:])}`"))
+    return edits
+
+
+def _propagate_constants(f: _Facts) -> _Edits:
+    edits = _Edits()
+    for line in f.program.lines:
+        i = line.index
+        if f.reach[i] is None:
+            continue
+        args = list(line.args)
+        done: list[str] = []
+        for k in f.value_positions(line):
+            reg = f.reg(args[k])
+            if reg is None:
+                continue
+            sources = f.reach[i][reg]
+            if ENTRY in sources:
+                continue
+            tokens: set[str] = set()
+            values: set[float] = set()
+            for s in sources:
+                src = f.program.lines[s]
+                value = f.constant(src.args[1]) if src.opcode == "move" and len(src.args) == 2 else None
+                if value is None:
+                    break
+                tokens.add(src.args[1])
+                values.add(value)
+            else:
+                if len(values) == 1:
+                    done.append(args[k])
+                    args[k] = tokens.pop() if len(tokens) == 1 else _literal(values.pop())
+        if done:
+            edits.rewrite[i] = (line.opcode or "",) + tuple(args)
+            edits.changes.append((i, f"constant {', '.join(sorted(set(done)))} folded into `{line.opcode}`"))
+    return edits
+
+
+def _offset_operand(f: _Facts, line: Line) -> Optional[tuple[int, float]]:
+    """(register, constant) for `add/sub/mul/div r r K` shaped lines."""
+
+    opcode, args = line.opcode, line.args
+    if opcode not in _OFFSET_INVERSE or len(args) != 3:
+        return None
+    dest = f.defs[line.index]
+    if f.reg(args[1]) == dest and f.constant(args[2]) is not None:
+        k = f.constant(args[2])
+    elif opcode in ("add", "mul") and f.reg(args[2]) == dest and f.constant(args[1]) is not None:
+        k = f.constant(args[1])
+    else:
+        return None
+    if not math.isfinite(k) or (opcode in ("mul", "div") and k <= 0):
+        return None
+    return dest, k
+
+
+def _compare_parts(opcode: str) -> Optional[tuple[str, str, str]]:
+    """Split `slt`/`blt`/`brlt`/`bltal` style opcodes into (head, condition, tail)."""
+
+    for head in ("s", "br", "b"):
+        if not opcode.startswith(head):
+            continue
+        rest = opcode[len(head) :]
+        if rest in _NEGATE:
+            return head, rest, ""
+        if head == "b" and rest.endswith("al") and rest[:-2] in _NEGATE:
+            return head, rest[:-2], "al"
+    return None
+
+
+def _fold_offsets(f: _Facts) -> _Edits:
+    edits = _Edits()
+    if not f.can_delete:
+        return edits
+    lines = f.program.lines
+    for line in lines:
+        i = line.index
+        if f.reach[i] is None or f.defs[i] is None or f.defs[i] >= GENERAL_REGISTERS:
+            continue
+        shape = _offset_operand(f, line)
+        if shape is None:
+            continue
+        reg, k = shape
+        uses = [
+            u
+            for u in range(len(lines))
+            if f.reach[u] is not None and i in f.reach[u][reg] and reg in register_uses(f.program, lines[u])
+        ]
+        rewrites: dict[int, tuple[str, ...]] = {}
+        for u in uses:
+            parts = _compare_parts(lines[u].opcode or "")
+            if u == i or f.reach[u][reg] != {i} or parts is None or parts[1] not in _ORDERING:
+                break
+            head, cond, tail = parts
+            first = 1 if head == "s" else 0
+            args = lines[u].args
+            arity = 1 if cond.endswith("z") else 2
+            operands = list(args[first : first + arity])
+            rest = args[first + arity :]
+            if len(args) < first + arity or [f.reg(a) for a in args[first:]].count(reg) != 1:
+                break
+            if f.reg(operands[0]) != reg and (arity == 1 or f.reg(operands[1]) != reg):
+                break
+            if arity == 1:
+                operands.append("0")
+                cond = cond[:-1]
+            side = 0 if f.reg(operands[0]) == reg else 1
+            c = f.constant(operands[1 - side])
+            if c is None:
+                break
+            operands[1 - side] = _literal(_OFFSET_INVERSE[line.opcode](c, k))
+            rewrites[u] = (head + cond + tail,) + tuple(args[:first]) + tuple(operands) + tuple(rest)
+        else:
+            if not uses or edits.touched(i, *rewrites):
+                continue
+            edits.rewrite.update(rewrites)
+            edits.delete.add(i)
+            edits.changes.append((i, f"folded `{_code(line.opcode, line.args)}` into {len(uses)} compare(s)"))
+    return edits
+
+
+def _flood(f: _Facts, starts: list[int], stop: Callable[[int], bool], avoid: int) -> set[int]:
+    """Nodes reachable from `starts`; `stop` nodes are included but not expanded."""
+
+    seen: set[int] = set()
+    stack = list(starts)
+    while stack:
+        node = stack.pop()
+        if node == avoid or node in seen:
+            continue
+        seen.add(node)
+        if not stop(node):
+            stack.extend(f.cfg.succ[node])
+    return seen
+
+
+def _propagate_copies(f: _Facts) -> _Edits:
+    edits = _Edits()
+    lines = f.program.lines
+    for line in lines:
+        i = line.index
+        if line.opcode != "move" or len(line.args) != 2 or f.reach[i] is None:
+            continue
+        dest, src = f.defs[i], f.reg(line.args[1])
+        if dest is None or dest >= GENERAL_REGISTERS or src is None or src == dest:
+            continue
+        # Where `src` may have changed since the copy while `dest` still holds it.
+        def kills_dest(n: int) -> bool:
+            return f.defs[n] == dest
+
+        after = _flood(f, f.cfg.succ[i], kills_dest, i)
+        src_defs = [n for n in after if f.defs[n] == src]
+        stale = _flood(f, [t for n in src_defs for t in f.cfg.succ[n]], kills_dest, i)
+        for u in range(len(lines)):
+            if u in stale or f.reach[u] is None or f.reach[u][dest] != {i} or edits.touched(u):
+                continue
+            args = list(lines[u].args)
+            hits = [k for k in f.value_positions(lines[u]) if f.reg(args[k]) == dest]
+            if not hits:
+                continue
+            for k in hits:
+                args[k] = line.args[1]
+            edits.rewrite[u] = (lines[u].opcode or "",) + tuple(args)
+            edits.changes.append((u, f"read `{line.args[1]}` instead of its copy `{line.args[0]}`"))
+    return edits
+
+
+def _coalesce_moves(f: _Facts) -> _Edits:
+    edits = _Edits()
+    if not f.can_delete or not f.registers:
+        return edits
+    for line in f.program.lines:
+        j = line.index
+        if line.opcode != "move" or len(line.args) != 2 or f.reach[j] is None:
+            continue
+        dest, src = f.defs[j], f.reg(line.args[1])
+        if dest is None or dest >= GENERAL_REGISTERS or src is None or src == dest:
+            continue
+        i = f.fall_chain(j)
+        if i is None or f.defs[i] != src or src in f.live_out[j] or edits.touched(i, j):
+            continue
+        prev = f.program.lines[i]
+        edits.rewrite[i] = (prev.opcode or "", line.args[0]) + prev.args[1:]
+        edits.delete.add(j)
+        edits.changes.append((i, f"`{prev.opcode}` writes `{line.args[0]}` directly (dropped `move`)"))
+    return edits
+
+
+def _fuse_branches(f: _Facts) -> _Edits:
+    edits = _Edits()
+    if not f.can_delete or not f.registers:
+        return edits
+    for line in f.program.lines:
+        j = line.index
+        parts = _compare_parts(line.opcode or "")
+        if parts is None or parts[0] == "s" or parts[1] not in ("eqz", "nez") or len(line.args) != 2:
+            continue
+        reg = f.reg(line.args[0])
+        i = f.fall_chain(j)
+        if reg is None or i is None or f.reach[i] is None or edits.touched(i, j):
+            continue
+        prev = f.program.lines[i]
+        cmp_parts = _compare_parts(prev.opcode or "")
+        if cmp_parts is None or cmp_parts[0] != "s" or f.defs[i] != reg:
+            continue
+        if reg in f.live_out[j] or f.reg(line.args[1]) == reg:
+            continue
+        cond = cmp_parts[1] if parts[1] == "nez" else _NEGATE[cmp_parts[1]]
+        head, _, tail = parts
+        new = (head + cond + tail,) + prev.args[1:] + (line.args[1],)
+        edits.rewrite[j] = new
+        edits.delete.add(i)
+        edits.changes.append(
+            (i, f"fused `{_code(prev.opcode, prev.args)}` + `{line.opcode}` into `{_code(new[0], new[1:])}`")
+        )
+    return edits
+
+
+def _drop_dead_writes(f: _Facts) -> _Edits:
+    edits = _Edits()
+    if not f.can_delete or not f.registers:
+        return edits
+    for line in f.program.lines:
+        i, d = line.index, f.defs[line.index]
+        if f.reach[i] is None or d is None or d >= GENERAL_REGISTERS or line.opcode not in _PURE_OPCODES:
+            continue
+        if d not in f.live_out[i]:
+            edits.delete.add(i)
+            edits.changes.append((i, f"dropped dead write `{_code(line.opcode, line.args)}`"))
+    return edits
+
+
+def _drop_jumps_to_next(f: _Facts) -> _Edits:
+    edits = _Edits()
+    if not f.can_delete:
+        return edits
+    lines = f.program.lines
+    for line in lines:
+        i = line.index
+        flow = f.cfg.flows[i]
+        if flow.links or flow.returns or flow.indirect or len(flow.targets) != 1:
+            continue
+        target = flow.targets[0]
+        if target > i and all(lines[n].opcode is None for n in range(i + 1, target)):
+            edits.delete.add(i)
+            edits.changes.append((i, f"dropped `{_code(line.opcode, line.args)}` (target is the next line)"))
+    return edits
+
+
+def _drop_unused_defines(f: _Facts) -> _Edits:
+    edits = _Edits()
+    if not f.can_delete:
+        return edits
+    used = {arg for line in f.program.lines if line.opcode != "define" for arg in line.args}
+    used |= {line.args[1] for line in f.program.lines if line.opcode == "define" and len(line.args) == 2}
+    for line in f.program.lines:
+        if line.opcode == "define" and line.args and line.args[0] not in used:
+            edits.delete.add(line.index)
+            edits.changes.append((line.index, f"dropped unused `define {line.args[0]}`"))
+    return edits
+
+
+REGISTER_PASSES = (_fold_constants, _propagate_constants, _fold_offsets, _propagate_copies)
+PASSES = REGISTER_PASSES + (
+    _coalesce_moves,
+    _fuse_branches,
+    _drop_dead_writes,
+    _drop_jumps_to_next,
+    _drop_unused_defines,
+)
+
+
+# ---- driver ---------------------------------------------------------------------
+
+
+def _render(raw: str, parts: tuple[str, ...]) -> str:
+    """Replace the code part of a line, keeping its indentation and comment."""
+
+    code, sep, comment = raw.partition("#")
+    indent = code[: len(code) - len(code.lstrip())]
+    gap = code[len(code.rstrip()) :] or " "
+    return indent + " ".join(parts) + (gap + sep + comment if sep else "")
+
+
+def _apply(program: Program, origin: list[int], edits: _Edits) -> tuple[Program, list[int]]:
+    texts = [line.text for line in program.lines]
+    for i, parts in edits.rewrite.items():
+        texts[i] = _render(texts[i], parts)
+    if edits.delete:
+        staged = parse_source("\n".join(texts) + "\n", program.path)
+        keep = [i for i in range(len(texts)) if i not in edits.delete]
+        for i, token in relocate_targets(staged, keep).items():
+            line = staged.lines[i]
+            args = list(line.args)
+            args[branch_shape(line.opcode or "")[0]] = token
+            texts[i] = _render(texts[i], (line.opcode or "",) + tuple(args))
+        texts = [texts[i] for i in keep]
+        origin = [origin[i] for i in keep]
+    return parse_source("\n".join(texts) + "\n", program.path), origin
+
+
+def optimize(program: Program) -> Optimized:
+    origin = list(range(len(program.lines)))
+    changes: list[str] = []
+    notes: list[str] = []
+    current = program
+    for _ in range(MAX_ROUNDS):
+        facts = _analyze(current)
+        passes = PASSES if facts.registers else PASSES[len(REGISTER_PASSES) :]
+        edits = next((e for e in (p(facts) for p in passes) if e), None)
+        if edits is None:
+            break
+        changes.extend(f"line {origin[i] + 1}: {message}" for i, message in edits.changes)
+        current, origin = _apply(current, origin, edits)
+
+    facts = _analyze(current)
+    if not facts.registers:
+        notes.append("indirect registers or rebound aliases: register passes skipped")
+    if not facts.can_delete:
+        notes.append("register-valued jumps: no lines dropped")
+    return Optimized(
+        source=program.path or Path("<stdin>"),
+        text="\n".join(line.text for line in current.lines) + "\n",
+        lines=[o + 1 for o in origin],
+        changes=changes,
+        notes=notes,
+    )
+
+
+def _instructions(program: Program) -> int:
+    return sum(1 for line in program.lines if line.opcode is not None)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fold constants and collapse instruction chains in IC10 scripts")
+    parser.add_argument("path", help="Script file or directory")
+    parser.add_argument(
+        "--ext",
+        action="append",
+        default=[],
+        help="File extension(s) to include when scanning a directory (repeatable). Example: --ext .ic10",
+    )
+    parser.add_argument("--out", default=None, help="Write optimized script(s) to this file or directory")
+    parser.add_argument("--quiet", action="store_true", help="Only print the per-script summary line")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Path not found: {path}")
+        return 2
+
+    exts = args.ext or ([".ic10", ".ic"] if path.is_dir() else [])
+    out_root = Path(args.out) if args.out is not None else None
+    status = 0
+    for src in iter_ic10_files(path, exts):
+        try:
+            program = parse_file(src)
+        except (Ic10ParseError, OSError, UnicodeDecodeError) as e:
+            print(f"ERROR: {src}: {e}")
+            status = 2
+            continue
+
+        result = optimize(program)
+        after = parse_source(result.text, src)
+        print(
+            f"{src}: {len(program.lines)} -> {len(after.lines)} lines, "
+            f"{_instructions(program)} -> {_instructions(after)} instructions"
+        )
+        if not args.quiet:
+            for change in result.changes:
+                print(f"  {change}")
+        for note in result.notes:
+            print(f"  note: {note}")
+
+        if out_root is None:
+            continue
+        if path.is_dir():
+            dest = out_root / src.relative_to(path)
+        elif out_root.suffix:
+            dest = out_root
+        else:
+            dest = out_root / src.name
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_text(result.text, encoding="utf-8", newline="\n")
+        print(f"  wrote {dest}")
+
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
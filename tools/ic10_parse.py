@@ -0,0 +1,255 @@
+"""IC10 source parser shared by the IC10 tooling.
+
+Turns a paste-ready `.ic10` file into a list of tokenized lines plus the
+static tables every analysis needs:
+- labels (name -> 0-based line index, the same index `j <n>` uses in-game)
+- `define` constants (including `HASH("...")` values and chained defines)
+- `alias` targets (last declaration wins; most scripts declare once at the top)
+
+Line numbers
+- `Line.index` is 0-based, matching the in-game editor and jump targets.
+- Human-facing reports print `index + 1` so they line up with text editors
+  and with `tools/ic10_size_check.py`.
+
+This module only parses; it does not execute or validate instruction arity.
+See `tools/ic10_sim.py` for execution.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+DEVICE_PINS = ("d0", "d1", "d2", "d3", "d4", "d5")
+REGISTER_COUNT = 18  # r0..r15, sp (r16), ra (r17)
+SP_INDEX = 16
+RA_INDEX = 17
+
+BATCH_MODES = {"Average": 0, "Sum": 1, "Minimum": 2, "Maximum": 3}
+
+CONSTANTS = {
+    "pi": math.pi,
+    "deg2rad": math.pi / 180.0,
+    "rad2deg": 180.0 / math.pi,
+    "epsilon": 2.220446049250313e-16,
+    "nan": math.nan,
+    "pinf": math.inf,
+    "ninf": -math.inf,
+}
+
+# Batch device operations broadcast over the whole data network.
+BATCH_OPCODES = frozenset({"lb", "sb", "lbn", "sbn", "lbs", "sbs", "lbns", "sbns"})
+# Instructions that end the current game tick for the chip.
+TICK_END_OPCODES = frozenset({"yield", "sleep"})
+
+_TOKEN_RE = re.compile(r'(?:HASH|STR)\("[^"]*"\)|\S+')
+_HASH_RE = re.compile(r'^HASH\("([^"]*)"\)$')
+_STR_RE = re.compile(r'^STR\("([^"]{0,6})"\)$')
+_LABEL_RE = re.compile(r"^([A-Za-z_.][A-Za-z0-9_.]*):$")
+_REGISTER_RE = re.compile(r"^(r+)(\d+)$")
+_DEVICE_RE = re.compile(r"^d(\d+|b)$")
+
+
+class Ic10ParseError(ValueError):
+    pass
+
+
+def ic10_hash(text: str) -> int:
+    """Return the in-game `HASH("text")` value (CRC-32 as a signed 32-bit int)."""
+
+    value = zlib.crc32(text.encode("utf-8")) & 0xFFFFFFFF
+    return value - 0x1_0000_0000 if value & 0x8000_0000 else value
+
+
+def parse_number(token: str) -> Optional[float]:
+    """Parse an IC10 numeric literal (decimal, `$hex`, `%binary`, HASH/STR).
+
+    Returns None when the token is not a literal (register, alias, define...).
+    """
+
+    m = _HASH_RE.match(token)
+    if m:
+        return float(ic10_hash(m.group(1)))
+    m = _STR_RE.match(token)
+    if m:
+        packed = 0
+        for ch in m.group(1):
+            packed = packed * 256 + (ord(ch) & 0xFF)
+        return float(packed)
+    try:
+        if token.startswith("$"):
+            return float(int(token[1:].replace("_", ""), 16))
+        if token.startswith("%"):
+            return float(int(token[1:].replace("_", ""), 2))
+    except ValueError:
+        return None
+    if token in CONSTANTS:
+        return CONSTANTS[token]
+    if not token or not (token[0].isdigit() or token[0] in "-+."):
+        return None
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def register_ref(token: str) -> Optional[tuple[int, int]]:
+    """Return (indirection_depth, register_index) for `r3`, `rr3`, `sp`, `ra`.
+
+    Depth 0 is a direct register; each extra leading `r` adds one level.
+    """
+
+    if token == "sp":
+        return 0, SP_INDEX
+    if token == "ra":
+        return 0, RA_INDEX
+    m = _REGISTER_RE.match(token)
+    if not m:
+        return None
+    index = int(m.group(2))
+    if index >= REGISTER_COUNT:
+        return None
+    return len(m.group(1)) - 1, index
+
+
+def device_ref(token: str) -> Optional[str]:
+    """Return a canonical device pin (`d0`..`d5`, `db`) or `dr<n>` for indirection."""
+
+    base = token.split(":", 1)[0]
+    if base in DEVICE_PINS or base == "db":
+        return base
+    if re.fullmatch(r"dr+\d+", base):
+        return base
+    return None
+
+
+@dataclass(frozen=True)
+class Line:
+    index: int
+    text: str
+    opcode: Optional[str]
+    args: tuple[str, ...]
+    label: Optional[str] = None
+
+    @property
+    def is_code(self) -> bool:
+        return self.opcode is not None
+
+
+@dataclass
+class Program:
+    lines: list[Line]
+    labels: dict[str, int] = field(default_factory=dict)
+    defines: dict[str, float] = field(default_factory=dict)
+    aliases: dict[str, str] = field(default_factory=dict)
+    path: Optional[Path] = None
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def label_for(self, index: int) -> Optional[str]:
+        """Return the nearest label at or above a line index (for reports)."""
+
+        best: Optional[str] = None
+        best_index = -1
+        for name, label_index in self.labels.items():
+            if best_index < label_index <= index:
+                best, best_index = name, label_index
+        return best
+
+    def describe(self, index: int) -> str:
+        """Format `line N (label)` using 1-based editor line numbers."""
+
+        if index >= len(self.lines):
+            return f"line {index + 1} (end of program)"
+        label = self.label_for(index)
+        return f"line {index + 1}" + (f" ({label})" if label else "")
+
+    def resolve_constant(self, token: str) -> Optional[float]:
+        """Resolve a literal or `define` name to a number (None otherwise)."""
+
+        value = parse_number(token)
+        if value is not None:
+            return value
+        return self.defines.get(token)
+
+    def resolve_alias(self, token: str) -> str:
+        """Follow static aliases to their register/device target."""
+
+        seen: set[str] = set()
+        while token in self.aliases and token not in seen:
+            seen.add(token)
+            token = self.aliases[token]
+        return token
+
+
+def tokenize_line(text: str) -> list[str]:
+    code = text.split("#", 1)[0]
+    return _TOKEN_RE.findall(code)
+
+
+def parse_source(text: str, path: Optional[Path] = None) -> Program:
+    lines: list[Line] = []
+    labels: dict[str, int] = {}
+    defines: dict[str, float] = {}
+    aliases: dict[str, str] = {}
+
+    for index, raw in enumerate(text.splitlines()):
+        tokens = tokenize_line(raw)
+        if not tokens:
+            lines.append(Line(index=index, text=raw, opcode=None, args=()))
+            continue
+
+        m = _LABEL_RE.match(tokens[0])
+        if m and len(tokens) == 1:
+            name = m.group(1)
+            if name in labels:
+                raise Ic10ParseError(f"line {index + 1}: duplicate label '{name}'")
+            labels[name] = index
+            lines.append(Line(index=index, text=raw, opcode=None, args=(), label=name))
+            continue
+
+        opcode = tokens[0]
+        args = tuple(tokens[1:])
+        lines.append(Line(index=index, text=raw, opcode=opcode, args=args))
+
+        if opcode == "define" and len(args) == 2:
+            value = parse_number(args[1])
+            if value is None:
+                value = defines.get(args[1])
+            if value is None:
+                raise Ic10ParseError(f"line {index + 1}: cannot evaluate define '{args[0]}'")
+            defines[args[0]] = value
+        elif opcode == "alias" and len(args) == 2:
+            aliases[args[0]] = args[1]
+
+    return Program(lines=lines, labels=labels, defines=defines, aliases=aliases, path=path)
+
+
+def parse_file(path: Path) -> Program:
+    return parse_source(path.read_text(encoding="utf-8"), path=path)
+
+
+def iter_ic10_files(path: Path, exts: list[str]) -> list[Path]:
+    """Expand a file/directory argument the same way `ic10_size_check.py` does."""
+
+    if path.is_file():
+        return [path]
+    if not path.is_dir():
+        return []
+    normalized = {(e if e.startswith(".") else f".{e}").lower() for e in exts}
+    out: list[Path] = []
+    for p in sorted(path.rglob("*")):
+        if not p.is_file():
+            continue
+        if any(part in {".git", "catalog", "tools"} for part in p.parts):
+            continue
+        if normalized and p.suffix.lower() not in normalized:
+            continue
+        out.append(p)
+    return out
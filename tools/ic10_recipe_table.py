@@ -0,0 +1,284 @@
+"""Generate stack-packed IC10 recipe lookup tables from the recipe catalog.
+
+Turns a producer's `catalog/recipes/<Producer>/recipes.json` into an IC10
+init block that `push`es one fixed-width record per recipe item onto the
+chip's own stack, sorted by item hash:
+
+    define RT_COUNT 23
+    define RT_STRIDE 4
+    move sp 0
+    push -2038663432
+    push 5
+    ...
+
+Record `i` starts at stack address `i * RT_STRIDE`; its fields follow in the
+order given by `--fields`:
+- `hash`   - item hash (`OccupantHash` / `RecipeHash`)
+- `time`   - build time per craft
+- `energy` - energy per craft
+- `stack`  - stack size
+- `ingots` - total raw ingots per craft (`tools/recipe_bom.py` expansion)
+
+A script then reads the table with `get rX db address` instead of a
+`seq`/`select` or branch chain per item:
+- direct indexing (record `i`): one `get` (plus a `mul` when the stride is
+  more than 1)
+- by hash: `--search rN` appends a `jal rt_find` binary search subroutine
+  (key in rN; rN+1 returns the record's stack address, or -1 when the hash is
+  not in the table; rN+2..rN+4 are scratch), at most
+  `8 + 12 * ceil(log2(count + 1))` lines per lookup (labels included, as
+  `tools/ic10_sim.py` counts them)
+
+`RT_STRIDE` is left out for single-field tables. Only recipes with an item
+hash can be tabled; the rest are skipped (and counted on stderr).
+
+`--check SCRIPT` compares the longest run of `push` lines in an existing
+script with the generated values (and its `define <PREFIX>_COUNT`), so a
+recipe refresh that changes the table is caught; `--update SCRIPT` rewrites
+that run in place. Both also check the script against the paste limits
+(`tools/ic10_size_check.py`).
+
+Examples
+    python tools/ic10_recipe_table.py
+    python tools/ic10_recipe_table.py --fields hash,time --search r10
+    python tools/ic10_recipe_table.py --fields hash \
+        --check "modular scripts/AutolatheVendStock/autolathe_vend_stock_worker_stock.ic10"
+
+Exit codes
+  0 - table generated (and the checked script is current and within paste limits)
+  1 - the checked script's table is stale, or a script exceeds paste limits
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+from ic10_parse import SP_INDEX, parse_source, register_ref
+from ic10_size_check import DEFAULT_MAX_BYTES, DEFAULT_MAX_COLS, DEFAULT_MAX_LINES, check_bytes
+from recipe_bom import Recipe, RecipeBook, load_recipes
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FIELDS = ("hash", "time", "energy", "stack", "ingots")
+DEFAULT_FIELDS = "hash,time,stack,ingots"
+STACK_SIZE = 512  # IC housing stack addresses
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def table_items(book: RecipeBook, producer: str) -> tuple[list[Recipe], int]:
+    """The producer's recipes that have an item hash, sorted by hash; plus how many were skipped."""
+
+    recipes = [r for r in book.recipes.values() if r.producer == producer]
+    hashed = sorted((r for r in recipes if r.item_hash is not None), key=lambda r: r.item_hash)
+    return hashed, len(recipes) - len(hashed)
+
+
+def record(book: RecipeBook, recipe: Recipe, fields: list[str]) -> list[float]:
+    values = {
+        "hash": float(recipe.item_hash or 0),
+        "time": recipe.time,
+        "energy": recipe.energy,
+        "stack": float(recipe.stack_size),
+    }
+    if "ingots" in fields:
+        values["ingots"] = sum(book.unit_cost(recipe.title).raw.values())
+    return [values[f] for f in fields]
+
+
+def table_values(book: RecipeBook, items: list[Recipe], fields: list[str]) -> list[float]:
+    return [value for recipe in items for value in record(book, recipe, fields)]
+
+
+def init_block(values: list[float], count: int, stride: int, prefix: str) -> list[str]:
+    lines = [f"define {prefix}_COUNT {count}"]
+    if stride > 1:
+        lines.append(f"define {prefix}_STRIDE {stride}")
+    lines.append("move sp 0")
+    lines.extend(f"push {_number(v)}" for v in values)
+    return lines
+
+
+def search_block(register: int, stride: int, prefix: str) -> list[str]:
+    """Binary search over the table's hash field (the first field)."""
+
+    key, lo, hi, mid, tmp = (f"r{register + i}" for i in range(5))
+    label = prefix.lower()
+    address = [f"mul {tmp} {mid} {prefix}_STRIDE"] if stride > 1 else [f"move {tmp} {mid}"]
+    return [
+        f"{label}_find:",
+        f"move {lo} 0",
+        f"move {hi} {prefix}_COUNT",
+        f"{label}_next:",
+        f"bge {lo} {hi} {label}_miss",
+        f"add {mid} {lo} {hi}",
+        f"srl {mid} {mid} 1",
+        *address,
+        f"get {tmp} db {tmp}",
+        f"beq {tmp} {key} {label}_hit",
+        f"slt {tmp} {tmp} {key}",
+        f"select {hi} {tmp} {hi} {mid}",
+        f"add {mid} {mid} 1",
+        f"select {lo} {tmp} {mid} {lo}",
+        f"j {label}_next",
+        f"{label}_hit:",
+        f"mul {lo} {mid} {prefix}_STRIDE" if stride > 1 else f"move {lo} {mid}",
+        "j ra",
+        f"{label}_miss:",
+        f"move {lo} -1",
+        "j ra",
+    ]
+
+
+def _push_run(lines: list[str]) -> Optional[tuple[int, int]]:
+    """(start, end) of the longest run of consecutive `push` lines, or None."""
+
+    best: Optional[tuple[int, int]] = None
+    start: Optional[int] = None
+    for i, text in enumerate(lines + [""]):
+        if text.split()[:1] == ["push"]:
+            if start is None:
+                start = i
+            continue
+        if start is not None and (best is None or i - start > best[1] - best[0]):
+            best = (start, i)
+        start = None
+    return best
+
+
+def _paste_problems(path: Path, text: str) -> list[str]:
+    raw = text.encode("utf-8")
+    return [v.message for v in check_bytes(path, raw, DEFAULT_MAX_LINES, DEFAULT_MAX_COLS, DEFAULT_MAX_BYTES)]
+
+
+def sync_script(path: Path, values: list[float], count: int, prefix: str, *, write: bool) -> list[str]:
+    """Compare (or rewrite) the table in `path`; return the problems found (after any rewrite)."""
+
+    text = path.read_text(encoding="utf-8")
+    lines = text.splitlines()
+    run = _push_run(lines)
+    if run is None:
+        return [f"{path.name}: no push block to compare"]
+
+    program = parse_source(text, path)
+    current = [program.resolve_constant(arg) for line in program.lines[run[0] : run[1]] for arg in line.args[:1]]
+    count_re = re.compile(rf"^(\s*define\s+{re.escape(prefix)}_COUNT\s+)(\S+)(.*)$")
+    count_lines = [i for i, t in enumerate(lines) if count_re.match(t)]
+
+    problems: list[str] = []
+    if current != values:
+        problems.append(f"{path.name}: table has {len(current)} value(s), catalog gives {len(values)} (or they differ)")
+    for i in count_lines:
+        if count_re.match(lines[i]).group(2) != str(count):
+            problems.append(f"{path.name}: line {i + 1}: {prefix}_COUNT is not {count}")
+
+    if write and problems:
+        for i in count_lines:
+            lines[i] = count_re.sub(rf"\g<1>{count}\g<3>", lines[i])
+        lines[run[0] : run[1]] = [f"push {_number(v)}" for v in values]
+        text = "\n".join(lines) + ("\n" if text.endswith("\n") else "")
+        path.write_text(text, encoding="utf-8")
+        print(f"Updated {path}", file=sys.stderr)
+        problems = []
+    return problems + [f"{path.name}: {p}" for p in _paste_problems(path, text)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a stack-packed IC10 recipe lookup table")
+    parser.add_argument("--producer", default="Autolathe", help="Producer wiki title (default: Autolathe)")
+    parser.add_argument(
+        "--fields",
+        default=DEFAULT_FIELDS,
+        help=f"Comma-separated record fields from {', '.join(FIELDS)} (default: {DEFAULT_FIELDS})",
+    )
+    parser.add_argument("--prefix", default="RT", help="Name prefix for defines and labels (default: RT)")
+    parser.add_argument("--search", metavar="rN", help="Append a binary search subroutine using rN..rN+4")
+    parser.add_argument(
+        "--catalog-dir",
+        default="catalog",
+        help="Catalog root directory (default: catalog)",
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--check", metavar="SCRIPT", help="Check that SCRIPT's push block matches the table")
+    group.add_argument("--update", metavar="SCRIPT", help="Rewrite SCRIPT's push block with the table")
+    args = parser.parse_args()
+
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELDS]
+    if not fields or unknown or len(set(fields)) != len(fields):
+        print(f"ERROR: --fields takes distinct names from {', '.join(FIELDS)}")
+        return 2
+    if "hash" in fields[1:] or (args.search and fields[0] != "hash"):
+        print("ERROR: hash must be the first field (the table is sorted and searched by it)")
+        return 2
+    if not re.fullmatch(r"[A-Za-z][A-Za-z0-9_]*", args.prefix):
+        print(f"ERROR: bad --prefix {args.prefix!r}")
+        return 2
+    search_register: Optional[int] = None
+    if args.search:
+        ref = register_ref(args.search)
+        if ref is None or ref[0] != 0 or not 0 <= ref[1] <= SP_INDEX - 5:
+            print(f"ERROR: --search needs r0..r{SP_INDEX - 5} (it uses five registers), got {args.search}")
+            return 2
+        search_register = ref[1]
+
+    try:
+        book = load_recipes((ROOT / args.catalog_dir).resolve())
+    except (OSError, ValueError) as e:
+        print(f"ERROR: cannot load recipes: {e}")
+        return 2
+    items, skipped = table_items(book, args.producer)
+    if not items:
+        print(f"ERROR: no {args.producer} recipes with item hashes in {args.catalog_dir}")
+        return 2
+    stride = len(fields)
+    values = table_values(book, items, fields)
+    if len(values) > STACK_SIZE:
+        print(f"ERROR: {len(values)} values do not fit the {STACK_SIZE}-address stack")
+        return 2
+
+    script = args.check or args.update
+    if script:
+        path = ROOT / script
+        if not path.is_file():
+            print(f"ERROR: not found: {script}")
+            return 2
+        problems = sync_script(path, values, len(items), args.prefix, write=bool(args.update))
+        for problem in problems:
+            print(f"FAILED: {problem}")
+        if not problems:
+            print("OK")
+        return 1 if problems else 0
+
+    lines = init_block(values, len(items), stride, args.prefix)
+    if search_register is not None:
+        lines += [""] + search_block(search_register, stride, args.prefix)
+    text = "\n".join(lines) + "\n"
+    sys.stdout.write(text)
+
+    iterations = math.ceil(math.log2(len(items) + 1))
+    print(
+        f"{len(items)} record(s) x {stride} field(s) ({', '.join(fields)}), "
+        f"{skipped} recipe(s) without item hash skipped; "
+        f"{len(lines)} line(s), {len(text.encode('utf-8'))} byte(s)",
+        file=sys.stderr,
+    )
+    if search_register is not None:
+        print(f"lookup by hash: at most {8 + 12 * iterations} line(s)", file=sys.stderr)
+    problems = _paste_problems(Path("<table>"), text)
+    for problem in problems:
+        print(f"FAILED: table alone: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+"""Liveness-based register allocator for IC10 scripts.
+
+Computes register liveness over the control-flow graph (`tools/ic10_cfg.py`),
+builds an interference graph, and renumbers `r0..r15` so values whose
+lifetimes never overlap share a register. The registers left over are free
+for caching device reads instead of re-reading them from the network.
+
+Only register numbers change: every `alias name rN` line and every raw `rN`
+operand is rewritten, so names, comments, labels and line numbers stay put.
+Registers are renamed as a whole (an alias is one name for one register for
+the entire script), so the result is easy to review with a plain diff.
+
+Left alone:
+- `sp` (r16) and `ra` (r17)
+- registers read before any write (they rely on the chip starting at 0);
+  they still take part, but two of them never share
+
+Refused (exit 2): indirect registers (`rr1`, `dr1`), which index registers by
+number, and alias names bound to more than one register.
+
+Examples
+    python tools/ic10_regalloc.py scripts/pipe_temp_hot_cold_valves/pipe_temp_hot_cold_valves.ic10
+    python tools/ic10_regalloc.py scripts/ --report-only
+    python tools/ic10_regalloc.py scripts/purge_valve/purge_valve.ic10 --out /tmp/purge_valve.ic10
+    python tools/ic10_regalloc.py scripts/purge_valve/purge_valve.ic10 --in-place
+
+Exit codes
+  0 - report printed (and script written when requested)
+  2 - usage / input error, or a script the allocator cannot safely rewrite
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from ic10_cfg import Cfg, build_cfg, register_def, register_uses
+from ic10_parse import SP_INDEX, Ic10ParseError, Program, iter_ic10_files, parse_file, register_ref
+
+
+GENERAL_REGISTERS = SP_INDEX  # r0..r15 are allocatable
+
+_REWRITE_RE = re.compile(r'(?:HASH|STR)\("[^"]*"\)|\b(r)(\d+)\b')
+
+
+class RegallocError(ValueError):
+    """The script uses registers in a way the allocator cannot rewrite safely."""
+
+
+@dataclass
+class Allocation:
+    program: Program
+    mapping: dict[int, int]  # old register -> new register
+    names: dict[int, list[str]] = field(default_factory=dict)  # old register -> alias names
+    unused: list[int] = field(default_factory=list)
+
+    @property
+    def before(self) -> list[int]:
+        return sorted(self.mapping)
+
+    @property
+    def after(self) -> list[int]:
+        return sorted(set(self.mapping.values()))
+
+    @property
+    def freed(self) -> list[int]:
+        return [r for r in range(GENERAL_REGISTERS) if r not in self.after]
+
+    @property
+    def changed(self) -> bool:
+        return any(old != new for old, new in self.mapping.items())
+
+
+def check_supported(program: Program) -> dict[int, list[str]]:
+    """Reject indirect register use; return alias names per register."""
+
+    bound: dict[str, str] = {}
+    names: dict[int, list[str]] = {}
+    for line in program.lines:
+        if line.opcode == "alias" and len(line.args) == 2:
+            name, target = line.args
+            if bound.setdefault(name, target) != target:
+                raise RegallocError(
+                    f"{program.describe(line.index)}: alias '{name}' is rebound "
+                    f"('{bound[name]}' then '{target}')"
+                )
+            ref = register_ref(target)
+            if ref is not None and ref[0] == 0 and ref[1] < GENERAL_REGISTERS:
+                names.setdefault(ref[1], []).append(name)
+        for token in line.args:
+            target = program.resolve_alias(token)
+            ref = register_ref(target)
+            if (ref is not None and ref[0] > 0) or re.fullmatch(r"dr+\d+(:\d+)?", target):
+                raise RegallocError(
+                    f"{program.describe(line.index)}: indirect register '{token}' depends on "
+                    "register numbers"
+                )
+    return names
+
+
+def liveness(cfg: Cfg) -> tuple[list[set[int]], list[set[int]]]:
+    """Backward may-liveness: (live_in, live_out) register sets per line."""
+
+    program = cfg.program
+    n = len(cfg)
+    defs = [register_def(program, line) for line in program.lines]
+    uses = [register_uses(program, line) for line in program.lines]
+    preds = cfg.preds()
+    live_in: list[set[int]] = [set() for _ in range(n)]
+    live_out: list[set[int]] = [set() for _ in range(n)]
+    work = list(range(n))
+    while work:
+        node = work.pop()
+        out: set[int] = set()
+        for t in cfg.succ[node]:
+            out |= live_in[t]
+        new_in = uses[node] | (out - {defs[node]})
+        live_out[node] = out
+        if new_in != live_in[node]:
+            live_in[node] = new_in
+            work.extend(preds[node])
+    return live_in, live_out
+
+
+def allocate(program: Program) -> Allocation:
+    names = check_supported(program)
+    cfg = build_cfg(program)
+    live_in, live_out = liveness(cfg)
+
+    mentioned: set[int] = set(names)
+    for line in program.lines:
+        d = register_def(program, line)
+        if d is not None:
+            mentioned.add(d)
+        mentioned |= register_uses(program, line)
+    regs = sorted(r for r in mentioned if r < GENERAL_REGISTERS)
+
+    interfere: dict[int, set[int]] = {r: set() for r in regs}
+
+    def link(group: set[int]) -> None:
+        group = {r for r in group if r < GENERAL_REGISTERS}
+        for a in group:
+            interfere[a] |= group - {a}
+
+    for node, line in enumerate(program.lines):
+        link(live_in[node])
+        link(live_out[node])
+        d = register_def(program, line)
+        if d is not None and d < GENERAL_REGISTERS:
+            # A write clobbers everything live after it, even if its own value is dead.
+            for other in live_out[node] - {d}:
+                if other < GENERAL_REGISTERS:
+                    interfere[d].add(other)
+                    interfere[other].add(d)
+
+    touched = {r for node in range(len(program.lines)) for r in live_in[node] | live_out[node]}
+    unused = [r for r in regs if r not in touched]
+
+    # Greedy colouring in register order, lowest free register wins: low
+    # registers keep their number and the rest pack down behind them.
+    mapping: dict[int, int] = {}
+    for reg in regs:
+        taken = {mapping[o] for o in interfere[reg] if o in mapping}
+        mapping[reg] = next(c for c in range(GENERAL_REGISTERS) if c not in taken)
+    return Allocation(program=program, mapping=mapping, names=names, unused=unused)
+
+
+def rewrite(text: str, mapping: dict[int, int]) -> str:
+    """Renumber `rN` operands in code (comments and HASH/STR strings untouched)."""
+
+    def sub(m: re.Match[str]) -> str:
+        if m.group(1) is None:
+            return m.group(0)
+        old = int(m.group(2))
+        return f"r{mapping.get(old, old)}"
+
+    out: list[str] = []
+    for raw in text.splitlines(keepends=True):
+        code, sep, comment = raw.partition("#")
+        out.append(_REWRITE_RE.sub(sub, code) + sep + comment)
+    return "".join(out)
+
+
+def _fmt_regs(regs: list[int]) -> str:
+    """`r3 r5 r6 r7` -> `r3 r5-r7`."""
+
+    if not regs:
+        return "-"
+    runs: list[list[int]] = []
+    for r in regs:
+        if runs and r == runs[-1][-1] + 1:
+            runs[-1].append(r)
+        else:
+            runs.append([r])
+    return " ".join(f"r{run[0]}" if len(run) == 1 else f"r{run[0]}-r{run[-1]}" for run in runs)
+
+
+def report_lines(path: Path, alloc: Allocation) -> list[str]:
+    out = [
+        f"{path}: {len(alloc.before)} -> {len(alloc.after)} registers, "
+        f"free after: {_fmt_regs(alloc.freed)}"
+    ]
+    for old in alloc.before:
+        new = alloc.mapping[old]
+        label = ", ".join(alloc.names.get(old, [])) or "(raw)"
+        marker = "" if old == new else f" -> r{new}"
+        note = "  (never live)" if old in alloc.unused else ""
+        out.append(f"  r{old}{marker}: {label}{note}")
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reassign IC10 alias registers by liveness")
+    parser.add_argument("path", help="Script file or directory")
+    parser.add_argument(
+        "--ext",
+        action="append",
+        default=[],
+        help="File extension(s) to include when scanning a directory (repeatable). Example: --ext .ic10",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--out", default=None, help="Write the rewritten script here (single file input)")
+    mode.add_argument("--in-place", action="store_true", help="Rewrite the script(s) in place")
+    mode.add_argument("--report-only", action="store_true", help="Only print the register report")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Path not found: {path}")
+        return 2
+    if args.out is not None and path.is_dir():
+        print("ERROR: --out needs a single script; use --in-place for directories")
+        return 2
+
+    exts = args.ext or ([".ic10", ".ic"] if path.is_dir() else [])
+    status = 0
+    for f in iter_ic10_files(path, exts):
+        try:
+            program = parse_file(f)
+            alloc = allocate(program)
+        except (Ic10ParseError, RegallocError, OSError, UnicodeDecodeError) as e:
+            print(f"ERROR: {f}: {e}")
+            status = 2
+            continue
+
+        for text in report_lines(f, alloc):
+            print(text)
+        if args.report_only or not (args.out or args.in_place):
+            continue
+        if args.in_place and not alloc.changed:
+            continue
+        dest: Optional[Path] = Path(args.out) if args.out else f
+        new_text = rewrite(f.read_text(encoding="utf-8"), alloc.mapping)
+        dest.write_text(new_text, encoding="utf-8", newline="")
+        print(f"  wrote {dest}")
+
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
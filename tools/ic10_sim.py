@@ -0,0 +1,1592 @@
+"""Headless IC10 interpreter with per-tick instruction accounting.
+
+Runs a paste-ready IC10 script against mock devices and reports, per game
+tick, how many lines the chip executed and where the tick ended:
+- `yield`  - the script handed control back to the game
+- `sleep`  - the script paused for N seconds (one game tick is 0.5 s)
+- `budget` - the chip hit the per-tick line budget (128 by default) and will
+             resume mid-loop next tick; the loops re-entered during that tick
+             are reported so they can be split with a `yield`
+- `halt`   - execution ran off the end of the program (or `hcf`)
+- `error`  - an in-game line fault (unset device pin, stack overflow, ...)
+
+Accounting model
+- Every line the program counter visits counts, including blank lines,
+  comments, labels, `alias` and `define`. This matches how the chip steps
+  through the script and is why minified scripts are cheaper per tick.
+
+Execution
+- Scripts are compiled once into one Python closure per line: labels become
+  line indices, `define`s and literals become constants, and aliases that
+  are set once in the script are substituted, so a step is a list index and
+  a call. Lines the compiler does not specialise (stack, slot and reagent
+  operations, indirect registers, re-aliased names) run through the
+  interpreter's handlers with the same results and error messages.
+  `--interpret` runs every line through the line-by-line interpreter
+  instead (for comparing the two).
+
+Time skipping
+- Ticks in which nothing can happen are not stepped. A chip asleep in
+  `sleep N` does nothing until it wakes; a chip that ends a tick exactly as it
+  ended the one before (same line, registers, aliases and devices) is polling
+  something that is not changing - a `bdns ... yield` gate, a `yield` loop
+  waiting on a reading - and repeats that tick until a trace gives a device a
+  new value. The run jumps to the next wake-up or trace change, so long idle
+  runs cost time in proportion to what happens in them. A skipped span is
+  reported as one result (`tick 12..1999` with `--trace`) with the same counts
+  stepping would give; `--every-tick` steps every tick instead.
+
+Mock devices
+- Without `--devices`, every pin the script references (`d0..d5`, directly or
+  via `alias`) gets a permissive mock device whose fields read as 0.
+- With `--devices env.json`, devices are described explicitly:
+
+    {
+      "housing": {"name": "master", "fields": {"Setting": 0}},
+      "devices": [
+        {"pin": "d0", "prefab": "StructurePipeAnalysizer", "name": "in",
+         "fields": {"Temperature": [290, 295, 300], "Pressure": 101}},
+        {"prefabHash": -1280984102, "name": "cold", "fields": {"On": 0}}
+      ]
+    }
+
+  `prefab` is hashed like `HASH("...")`; use `prefabHash` for raw values.
+  A list field value is a per-tick trace (the last value repeats).
+  Every device (and the housing) sits on the chip's data network, so batch
+  operations (`lb/sb/lbn/sbn/...`) see all of them.
+
+Examples
+    python tools/ic10_sim.py scripts/pipe_temp_hot_cold_valves/pipe_temp_hot_cold_valves.ic10
+    python tools/ic10_sim.py "modular scripts/SatCom/" --ticks 200 --trace
+    python tools/ic10_sim.py scripts/ --ext .ic10 --budget 64
+    python tools/ic10_sim.py scripts/solar_named_tracking/solar_named_tracking.ic10 --ticks 172800
+
+Exit codes
+  0 - no tick exhausted the budget and no runtime errors
+  1 - one or more ticks exhausted the budget, or a script faulted
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import math
+import operator
+import random
+from collections import Counter
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from ic10_parse import (
+    BATCH_MODES,
+    DEVICE_PINS,
+    RA_INDEX,
+    REGISTER_COUNT,
+    SP_INDEX,
+    Ic10ParseError,
+    Line,
+    Program,
+    device_ref,
+    ic10_hash,
+    iter_ic10_files,
+    parse_file,
+    parse_number,
+    register_ref,
+)
+
+
+TICK_SECONDS = 0.5
+DEFAULT_TICK_BUDGET = 128
+DEFAULT_TICKS = 20
+STACK_SIZE = 512
+IC_HOUSING_PREFAB = "StructureCircuitHousing"
+READ_ONLY_FIELDS = frozenset({"PrefabHash", "NameHash", "ReferenceId"})
+MEMORY_WRITES = frozenset({"push", "poke", "put", "clr"})
+
+
+class Ic10RuntimeError(Exception):
+    pass
+
+
+@dataclass
+class Device:
+    prefab_hash: int = 0
+    name: str = ""
+    fields: dict[str, float] = field(default_factory=dict)
+    slots: list[dict[str, float]] = field(default_factory=list)
+    reagents: dict[int, float] = field(default_factory=dict)
+    traces: dict[str, list[float]] = field(default_factory=dict)
+    memory: Optional[list[float]] = None
+    reference_id: int = 0
+
+    @property
+    def name_hash(self) -> int:
+        return ic10_hash(self.name) if self.name else 0
+
+    def read(self, logic_type: str) -> float:
+        if logic_type == "PrefabHash":
+            return float(self.prefab_hash)
+        if logic_type == "NameHash":
+            return float(self.name_hash)
+        if logic_type == "ReferenceId":
+            return float(self.reference_id)
+        return self.fields.get(logic_type, 0.0)
+
+    def write(self, logic_type: str, value: float) -> None:
+        if logic_type in READ_ONLY_FIELDS:
+            raise Ic10RuntimeError(f"{logic_type} is read-only")
+        self.fields[logic_type] = value
+
+    def read_slot(self, slot: int, logic_type: str) -> float:
+        if 0 <= slot < len(self.slots):
+            return self.slots[slot].get(logic_type, 0.0)
+        return 0.0
+
+    def write_slot(self, slot: int, logic_type: str, value: float) -> None:
+        while len(self.slots) <= slot:
+            self.slots.append({})
+        self.slots[slot][logic_type] = value
+
+    def apply_traces(self, tick: int) -> None:
+        for logic_type, values in self.traces.items():
+            if values:
+                self.fields[logic_type] = values[min(tick, len(values) - 1)]
+
+
+@dataclass
+class Network:
+    devices: list[Device] = field(default_factory=list)
+
+    _index: dict[tuple[float, Optional[float]], list[Device]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def add(self, device: Device) -> Device:
+        if not device.reference_id:
+            device.reference_id = len(self.devices) + 1
+        self.devices.append(device)
+        self._index.clear()
+        return device
+
+    def reindex(self) -> None:
+        """Forget cached batch matches (after changing a device's prefab hash or name)."""
+
+        self._index.clear()
+
+    def matching(self, prefab_hash: float, name_hash: Optional[float] = None) -> list[Device]:
+        key = (prefab_hash, name_hash)
+        found = self._index.get(key)
+        if found is None:
+            found = [
+                d
+                for d in self.devices
+                if d.prefab_hash == prefab_hash and (name_hash is None or d.name_hash == name_hash)
+            ]
+            if not math.isnan(prefab_hash) and (name_hash is None or not math.isnan(name_hash)):
+                self._index[key] = found
+        return list(found)
+
+    def by_reference(self, reference_id: float) -> Optional[Device]:
+        for d in self.devices:
+            if d.reference_id == reference_id:
+                return d
+        return None
+
+    def apply_traces(self, tick: int) -> None:
+        for d in self.devices:
+            if d.traces:
+                d.apply_traces(tick)
+
+    def trace_changes(self) -> list[int]:
+        """Sorted ticks at which a per-tick trace gives some device field a new value."""
+
+        ticks: set[int] = set()
+        for d in self.devices:
+            for values in d.traces.values():
+                ticks.update(i for i in range(1, len(values)) if values[i] != values[i - 1])
+        return sorted(ticks)
+
+    def state(self, *, memory: bool = False) -> list[Any]:
+        """Everything scripts can read back from the devices (`memory`: housing stacks too)."""
+
+        return [
+            (
+                d.fields.copy(),
+                [slot.copy() for slot in d.slots],
+                d.reagents.copy(),
+                d.memory[:] if memory and d.memory is not None else None,
+            )
+            for d in self.devices
+        ]
+
+
+def _aggregate(values: list[float], mode: float) -> float:
+    if not values:
+        return 0.0
+    mode_i = int(mode)
+    if mode_i == 0:
+        return sum(values) / len(values)
+    if mode_i == 1:
+        return float(sum(values))
+    if mode_i == 2:
+        return min(values)
+    if mode_i == 3:
+        return max(values)
+    raise Ic10RuntimeError(f"invalid batch mode {mode}")
+
+
+def _safe_div(a: float, b: float) -> float:
+    if b == 0:
+        if a == 0 or math.isnan(a):
+            return math.nan
+        return math.copysign(math.inf, a)
+    return a / b
+
+
+def _mod(a: float, b: float) -> float:
+    if b == 0:
+        return math.nan
+    r = math.fmod(a, b)
+    return r + b if r < 0 else r
+
+
+def _approx(a: float, b: float, c: float) -> bool:
+    return abs(a - b) <= max(c * max(abs(a), abs(b)), 2.220446049250313e-16 * 8)
+
+
+def _to_int(value: float) -> int:
+    if math.isnan(value) or math.isinf(value):
+        raise Ic10RuntimeError(f"cannot convert {value} to integer")
+    return int(value)
+
+
+# Condition suffix -> (operand count, predicate). Shared by s*/b*/br* families.
+CONDITIONS: dict[str, tuple[int, Callable[..., bool]]] = {
+    "eq": (2, operator.eq),
+    "ne": (2, operator.ne),
+    "lt": (2, operator.lt),
+    "le": (2, operator.le),
+    "gt": (2, operator.gt),
+    "ge": (2, operator.ge),
+    "eqz": (1, lambda a: a == 0),
+    "nez": (1, lambda a: a != 0),
+    "ltz": (1, lambda a: a < 0),
+    "lez": (1, lambda a: a <= 0),
+    "gtz": (1, lambda a: a > 0),
+    "gez": (1, lambda a: a >= 0),
+    "ap": (3, _approx),
+    "na": (3, lambda a, b, c: not _approx(a, b, c)),
+    "apz": (2, lambda a, c: _approx(a, 0.0, c)),
+    "naz": (2, lambda a, c: not _approx(a, 0.0, c)),
+    "nan": (1, math.isnan),
+    "nanz": (1, lambda a: not math.isnan(a)),
+}
+
+UNARY_MATH: dict[str, Callable[[float], float]] = {
+    "abs": abs,
+    "ceil": lambda a: float(math.ceil(a)),
+    "floor": lambda a: float(math.floor(a)),
+    "round": lambda a: float(round(a)),
+    "trunc": lambda a: float(math.trunc(a)),
+    "sqrt": lambda a: math.sqrt(a) if a >= 0 else math.nan,
+    "exp": lambda a: math.exp(a) if a < 709 else math.inf,
+    "log": lambda a: math.log(a) if a > 0 else (-math.inf if a == 0 else math.nan),
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": lambda a: math.asin(a) if -1 <= a <= 1 else math.nan,
+    "acos": lambda a: math.acos(a) if -1 <= a <= 1 else math.nan,
+    "atan": math.atan,
+    "not": lambda a: float(~_to_int(a)),
+}
+
+BINARY_MATH: dict[str, Callable[[float, float], float]] = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "div": _safe_div,
+    "mod": _mod,
+    "max": max,
+    "min": min,
+    "atan2": math.atan2,
+    "and": lambda a, b: float(_to_int(a) & _to_int(b)),
+    "or": lambda a, b: float(_to_int(a) | _to_int(b)),
+    "xor": lambda a, b: float(_to_int(a) ^ _to_int(b)),
+    "nor": lambda a, b: float(~(_to_int(a) | _to_int(b))),
+    "sll": lambda a, b: float(_to_int(a) << _to_int(b)),
+    "sla": lambda a, b: float(_to_int(a) << _to_int(b)),
+    "srl": lambda a, b: float((_to_int(a) & 0xFFFF_FFFF_FFFF_FFFF) >> _to_int(b)),
+    "sra": lambda a, b: float(_to_int(a) >> _to_int(b)),
+}
+
+NOOP_OPCODES = frozenset({"define"})
+
+
+@dataclass
+class TickResult:
+    tick: int
+    executed: int
+    end: str
+    line: int
+    loops: tuple[str, ...] = ()
+    message: str = ""
+    span: int = 1  # consecutive ticks this result stands for (skipped idle ticks)
+
+
+class Chip:
+    """One IC chip in one IC Housing, stepped a game tick at a time."""
+
+    def __init__(
+        self,
+        program: Program,
+        *,
+        housing: Device,
+        pins: dict[str, Optional[Device]],
+        network: Network,
+        budget: int = DEFAULT_TICK_BUDGET,
+        seed: int = 0,
+        compiled: bool = True,
+    ) -> None:
+        self.program = program
+        self.housing = housing
+        self.pins = pins
+        self.network = network
+        self.budget = budget
+        self.registers = [0.0] * REGISTER_COUNT
+        self.stack = [0.0] * STACK_SIZE
+        housing.memory = self.stack
+        self.aliases: dict[str, str] = {}
+        self.pc = 0
+        self.state = "running"
+        self.wake_tick = 0
+        self.error = ""
+        self.line_counts = [0] * len(program.lines)  # visits per line
+        self._rand = random.Random(seed)
+        self._handlers = self._build_handlers()
+        self._loop_names: dict[int, str] = {}
+        self._alias_counts = Counter(line.args[0] for line in program.lines if line.opcode == "alias" and line.args)
+        self.writes_memory = any(line.opcode in MEMORY_WRITES for line in program.lines)
+        self._rand_lines = [line.index for line in program.lines if line.opcode == "rand"]
+        self._previous: Optional[tuple[int, tuple[Any, ...], Any, Optional[list[int]]]] = None
+        self._repeat: Optional[tuple[TickResult, list[int]]] = None
+        self._code: Optional[list[Optional[Callable[[], Optional[int]]]]] = None
+        if compiled:
+            self._code = [self._compile(line) for line in program.lines]
+
+    @property
+    def opcode_counts(self) -> Counter[str]:
+        """Executed instructions by opcode (labels, comments, `define` and `hcf` excluded)."""
+
+        counts: Counter[str] = Counter()
+        for line, visits in zip(self.program.lines, self.line_counts):
+            opcode = line.opcode
+            if visits and (opcode in self._handlers or opcode in ("yield", "sleep")):
+                counts[opcode] += visits
+        return counts
+
+    # ---- operand resolution -------------------------------------------------
+
+    def _alias_target(self, token: str) -> str:
+        seen: set[str] = set()
+        while token in self.aliases and token not in seen:
+            seen.add(token)
+            token = self.aliases[token]
+        return token
+
+    def _register_index(self, token: str) -> int:
+        ref = register_ref(self._alias_target(token))
+        if ref is None:
+            raise Ic10RuntimeError(f"'{token}' is not a register")
+        depth, index = ref
+        for _ in range(depth):
+            index = _to_int(self.registers[index])
+            if not 0 <= index < REGISTER_COUNT:
+                raise Ic10RuntimeError(f"indirect register r{index} out of range")
+        return index
+
+    def _value(self, token: str) -> float:
+        target = self._alias_target(token)
+        if register_ref(target) is not None:
+            return self.registers[self._register_index(target)]
+        value = parse_number(target)
+        if value is not None:
+            return value
+        if target in self.program.defines:
+            return self.program.defines[target]
+        if target in self.program.labels:
+            return float(self.program.labels[target])
+        raise Ic10RuntimeError(f"unknown value '{token}'")
+
+    def _set(self, token: str, value: float) -> None:
+        self.registers[self._register_index(token)] = value
+
+    def _device(self, token: str) -> Device:
+        target = self._alias_target(token)
+        pin = device_ref(target)
+        if pin is None:
+            raise Ic10RuntimeError(f"'{token}' is not a device")
+        if pin == "db":
+            return self.housing
+        if pin.startswith("dr"):
+            pin = f"d{_to_int(self.registers[self._register_index(pin[1:])])}"
+        device = self.pins.get(pin)
+        if device is None:
+            raise Ic10RuntimeError(f"device {pin} not set")
+        return device
+
+    def _device_set(self, token: str) -> bool:
+        try:
+            self._device(token)
+        except Ic10RuntimeError:
+            return False
+        return True
+
+    def _jump_target(self, token: str) -> int:
+        if token in self.program.labels:
+            return self.program.labels[token]
+        return _to_int(self._value(token))
+
+    def _batch_mode(self, token: str) -> float:
+        if token in BATCH_MODES:
+            return float(BATCH_MODES[token])
+        return self._value(token)
+
+    # ---- instruction handlers -----------------------------------------------
+
+    def _build_handlers(self) -> dict[str, Callable[[tuple[str, ...]], Optional[int]]]:
+        h: dict[str, Callable[[tuple[str, ...]], Optional[int]]] = {
+            "move": self._op_move,
+            "alias": self._op_alias,
+            "j": self._op_j,
+            "jal": self._op_jal,
+            "jr": self._op_jr,
+            "select": self._op_select,
+            "rand": self._op_rand,
+            "l": self._op_l,
+            "s": self._op_s,
+            "ls": self._op_ls,
+            "ss": self._op_ss,
+            "lr": self._op_lr,
+            "ld": self._op_ld,
+            "sd": self._op_sd,
+            "lb": self._op_lb,
+            "lbn": self._op_lbn,
+            "lbs": self._op_lbs,
+            "lbns": self._op_lbns,
+            "sb": self._op_sb,
+            "sbn": self._op_sbn,
+            "sbs": self._op_sbs,
+            "push": self._op_push,
+            "pop": self._op_pop,
+            "peek": self._op_peek,
+            "poke": self._op_poke,
+            "get": self._op_get,
+            "put": self._op_put,
+            "clr": self._op_clr,
+            "sdse": lambda a: self._set_flag(a, self._device_set(a[1])),
+            "sdns": lambda a: self._set_flag(a, not self._device_set(a[1])),
+            "bdse": lambda a: self._branch(a[1], self._device_set(a[0])),
+            "bdns": lambda a: self._branch(a[1], not self._device_set(a[0])),
+            "bdseal": lambda a: self._branch(a[1], self._device_set(a[0]), link=True),
+            "bdnsal": lambda a: self._branch(a[1], not self._device_set(a[0]), link=True),
+            "brdse": lambda a: self._branch(a[1], self._device_set(a[0]), relative=True),
+            "brdns": lambda a: self._branch(a[1], not self._device_set(a[0]), relative=True),
+        }
+        for name, fn in UNARY_MATH.items():
+            h[name] = self._make_unary(fn)
+        for name, fn in BINARY_MATH.items():
+            h[name] = self._make_binary(fn)
+        for suffix, (arity, pred) in CONDITIONS.items():
+            h[f"s{suffix}"] = self._make_set(arity, pred)
+            h[f"b{suffix}"] = self._make_branch(arity, pred)
+            h[f"b{suffix}al"] = self._make_branch(arity, pred, link=True)
+            h[f"br{suffix}"] = self._make_branch(arity, pred, relative=True)
+        return h
+
+    def _make_unary(self, fn: Callable[[float], float]):
+        def op(a: tuple[str, ...]) -> None:
+            self._set(a[0], fn(self._value(a[1])))
+
+        return op
+
+    def _make_binary(self, fn: Callable[[float, float], float]):
+        def op(a: tuple[str, ...]) -> None:
+            self._set(a[0], fn(self._value(a[1]), self._value(a[2])))
+
+        return op
+
+    def _make_set(self, arity: int, pred: Callable[..., bool]):
+        def op(a: tuple[str, ...]) -> None:
+            self._set_flag(a, pred(*(self._value(t) for t in a[1 : 1 + arity])))
+
+        return op
+
+    def _make_branch(self, arity: int, pred: Callable[..., bool], *, link=False, relative=False):
+        def op(a: tuple[str, ...]) -> Optional[int]:
+            taken = pred(*(self._value(t) for t in a[:arity]))
+            return self._branch(a[arity], taken, link=link, relative=relative)
+
+        return op
+
+    def _set_flag(self, a: tuple[str, ...], flag: bool) -> None:
+        self._set(a[0], 1.0 if flag else 0.0)
+
+    def _branch(self, target: str, taken: bool, *, link=False, relative=False) -> Optional[int]:
+        if not taken:
+            return None
+        if link:
+            self.registers[RA_INDEX] = float(self.pc + 1)
+        if relative:
+            return self.pc + _to_int(self._value(target))
+        return self._jump_target(target)
+
+    def _op_move(self, a):
+        self._set(a[0], self._value(a[1]))
+
+    def _op_alias(self, a):
+        target = a[1]
+        if register_ref(target) is None and device_ref(target) is None:
+            raise Ic10RuntimeError(f"alias target '{target}' is not a register or device")
+        self.aliases[a[0]] = target
+
+    def _op_j(self, a):
+        return self._jump_target(a[0])
+
+    def _op_jal(self, a):
+        self.registers[RA_INDEX] = float(self.pc + 1)
+        return self._jump_target(a[0])
+
+    def _op_jr(self, a):
+        return self.pc + _to_int(self._value(a[0]))
+
+    def _op_select(self, a):
+        self._set(a[0], self._value(a[2]) if self._value(a[1]) != 0 else self._value(a[3]))
+
+    def _op_rand(self, a):
+        self._set(a[0], self._rand.random())
+
+    def _op_l(self, a):
+        self._set(a[0], self._device(a[1]).read(a[2]))
+
+    def _op_s(self, a):
+        self._device(a[0]).write(a[1], self._value(a[2]))
+
+    def _op_ls(self, a):
+        self._set(a[0], self._device(a[1]).read_slot(_to_int(self._value(a[2])), a[3]))
+
+    def _op_ss(self, a):
+        self._device(a[0]).write_slot(_to_int(self._value(a[1])), a[2], self._value(a[3]))
+
+    def _op_lr(self, a):
+        device = self._device(a[1])
+        self._set(a[0], device.reagents.get(_to_int(self._value(a[3])), 0.0))
+
+    def _op_ld(self, a):
+        device = self.network.by_reference(self._value(a[1]))
+        if device is None:
+            raise Ic10RuntimeError(f"no device with ReferenceId {a[1]}")
+        self._set(a[0], device.read(a[2]))
+
+    def _op_sd(self, a):
+        device = self.network.by_reference(self._value(a[0]))
+        if device is None:
+            raise Ic10RuntimeError(f"no device with ReferenceId {a[0]}")
+        device.write(a[1], self._value(a[2]))
+
+    def _op_lb(self, a):
+        devices = self.network.matching(self._value(a[1]))
+        self._set(a[0], _aggregate([d.read(a[2]) for d in devices], self._batch_mode(a[3])))
+
+    def _op_lbn(self, a):
+        devices = self.network.matching(self._value(a[1]), self._value(a[2]))
+        self._set(a[0], _aggregate([d.read(a[3]) for d in devices], self._batch_mode(a[4])))
+
+    def _op_lbs(self, a):
+        devices = self.network.matching(self._value(a[1]))
+        slot = _to_int(self._value(a[2]))
+        values = [d.read_slot(slot, a[3]) for d in devices]
+        self._set(a[0], _aggregate(values, self._batch_mode(a[4])))
+
+    def _op_lbns(self, a):
+        devices = self.network.matching(self._value(a[1]), self._value(a[2]))
+        slot = _to_int(self._value(a[3]))
+        values = [d.read_slot(slot, a[4]) for d in devices]
+        self._set(a[0], _aggregate(values, self._batch_mode(a[5])))
+
+    def _op_sb(self, a):
+        value = self._value(a[2])
+        for d in self.network.matching(self._value(a[0])):
+            d.write(a[1], value)
+
+    def _op_sbn(self, a):
+        value = self._value(a[3])
+        for d in self.network.matching(self._value(a[0]), self._value(a[1])):
+            d.write(a[2], value)
+
+    def _op_sbs(self, a):
+        slot = _to_int(self._value(a[1]))
+        value = self._value(a[3])
+        for d in self.network.matching(self._value(a[0])):
+            d.write_slot(slot, a[2], value)
+
+    def _op_push(self, a):
+        sp = _to_int(self.registers[SP_INDEX])
+        if not 0 <= sp < STACK_SIZE:
+            raise Ic10RuntimeError("stack overflow")
+        self.stack[sp] = self._value(a[0])
+        self.registers[SP_INDEX] = float(sp + 1)
+
+    def _op_pop(self, a):
+        sp = _to_int(self.registers[SP_INDEX]) - 1
+        if not 0 <= sp < STACK_SIZE:
+            raise Ic10RuntimeError("stack underflow")
+        self.registers[SP_INDEX] = float(sp)
+        self._set(a[0], self.stack[sp])
+
+    def _op_peek(self, a):
+        sp = _to_int(self.registers[SP_INDEX]) - 1
+        if not 0 <= sp < STACK_SIZE:
+            raise Ic10RuntimeError("stack underflow")
+        self._set(a[0], self.stack[sp])
+
+    def _op_poke(self, a):
+        address = _to_int(self._value(a[0]))
+        if not 0 <= address < STACK_SIZE:
+            raise Ic10RuntimeError(f"stack address {address} out of range")
+        self.stack[address] = self._value(a[1])
+
+    def _device_memory(self, token: str) -> list[float]:
+        memory = self._device(token).memory
+        if memory is None:
+            raise Ic10RuntimeError(f"device '{token}' has no memory")
+        return memory
+
+    def _op_get(self, a):
+        memory = self._device_memory(a[1])
+        address = _to_int(self._value(a[2]))
+        if not 0 <= address < len(memory):
+            raise Ic10RuntimeError(f"memory address {address} out of range")
+        self._set(a[0], memory[address])
+
+    def _op_put(self, a):
+        memory = self._device_memory(a[0])
+        address = _to_int(self._value(a[1]))
+        if not 0 <= address < len(memory):
+            raise Ic10RuntimeError(f"memory address {address} out of range")
+        memory[address] = self._value(a[2])
+
+    def _op_clr(self, a):
+        memory = self._device_memory(a[0])
+        memory[:] = [0.0] * len(memory)
+
+    # ---- compilation -----------------------------------------------------------
+    #
+    # An operand compiles to a slot: ("r", index) for a direct register or
+    # ("c", value) for a literal, `define` or label. Anything else (indirect
+    # registers, names aliased more than once, unknown names) returns None and
+    # the whole line falls back to its interpreter handler, which resolves it
+    # at run time exactly as before.
+
+    def _static_alias(self, token: str) -> Optional[str]:
+        """The token with a set-once alias substituted; None if it is re-aliased."""
+
+        if token not in self.program.aliases:
+            return token
+        if self._alias_counts[token] != 1:
+            return None
+        return self.program.aliases[token]
+
+    def _slot(self, token: str) -> Optional[tuple[str, Any]]:
+        target = self._static_alias(token)
+        if target is None:
+            return None
+        ref = register_ref(target)
+        if ref is not None:
+            return ("r", ref[1]) if ref[0] == 0 else None
+        value = parse_number(target)
+        if value is not None:
+            return ("c", value)
+        if target in self.program.defines:
+            return ("c", self.program.defines[target])
+        if target in self.program.labels:
+            return ("c", float(self.program.labels[target]))
+        return None
+
+    def _dest(self, token: str) -> Optional[int]:
+        slot = self._slot(token)
+        return slot[1] if slot is not None and slot[0] == "r" else None
+
+    def _reader(self, slot: tuple[str, Any]) -> Callable[[], float]:
+        kind, value = slot
+        if kind == "c":
+            return lambda: value
+        regs = self.registers
+        return lambda: regs[value]
+
+    def _pin(self, token: str) -> Optional[str]:
+        """`db` or `d0..d5` for a device operand; None for indirect pins and re-aliased names."""
+
+        target = self._static_alias(token)
+        pin = device_ref(target) if target is not None else None
+        if pin is None or pin.startswith("dr"):
+            return None
+        return pin
+
+    def _device_getter(self, pin: str) -> Callable[[], Device]:
+        if pin == "db":
+            housing = self.housing
+            return lambda: housing
+        pins = self.pins
+
+        def device() -> Device:
+            found = pins.get(pin)
+            if found is None:
+                raise Ic10RuntimeError(f"device {pin} not set")
+            return found
+
+        return device
+
+    def _compile(self, line: Line) -> Optional[Callable[[], Optional[int]]]:
+        """One closure per line (None for lines that only advance or end the tick)."""
+
+        opcode = line.opcode
+        if opcode is None or opcode in NOOP_OPCODES or opcode in ("yield", "sleep", "hcf"):
+            return None
+        try:
+            op = self._specialise(opcode, line.args, line.index)
+        except IndexError:
+            op = None
+        return op if op is not None else self._interpreted(line)
+
+    def _interpreted(self, line: Line) -> Callable[[], Optional[int]]:
+        handler = self._handlers.get(line.opcode)
+        opcode, args, index = line.opcode, line.args, line.index
+        if handler is None:
+
+            def unsupported() -> None:
+                raise Ic10RuntimeError(f"unsupported instruction '{opcode}'")
+
+            return unsupported
+
+        def op() -> Optional[int]:
+            self.pc = index
+            return handler(args)
+
+        return op
+
+    def _specialise(self, opcode: str, a: tuple[str, ...], index: int) -> Optional[Callable[[], Optional[int]]]:
+        if opcode == "move":
+            return self._compile_move(a[0], a[1])
+        if opcode in UNARY_MATH:
+            return self._compile_unary(UNARY_MATH[opcode], a[0], a[1])
+        if opcode in BINARY_MATH:
+            return self._compile_binary(BINARY_MATH[opcode], a[0], a[1], a[2])
+        if opcode == "select":
+            return self._compile_select(a)
+        if opcode in ("j", "jal"):
+            return self._compile_jump(a[0], index, link=opcode == "jal")
+        if opcode in ("l", "s"):
+            return self._compile_device_io(opcode, a)
+        if opcode in ("sb", "sbn", "lb", "lbn"):
+            return self._compile_batch(opcode, a)
+        if opcode in ("sdse", "sdns", "bdse", "bdns", "bdseal", "bdnsal", "brdse", "brdns"):
+            return self._compile_device_set(opcode, a, index)
+        for prefix in ("s", "br", "b"):
+            if not opcode.startswith(prefix):
+                continue
+            suffix = opcode[len(prefix) :]
+            link = prefix == "b" and suffix not in CONDITIONS and suffix.endswith("al")
+            if link:
+                suffix = suffix[:-2]
+            if suffix not in CONDITIONS:
+                continue
+            arity, pred = CONDITIONS[suffix]
+            if prefix == "s":
+                return self._compile_set(pred, a[0], a[1 : 1 + arity])
+            return self._compile_branch(pred, a[:arity], a[arity], index, link=link, relative=prefix == "br")
+        return None
+
+    def _compile_move(self, dest: str, token: str):
+        d, x = self._dest(dest), self._slot(token)
+        if d is None or x is None:
+            return None
+        regs = self.registers
+        kind, value = x
+        if kind == "c":
+
+            def op() -> None:
+                regs[d] = value
+
+        else:
+
+            def op() -> None:
+                regs[d] = regs[value]
+
+        return op
+
+    def _compile_unary(self, fn: Callable[[float], float], dest: str, token: str):
+        d, x = self._dest(dest), self._slot(token)
+        if d is None or x is None:
+            return None
+        regs = self.registers
+        read = self._reader(x)
+
+        def op() -> None:
+            regs[d] = fn(read())
+
+        return op
+
+    def _compile_binary(self, fn: Callable[[float, float], float], dest: str, left: str, right: str):
+        d, x, y = self._dest(dest), self._slot(left), self._slot(right)
+        if d is None or x is None or y is None:
+            return None
+        regs = self.registers
+        (kx, i), (ky, j) = x, y
+        if kx == "r" and ky == "r":
+
+            def op() -> None:
+                regs[d] = fn(regs[i], regs[j])
+
+        elif kx == "r":
+
+            def op() -> None:
+                regs[d] = fn(regs[i], j)
+
+        elif ky == "r":
+
+            def op() -> None:
+                regs[d] = fn(i, regs[j])
+
+        else:
+
+            def op() -> None:
+                regs[d] = fn(i, j)
+
+        return op
+
+    def _test(self, pred: Callable[..., bool], tokens: tuple[str, ...]) -> Optional[Callable[[], bool]]:
+        slots = [self._slot(t) for t in tokens]
+        if any(s is None for s in slots):
+            return None
+        regs = self.registers
+        if len(slots) == 2:
+            (kx, i), (ky, j) = slots
+            if kx == "r" and ky == "r":
+                return lambda: pred(regs[i], regs[j])
+            if kx == "r":
+                return lambda: pred(regs[i], j)
+            if ky == "r":
+                return lambda: pred(i, regs[j])
+        readers = [self._reader(s) for s in slots]
+        return lambda: pred(*(r() for r in readers))
+
+    def _compile_set(self, pred: Callable[..., bool], dest: str, tokens: tuple[str, ...]):
+        d, test = self._dest(dest), self._test(pred, tokens)
+        if d is None or test is None:
+            return None
+        regs = self.registers
+
+        def op() -> None:
+            regs[d] = 1.0 if test() else 0.0
+
+        return op
+
+    def _target(self, token: str, index: int, relative: bool) -> Optional[Callable[[], int]]:
+        """Jump target as a closure; constant targets are folded."""
+
+        if token in self.program.labels and not relative:
+            target = self.program.labels[token]
+            return lambda: target
+        slot = self._slot(token)
+        if slot is None:
+            return None
+        kind, value = slot
+        if kind == "c" and math.isfinite(value):
+            target = index + int(value) if relative else int(value)
+            return lambda: target
+        read = self._reader(slot)
+        if relative:
+            return lambda: index + _to_int(read())
+        return lambda: _to_int(read())
+
+    def _compile_jump(self, token: str, index: int, *, link: bool):
+        target = self._target(token, index, relative=False)
+        if target is None:
+            return None
+        regs = self.registers
+        back = float(index + 1)
+
+        def op() -> int:
+            if link:
+                regs[RA_INDEX] = back
+            return target()
+
+        return op
+
+    def _compile_branch(
+        self,
+        pred: Callable[..., bool],
+        tokens: tuple[str, ...],
+        token: str,
+        index: int,
+        *,
+        link: bool,
+        relative: bool,
+    ):
+        test = self._test(pred, tokens)
+        target = self._target(token, index, relative)
+        if test is None or target is None:
+            return None
+        regs = self.registers
+        back = float(index + 1)
+
+        def op() -> Optional[int]:
+            if not test():
+                return None
+            if link:
+                regs[RA_INDEX] = back
+            return target()
+
+        return op
+
+    def _compile_select(self, a: tuple[str, ...]):
+        d = self._dest(a[0])
+        slots = [self._slot(t) for t in a[1:4]]
+        if d is None or len(slots) < 3 or any(s is None for s in slots):
+            return None
+        cond, yes, no = (self._reader(s) for s in slots)
+        regs = self.registers
+
+        def op() -> None:
+            regs[d] = yes() if cond() != 0 else no()
+
+        return op
+
+    def _compile_device_io(self, opcode: str, a: tuple[str, ...]):
+        if opcode == "l":
+            d, pin, logic_type = self._dest(a[0]), self._pin(a[1]), a[2]
+            if d is None or pin is None:
+                return None
+            device = self._device_getter(pin)
+            regs = self.registers
+
+            def load() -> None:
+                regs[d] = device().read(logic_type)
+
+            return load
+
+        pin, logic_type, value = self._pin(a[0]), a[1], self._slot(a[2])
+        if pin is None or value is None:
+            return None
+        device, read = self._device_getter(pin), self._reader(value)
+
+        def store() -> None:
+            device().write(logic_type, read())
+
+        return store
+
+    def _compile_batch(self, opcode: str, a: tuple[str, ...]):
+        named = opcode.endswith("n")
+        network = self.network
+        if opcode.startswith("s"):
+            slots = [self._slot(a[0]), self._slot(a[1]) if named else ("c", None), self._slot(a[3 if named else 2])]
+            if any(s is None for s in slots):
+                return None
+            logic_type = a[2] if named else a[1]
+            if slots[0][0] == "c" and slots[1][0] == "c":
+                # constant prefab and name hash (the usual case): one lookup, no operand reads
+                prefab_hash, name_hash = slots[0][1], slots[1][1]
+                value = self._reader(slots[2])
+
+                def store_constant() -> None:
+                    v = value()
+                    for device in network.matching(prefab_hash, name_hash):
+                        device.write(logic_type, v)
+
+                return store_constant
+            prefab, name, value = (self._reader(s) for s in slots)
+
+            def store() -> None:
+                v = value()
+                for device in network.matching(prefab(), name()):
+                    device.write(logic_type, v)
+
+            return store
+
+        d = self._dest(a[0])
+        mode_token = a[4] if named else a[3]
+        mode_slot = ("c", float(BATCH_MODES[mode_token])) if mode_token in BATCH_MODES else self._slot(mode_token)
+        slots = [self._slot(a[1]), self._slot(a[2]) if named else ("c", None), mode_slot]
+        if d is None or any(s is None for s in slots):
+            return None
+        prefab, name, mode = (self._reader(s) for s in slots)
+        logic_type = a[3] if named else a[2]
+        regs = self.registers
+
+        def load() -> None:
+            devices = network.matching(prefab(), name())
+            regs[d] = _aggregate([device.read(logic_type) for device in devices], mode())
+
+        return load
+
+    def _compile_device_set(self, opcode: str, a: tuple[str, ...], index: int):
+        pin = self._pin(a[1] if opcode.startswith("s") else a[0])
+        if pin is None:
+            return None
+        pins = self.pins
+        wanted = "dse" in opcode
+
+        def is_set() -> bool:
+            return (pin == "db" or pins.get(pin) is not None) == wanted
+
+        if opcode.startswith("s"):
+            d = self._dest(a[0])
+            if d is None:
+                return None
+            regs = self.registers
+
+            def store() -> None:
+                regs[d] = 1.0 if is_set() else 0.0
+
+            return store
+        target = self._target(a[1], index, relative=opcode.startswith("br"))
+        if target is None:
+            return None
+        regs = self.registers
+        link = opcode.endswith("al")
+        back = float(index + 1)
+
+        def branch() -> Optional[int]:
+            if not is_set():
+                return None
+            if link:
+                regs[RA_INDEX] = back
+            return target()
+
+        return branch
+
+    # ---- execution -----------------------------------------------------------
+
+    def _execute(self, line: Line) -> Optional[int]:
+        """Execute one line; return the jump target or None to fall through."""
+
+        opcode = line.opcode
+        if opcode is None or opcode in NOOP_OPCODES:
+            return None
+        handler = self._handlers.get(opcode)
+        if handler is None:
+            raise Ic10RuntimeError(f"unsupported instruction '{opcode}'")
+        try:
+            return handler(line.args)
+        except IndexError:
+            raise Ic10RuntimeError(f"'{opcode}' is missing operands") from None
+
+    def run_tick(self, tick: int) -> TickResult:
+        if self.state in ("halted", "error"):
+            return TickResult(tick, 0, self.state, self.pc, message=self.error)
+        if self.state == "sleeping":
+            if tick < self.wake_tick:
+                return TickResult(tick, 0, "sleeping", self.pc)
+            self.state = "running"
+        if self._code is not None:
+            return self._run_compiled(tick)
+
+        lines = self.program.lines
+        executed = 0
+        loops: list[str] = []
+        while executed < self.budget:
+            if self.pc >= len(lines):
+                self.state = "halted"
+                return TickResult(tick, executed, "halt", self.pc, tuple(loops))
+            line = lines[self.pc]
+            executed += 1
+            self.line_counts[self.pc] += 1
+
+            if line.opcode == "yield":
+                self.pc += 1
+                return TickResult(tick, executed, "yield", line.index, tuple(loops))
+            if line.opcode == "hcf":
+                self.state = "halted"
+                return TickResult(tick, executed, "halt", line.index, tuple(loops), "hcf")
+
+            try:
+                if line.opcode == "sleep":
+                    self._sleep(tick, line)
+                    self.pc += 1
+                    return TickResult(tick, executed, "sleep", line.index, tuple(loops))
+                target = self._execute(line)
+            except Ic10RuntimeError as e:
+                self.state = "error"
+                self.error = f"{self.program.describe(line.index)}: {e}"
+                return TickResult(tick, executed, "error", line.index, tuple(loops), self.error)
+
+            if target is None:
+                self.pc += 1
+                continue
+            if target < 0:
+                self.state = "error"
+                self.error = f"{self.program.describe(line.index)}: jump to line {target}"
+                return TickResult(tick, executed, "error", line.index, tuple(loops), self.error)
+            if target <= self.pc:
+                loop = self._loop_name(target)
+                if loop not in loops:
+                    loops.append(loop)
+            self.pc = target
+
+        return TickResult(tick, executed, "budget", self.pc, tuple(loops))
+
+    def _loop_name(self, target: int) -> str:
+        name = self._loop_names.get(target)
+        if name is None:
+            name = self._loop_names[target] = self.program.label_for(target) or f"line {target + 1}"
+        return name
+
+    def _sleep(self, tick: int, line: Line) -> None:
+        seconds = self._value(line.args[0]) if line.args else 0.0
+        self.wake_tick = tick + max(1, math.ceil(seconds / TICK_SECONDS))
+        self.state = "sleeping"
+
+    def _run_compiled(self, tick: int) -> TickResult:
+        """`run_tick` over the compiled closures (same results as the interpreter loop)."""
+
+        code = self._code
+        lines = self.program.lines
+        counts = self.line_counts
+        budget = self.budget
+        end = len(code)
+        pc = self.pc
+        executed = 0
+        loops: list[str] = []
+        while executed < budget:
+            if pc >= end:
+                self.pc = pc
+                self.state = "halted"
+                return TickResult(tick, executed, "halt", pc, tuple(loops))
+            executed += 1
+            counts[pc] += 1
+            op = code[pc]
+            if op is None:
+                opcode = lines[pc].opcode
+                if opcode == "yield":
+                    self.pc = pc + 1
+                    return TickResult(tick, executed, "yield", pc, tuple(loops))
+                if opcode == "hcf":
+                    self.pc = pc
+                    self.state = "halted"
+                    return TickResult(tick, executed, "halt", pc, tuple(loops), "hcf")
+                if opcode == "sleep":
+                    self.pc = pc
+                    try:
+                        self._sleep(tick, lines[pc])
+                    except Ic10RuntimeError as e:
+                        return self._fault(tick, executed, pc, loops, str(e))
+                    self.pc = pc + 1
+                    return TickResult(tick, executed, "sleep", pc, tuple(loops))
+                pc += 1
+                continue
+
+            try:
+                target = op()
+            except Ic10RuntimeError as e:
+                return self._fault(tick, executed, pc, loops, str(e))
+            except IndexError:
+                return self._fault(tick, executed, pc, loops, f"'{lines[pc].opcode}' is missing operands")
+            if target is None:
+                pc += 1
+                continue
+            if target < 0:
+                return self._fault(tick, executed, pc, loops, f"jump to line {target}")
+            if target <= pc:
+                loop = self._loop_name(target)
+                if loop not in loops:
+                    loops.append(loop)
+            pc = target
+
+        self.pc = pc
+        return TickResult(tick, executed, "budget", pc, tuple(loops))
+
+    def _fault(self, tick: int, executed: int, pc: int, loops: list[str], message: str) -> TickResult:
+        self.pc = pc
+        self.state = "error"
+        self.error = f"{self.program.describe(pc)}: {message}"
+        return TickResult(tick, executed, "error", pc, tuple(loops), self.error)
+
+    # ---- time skipping -----------------------------------------------------
+
+    def repeating(self, result: TickResult) -> bool:
+        """True when `result`'s tick left the chip exactly as the tick before it did.
+
+        Call it after every tick. If the devices also ended both ticks alike,
+        every later tick repeats this one until something outside the chip
+        changes, and `skip` can stand in for them.
+        """
+
+        outcome = (result.end, result.executed, result.line, result.loops)
+        previous = self._previous
+        if previous is None or previous[0] != result.tick - 1 or previous[1] != outcome:
+            self._previous = (result.tick, outcome, None, None)
+            return False
+        state = (self.state, self.pc, self.registers[:], dict(self.aliases))
+        counts = self.line_counts[:]
+        self._previous = (result.tick, outcome, state, counts)
+        if previous[2] != state:
+            return False
+        delta = [now - before for now, before in zip(counts, previous[3])]
+        if any(delta[i] for i in self._rand_lines):
+            return False
+        self._repeat = (result, delta)
+        return True
+
+    def skip(self, tick: int, span: int) -> TickResult:
+        """Stand in for `span` ticks from `tick` in which nothing new happens.
+
+        The chip is asleep (until after the span) or halted, or `repeating`
+        just returned True and each tick repeats the last one.
+        """
+
+        if self.state != "running":
+            return replace(self.run_tick(tick), span=span)
+        result, delta = self._repeat
+        counts = self.line_counts
+        for index, visits in enumerate(delta):
+            if visits:
+                counts[index] += visits * span
+        self._previous = (tick + span - 1, *self._previous[1:3], counts[:])
+        return replace(result, tick=tick, span=span)
+
+
+class TimeSkipper:
+    """Finds the ticks a run can jump over because nothing would happen in them.
+
+    After a tick, nothing happens until the next trace change or `sleep`
+    wake-up when every chip is asleep or halted, or when every running chip is
+    `repeating`, the others did not run, and the devices ended the tick as
+    they ended the one before.
+    """
+
+    def __init__(self, chips: list[Chip], network: Network) -> None:
+        self.chips = chips
+        self.network = network
+        self.changes = network.trace_changes()
+        self.memory = any(chip.writes_memory for chip in chips)
+        self._world: Optional[tuple[int, list[Any]]] = None
+        self._running = False
+
+    def next_tick(self, tick: int, results: list[TickResult], limit: int) -> int:
+        """The next tick to step after `tick` (at most `limit`); every tick before it repeats `tick`.
+
+        `results` holds each chip's result for `tick`, in `chips` order.
+        """
+
+        step = tick + 1
+        index = bisect.bisect_right(self.changes, tick)
+        end = min(limit, self.changes[index]) if index < len(self.changes) else limit
+        if end <= step:
+            return step
+        running = False
+        idle = quiet = True
+        for chip, result in zip(self.chips, results):
+            if chip.state == "running":
+                running = True
+                quiet = chip.repeating(result) and quiet
+                continue
+            if chip.state == "sleeping":
+                end = min(end, chip.wake_tick)
+            idle = idle and not result.executed
+        if end <= step or not quiet:
+            return step
+        if running:
+            world = self.network.state(memory=self.memory)
+            previous, self._world = self._world, (tick, world)
+            if not idle or previous is None or previous[0] != tick - 1 or previous[1] != world:
+                return step
+            self._world = (end - 1, world)
+        self._running = running
+        return end
+
+    def skip_traces(self, tick: int) -> None:
+        """Leave the devices as stepping the skipped span from `tick` would.
+
+        While a chip runs, each tick of the span repeats its writes over the
+        traces and the devices stay as they are; otherwise the traces hold.
+        """
+
+        if not self._running:
+            self.network.apply_traces(tick)
+
+
+# ---- environment ----------------------------------------------------------------
+
+
+def _device_from_spec(spec: dict[str, Any]) -> Device:
+    if "prefabHash" in spec:
+        prefab_hash = int(spec["prefabHash"])
+    elif "prefab" in spec:
+        prefab_hash = ic10_hash(str(spec["prefab"]))
+    else:
+        prefab_hash = 0
+
+    device = Device(prefab_hash=prefab_hash, name=str(spec.get("name", "")))
+    for key, value in (spec.get("fields") or {}).items():
+        if isinstance(value, list):
+            device.traces[key] = [float(v) for v in value]
+            device.fields[key] = float(value[0]) if value else 0.0
+        else:
+            device.fields[key] = float(value)
+    device.slots = [
+        {k: float(v) for k, v in slot.items()} for slot in (spec.get("slots") or [])
+    ]
+    for key, value in (spec.get("reagents") or {}).items():
+        reagent = parse_number(str(key))
+        device.reagents[int(reagent if reagent is not None else ic10_hash(str(key)))] = float(value)
+    return device
+
+
+def referenced_pins(program: Program) -> list[str]:
+    """Return the `d0..d5` pins a script touches, directly or through aliases."""
+
+    pins: set[str] = set()
+    for line in program.lines:
+        if not line.is_code or line.opcode == "define":
+            continue
+        for arg in line.args:
+            pin = device_ref(program.resolve_alias(arg))
+            if pin in DEVICE_PINS:
+                pins.add(pin)
+    return sorted(pins)
+
+
+def build_environment(
+    program: Program,
+    env: Optional[dict[str, Any]] = None,
+) -> tuple[Device, dict[str, Optional[Device]], Network]:
+    """Create (housing, pins, network) for a chip from an env spec or defaults."""
+
+    network = Network()
+    env = env or {}
+
+    housing_spec = dict(env.get("housing") or {})
+    housing_spec.setdefault("prefab", IC_HOUSING_PREFAB)
+    housing = network.add(_device_from_spec(housing_spec))
+
+    pins: dict[str, Optional[Device]] = {pin: None for pin in DEVICE_PINS}
+    if "devices" in env:
+        for spec in env["devices"]:
+            device = network.add(_device_from_spec(spec))
+            pin = spec.get("pin")
+            if pin:
+                if pin not in pins:
+                    raise ValueError(f"unknown pin '{pin}' (expected d0..d5)")
+                pins[pin] = device
+    else:
+        for pin in referenced_pins(program):
+            pins[pin] = network.add(Device(name=f"mock_{pin}"))
+
+    return housing, pins, network
+
+
+# ---- reporting -------------------------------------------------------------------
+
+
+@dataclass
+class ScriptReport:
+    path: str
+    budget: int
+    ticks: list[TickResult]
+
+    @property
+    def tick_count(self) -> int:
+        return sum(t.span for t in self.ticks)
+
+    @property
+    def executed(self) -> int:
+        return sum(t.executed * t.span for t in self.ticks)
+
+    @property
+    def overruns(self) -> list[TickResult]:
+        return [t for t in self.ticks if t.end == "budget"]
+
+    @property
+    def errors(self) -> list[TickResult]:
+        return [t for t in self.ticks if t.end == "error" and t.executed]
+
+    @property
+    def ok(self) -> bool:
+        return not self.overruns and not self.errors
+
+
+def simulate(
+    program: Program,
+    *,
+    ticks: int = DEFAULT_TICKS,
+    budget: int = DEFAULT_TICK_BUDGET,
+    env: Optional[dict[str, Any]] = None,
+    compiled: bool = True,
+    skip_idle: bool = True,
+) -> ScriptReport:
+    housing, pins, network = build_environment(program, env)
+    chip = Chip(program, housing=housing, pins=pins, network=network, budget=budget, compiled=compiled)
+    skipper = TimeSkipper([chip], network) if skip_idle else None
+    results: list[TickResult] = []
+    tick = 0
+    while tick < ticks:
+        network.apply_traces(tick)
+        result = chip.run_tick(tick)
+        results.append(result)
+        if chip.state in ("halted", "error"):
+            break
+        following = skipper.next_tick(tick, [result], ticks) if skipper is not None else tick + 1
+        if following > tick + 1:
+            skipper.skip_traces(tick + 1)
+            results.append(chip.skip(tick + 1, following - tick - 1))
+        tick = following
+    return ScriptReport(path=str(program.path), budget=budget, ticks=results)
+
+
+def _format_tick(program: Program, t: TickResult) -> str:
+    where = program.describe(t.line)
+    ticks = f"{t.tick}..{t.tick + t.span - 1}" if t.span > 1 else str(t.tick)
+    text = f"  tick {ticks:>5}: {t.executed:>4} instr  {t.end:<8} {where}"
+    if t.loops and t.end == "budget":
+        text += f"  loops: {', '.join(t.loops)}"
+    if t.message and t.end != "error":
+        text += f"  ({t.message})"
+    return text
+
+
+def format_report(program: Program, report: ScriptReport, *, trace: bool) -> list[str]:
+    active = [t for t in report.ticks if t.executed]
+    peak = max((t.executed for t in active), default=0)
+    active_ticks = sum(t.span for t in active)
+    mean = report.executed / active_ticks if active else 0.0
+    out = [
+        f"{report.path}: {report.tick_count} tick(s), {report.executed} instruction(s), "
+        f"max {peak}/tick, avg {mean:.1f}/active tick (budget {report.budget})"
+    ]
+
+    if trace:
+        out.extend(_format_tick(program, t) for t in report.ticks)
+
+    landings: Counter[tuple[str, int]] = Counter()
+    for t in report.ticks:
+        if t.end in ("yield", "sleep"):
+            landings[t.end, t.line] += t.span
+    for (end, line), count in sorted(landings.items(), key=lambda kv: kv[0][1]):
+        out.append(f"  {end} at {program.describe(line)}: {count} tick(s)")
+
+    overruns = report.overruns
+    if overruns:
+        loops = sorted({loop for t in overruns for loop in t.loops})
+        first = overruns[0]
+        out.append(
+            f"  BUDGET: {sum(t.span for t in overruns)} tick(s) exhausted {report.budget} instructions "
+            f"(first at tick {first.tick}, {program.describe(first.line)}; "
+            f"loops: {', '.join(loops) or 'straight-line code'})"
+        )
+    for t in report.errors:
+        out.append(f"  ERROR: tick {t.tick}: {t.message}")
+    if report.ticks and report.ticks[-1].end == "halt":
+        out.append(f"  halted at tick {report.ticks[-1].tick}")
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run IC10 scripts headless with per-tick accounting")
+    parser.add_argument("path", help="IC10 file or directory to run")
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=DEFAULT_TICKS,
+        help=f"Game ticks to simulate per script (default: {DEFAULT_TICKS})",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=DEFAULT_TICK_BUDGET,
+        help=f"Per-tick instruction budget (default: {DEFAULT_TICK_BUDGET})",
+    )
+    parser.add_argument("--devices", help="JSON mock device environment (see module docstring)")
+    parser.add_argument(
+        "--ext",
+        action="append",
+        default=[],
+        help="File extension(s) to include when running a directory (repeatable). Example: --ext .ic10",
+    )
+    parser.add_argument("--trace", action="store_true", help="Print one line per simulated tick")
+    parser.add_argument(
+        "--interpret",
+        action="store_true",
+        help="Run every line through the line-by-line interpreter instead of the compiled closures",
+    )
+    parser.add_argument(
+        "--every-tick",
+        action="store_true",
+        help="Step every tick instead of skipping ticks in which nothing can happen",
+    )
+    parser.add_argument("--json", action="store_true", help="Emit a JSON report instead of text")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Path not found: {path}")
+        return 2
+    if args.ticks < 1 or args.budget < 1:
+        print("--ticks and --budget must be >= 1")
+        return 2
+
+    env: Optional[dict[str, Any]] = None
+    if args.devices:
+        try:
+            env = json.loads(Path(args.devices).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Cannot read devices file {args.devices}: {e}")
+            return 2
+
+    exts = args.ext or ([".ic10", ".ic"] if path.is_dir() else [])
+    files = iter_ic10_files(path, exts)
+    if not files:
+        print(f"No IC10 files found under {path}")
+        return 2
+
+    reports: list[tuple[Program, ScriptReport]] = []
+    for f in files:
+        try:
+            program = parse_file(f)
+            report = simulate(
+                program,
+                ticks=args.ticks,
+                budget=args.budget,
+                env=env,
+                compiled=not args.interpret,
+                skip_idle=not args.every_tick,
+            )
+        except (Ic10ParseError, ValueError, OSError) as e:
+            print(f"{f}: {e}")
+            return 2
+        reports.append((program, report))
+
+    if args.json:
+        payload = [
+            {
+                "path": r.path,
+                "budget": r.budget,
+                "executed": r.executed,
+                "ok": r.ok,
+                "ticks": [asdict(t) for t in r.ticks],
+            }
+            for _, r in reports
+        ]
+        print(json.dumps(payload, indent=2))
+    else:
+        for program, report in reports:
+            for text in format_report(program, report, trace=args.trace):
+                print(text)
+
+    return 0 if all(r.ok for _, r in reports) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,9 +8,16 @@ Checks Stationeers IC10 chip paste-into-chip constraints:
 This repo has not yet standardized script file extensions.
 If you pass a directory, use --ext to control which files are checked.
 
+Results are cached by file content hash and limit settings (default cache:
+`build/cache/ic10_size_check.json`), so unchanged files are not re-checked;
+a file whose size and modification time are unchanged is not even re-read.
+`--jobs N` checks the remaining files in N worker processes.
+
 Examples
     python tools/ic10_size_check.py path/to/script.ic10
     python tools/ic10_size_check.py scripts/ --ext .ic10 --ext .txt
+    python tools/ic10_size_check.py ~/ic10_variants/ --jobs 8
+    python tools/ic10_size_check.py scripts/ --no-cache
 
 Exit codes
   0 - all files OK
@@ -21,14 +28,25 @@ Exit codes
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
+
+from repo_files import DiskFiles
+
 
+ROOT = Path(__file__).resolve().parents[1]
 
 DEFAULT_MAX_LINES = 128
 DEFAULT_MAX_COLS = 90
 DEFAULT_MAX_BYTES = 4096
+DEFAULT_CACHE = ROOT / "build" / "cache" / "ic10_size_check.json"
+CACHE_VERSION = 1  # bump when check results change for the same input
+SKIP_DIRS = {".git", "catalog", "tools"}
 
 
 @dataclass(frozen=True)
@@ -47,16 +65,20 @@ def _iter_candidate_files(path: Path, exts: list[str]) -> Iterable[Path]:
 
     # If extensions are provided, use them. Otherwise, default to a conservative
     # set and require the user to extend/adjust once the repo decides a format.
-    normalized_exts = [e if e.startswith(".") else f".{e}" for e in exts]
+    normalized_exts = {(e if e.startswith(".") else f".{e}").lower() for e in exts}
+    if any(part in SKIP_DIRS for part in path.parts):
+        return
 
-    for p in sorted(path.rglob("*")):
-        if not p.is_file():
-            continue
-        if p.parts and any(part in {".git", "catalog", "tools"} for part in p.parts):
-            continue
-        if normalized_exts and p.suffix.lower() not in {e.lower() for e in normalized_exts}:
-            continue
-        yield p
+    found: list[Path] = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        # Prune skipped directories instead of listing everything under them.
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            p = Path(dirpath) / name
+            if normalized_exts and p.suffix.lower() not in normalized_exts:
+                continue
+            found.append(p)
+    yield from sorted(found)
 
 
 def _check_text(text: str, max_lines: int, max_cols: int) -> tuple[int, list[int]]:
@@ -70,15 +92,7 @@ def _check_text(text: str, max_lines: int, max_cols: int) -> tuple[int, list[int
     return len(lines), offending
 
 
-def check_file(path: Path, max_lines: int, max_cols: int, max_bytes: int) -> list[Violation]:
-    try:
-        raw = path.read_bytes()
-    except UnicodeDecodeError:
-        # IC10 scripts should be plain text; if decoding fails, report clearly.
-        return [Violation(path=path, message="not valid UTF-8 text")]
-    except OSError as e:
-        return [Violation(path=path, message=f"read error: {e}")]
-
+def check_bytes(path: Path, raw: bytes, max_lines: int, max_cols: int, max_bytes: int) -> list[Violation]:
     try:
         text = raw.decode("utf-8")
     except UnicodeDecodeError:
@@ -118,6 +132,151 @@ def check_file(path: Path, max_lines: int, max_cols: int, max_bytes: int) -> lis
     return violations
 
 
+def check_file(path: Path, max_lines: int, max_cols: int, max_bytes: int) -> list[Violation]:
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        return [Violation(path=path, message=f"read error: {e}")]
+    return check_bytes(path, raw, max_lines, max_cols, max_bytes)
+
+
+Limits = tuple[int, int, int]
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _check_job(job: tuple[str, Limits]) -> tuple[Optional[str], list[str]]:
+    """Worker entry point: (content digest or None on read error, messages)."""
+
+    name, limits = job
+    path = Path(name)
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        return None, [f"read error: {e}"]
+    return _digest(raw), [v.message for v in check_bytes(path, raw, *limits)]
+
+
+class SizeCache:
+    """Check results keyed by content hash + limits.
+
+    A stat index (path -> size, mtime, digest) lets unchanged files skip the
+    read; results are shared by every file with the same content.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.files: dict[str, list] = {}
+        self.results: dict[str, list[str]] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.files = dict(data.get("files") or {})
+            self.results = dict(data.get("results") or {})
+
+    @staticmethod
+    def _key(digest: str, limits: Limits) -> str:
+        return f"{digest}:{limits[0]}:{limits[1]}:{limits[2]}"
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[list[int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def lookup(self, path: Path, limits: Limits) -> Optional[list[str]]:
+        name = str(path.resolve())
+        stat = self._stat(path)
+        entry = self.files.get(name)
+        if stat is None:
+            return None
+        if entry is not None and entry[:2] == stat:
+            digest = entry[2]
+        else:
+            try:
+                digest = _digest(path.read_bytes())
+            except OSError:
+                return None
+            self.files[name] = stat + [digest]
+        return self.results.get(self._key(digest, limits))
+
+    def store(self, path: Path, digest: str, limits: Limits, messages: list[str], stat: Optional[list[int]]) -> None:
+        if stat is not None:
+            self.files[str(path.resolve())] = stat + [digest]
+        self.results[self._key(digest, limits)] = messages
+
+    def save(self) -> None:
+        live = {entry[2] for entry in self.files.values()}
+        self.files = {name: entry for name, entry in self.files.items() if Path(name).exists()}
+        self.results = {k: v for k, v in self.results.items() if k.split(":", 1)[0] in live}
+        payload = {"version": CACHE_VERSION, "files": self.files, "results": self.results}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(payload, sort_keys=True) + "\n", encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # a read-only checkout still gets a (slower) check
+
+
+def check_files(
+    files: list[Path],
+    limits: Limits,
+    *,
+    cache: Optional[SizeCache] = None,
+    jobs: int = 1,
+) -> list[Violation]:
+    """Check files in order, reusing cached results and fanning misses out to workers."""
+
+    results: dict[Path, list[str]] = {}
+    pending: list[Path] = []
+    for f in files:
+        hit = cache.lookup(f, limits) if cache is not None else None
+        if hit is not None:
+            results[f] = hit
+        else:
+            pending.append(f)
+
+    stats = {f: SizeCache._stat(f) for f in pending} if cache is not None else {}
+    work = [(str(f), limits) for f in pending]
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            checked = list(pool.map(_check_job, work, chunksize=max(1, len(work) // (jobs * 4))))
+    else:
+        checked = [_check_job(job) for job in work]
+
+    for f, (digest, messages) in zip(pending, checked):
+        results[f] = messages
+        if cache is not None and digest is not None:
+            cache.store(f, digest, limits, messages, stats[f])
+    if cache is not None:
+        cache.save()
+
+    return [Violation(path=f, message=m) for f in files for m in results[f]]
+
+
+def check_tree(
+    root: Path,
+    files: DiskFiles,
+    limits: Limits = (DEFAULT_MAX_LINES, DEFAULT_MAX_COLS, DEFAULT_MAX_BYTES),
+    exts: tuple[str, ...] = (".ic10", ".ic"),
+) -> list[Violation]:
+    """Check every script under `root`, reading content through `files` (no result cache)."""
+
+    out: list[Violation] = []
+    for f in files.walk(root):
+        if f.suffix.lower() not in exts or any(p in SKIP_DIRS for p in f.relative_to(root).parts):
+            continue
+        out.extend(check_bytes(f, files.read_bytes(f), *limits))
+    return out
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Check IC10 script size constraints")
     parser.add_argument("path", help="File or directory to check")
@@ -145,6 +304,18 @@ def main() -> int:
         default=[],
         help="File extension(s) to include when checking a directory (repeatable). Example: --ext .ic10",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for files not in the cache (default: 1; 0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(DEFAULT_CACHE),
+        help="Result cache file (default: build/cache/ic10_size_check.json under the repo)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Check every file and leave the cache alone")
 
     args = parser.parse_args()
 
@@ -159,16 +330,18 @@ def main() -> int:
         # settles on canonical script extensions.
         exts = [".ic10", ".ic"]
 
-    all_violations: list[Violation] = []
-    for f in _iter_candidate_files(path, exts=exts):
-        all_violations.extend(
-            check_file(
-                f,
-                max_lines=args.max_lines,
-                max_cols=args.max_cols,
-                max_bytes=args.max_bytes,
-            )
-        )
+    if args.jobs < 0:
+        print("ERROR: --jobs must be 0 or more")
+        return 2
+    jobs = args.jobs or os.cpu_count() or 1
+    cache = None if args.no_cache else SizeCache(Path(args.cache))
+
+    all_violations = check_files(
+        list(_iter_candidate_files(path, exts=exts)),
+        (args.max_lines, args.max_cols, args.max_bytes),
+        cache=cache,
+        jobs=jobs,
+    )
 
     if not all_violations:
         print("OK")
@@ -0,0 +1,1250 @@
+"""Run one IC10 script across many sensor scenarios at once (parameter sweeps).
+
+`tools/ic10_sim.py` runs one chip against one set of devices. Sweeping a
+script's thresholds over realistic sensor traces that way means thousands of
+separate runs. This tool runs them as lanes of one vectorized chip instead:
+- every register, `define` being swept and device field is a lane vector
+  (stdlib `array`, or a NumPy array when NumPy is installed)
+- each step executes one line for every lane whose program counter is on it;
+  lanes that branch differently simply continue from different lines (the
+  lowest line runs first, so lanes that diverge re-join where paths meet)
+- per-lane accounting matches `tools/ic10_sim.py`: line budget, `yield`,
+  `sleep`, `hcf`, faults and the device environment (`--devices`)
+
+Scenarios
+- `--define NAME=VALUES` sweeps a `define` (`20,22,24` or `START:STOP:STEP`,
+  inclusive); `--field DEVICE.LogicType=VALUES` sweeps an initial device field
+- every combination of the swept values is one scenario row, run against the
+  same `--traces N` sensor traces, so rows are compared on identical input
+- `--walk DEVICE.LogicType=START,SIGMA[,PULL]` generates the traces as
+  mean-reverting random walks (per tick: `x += PULL * (START - x) +
+  gauss(0, SIGMA)`, default PULL 0.01); `--trace-file DEVICE.LogicType=F`
+  reads them from a JSON list of per-tick lists instead
+- DEVICE is a pin (`d0..d5`), `db`, or a device name from `--devices`
+
+Reported per scenario row (averaged over its traces): for every device field
+the script writes, how often the value changed and the share of ticks it was
+non-zero (`on%`), plus the worst lines per tick and lanes that faulted or hit
+the line budget. Without `--devices`, referenced pins get mock devices (as in
+`tools/ic10_sim.py`) and every constant prefab hash used by `sb`/`lb` gets one
+mock device named after its `define`, so batch writes are counted too.
+
+Limits
+- aliases are resolved statically (`alias` lines are no-ops at run time)
+- slot, reagent and ReferenceId operations (`ls/ss/lr/ld/sd/lbs/lbns/sbs`),
+  indirect registers (`rr0`) and indirect pins (`dr0`) are not vectorized;
+  such scripts are rejected (run them with `tools/ic10_sim.py`)
+
+Examples
+    python tools/ic10_sweep.py scripts/liquid_temp_valve/liquid_temp_valve.ic10 \
+        --define TEMP_OPEN_BELOW_C=16:24:2 --define TEMP_CLOSE_ABOVE_C=26:34:2 \
+        --walk d0.Temperature=298.15,0.5 --traces 200 --ticks 600
+    python tools/ic10_sweep.py scripts/pipe_temp_hot_cold_valves/pipe_temp_hot_cold_valves.ic10 \
+        --define TEMP_HOT_CLOSE_BELOW_C=30:39:1 --walk d0.Temperature=311,0.6 --sort changes
+    python tools/ic10_sweep.py scripts/liquid_temp_valve/liquid_temp_valve.ic10 \
+        --define TEMP_OPEN_BELOW_C=18,20 --backend array --json
+
+Exit codes
+  0 - swept; no lane faulted or exhausted the line budget
+  1 - one or more lanes faulted or exhausted the line budget
+  2 - usage / input error (or the script uses an operation that is not vectorized)
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import random
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from ic10_parse import (
+    BATCH_MODES,
+    DEVICE_PINS,
+    RA_INDEX,
+    REGISTER_COUNT,
+    SP_INDEX,
+    Ic10ParseError,
+    Program,
+    device_ref,
+    parse_file,
+    parse_number,
+    register_ref,
+)
+from ic10_sim import (
+    BINARY_MATH,
+    CONDITIONS,
+    DEFAULT_TICK_BUDGET,
+    NOOP_OPCODES,
+    READ_ONLY_FIELDS,
+    STACK_SIZE,
+    TICK_SECONDS,
+    UNARY_MATH,
+    Device,
+    Ic10RuntimeError,
+    _aggregate,
+    _to_int,
+    build_environment,
+)
+
+try:
+    import numpy as np
+except ImportError:  # the stdlib `array` backend is used instead
+    np = None
+
+
+DEFAULT_TICKS = 400
+DEFAULT_TRACES = 100
+DEFAULT_PULL = 0.01
+DEFAULT_LIMIT = 50
+
+RUNNING, SLEEPING, HALTED, FAULTED = 0.0, 1.0, 2.0, 3.0
+
+UNSUPPORTED_OPCODES = frozenset({"ls", "ss", "lr", "ld", "sd", "lbs", "lbns", "sbs", "sbns"})
+
+
+# ---- lane backends -----------------------------------------------------------
+#
+# A lane vector holds one float per scenario. A lane set (`idx`) selects the
+# lanes a step runs on. Operands are either a float (same for every lane in
+# the set) or a sequence aligned with the lane set.
+
+
+class ArrayLanes:
+    """Lane vectors as stdlib `array('d')`, lane sets as lists."""
+
+    name = "array"
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+    def full(self, value: float):
+        return array("d", [value]) * self.count
+
+    def vector(self, values: Iterable[float]):
+        return array("d", values)
+
+    def tile(self, values, reps: int):
+        """Repeat a lane vector `reps` times (lane `i` takes `values[i % len(values)]`)."""
+
+        return values * reps
+
+    def size(self, idx) -> int:
+        return len(idx)
+
+    def join(self, a, b):
+        return a + b
+
+    def take(self, values, idx):
+        return [values[i] for i in idx]
+
+    def put(self, values, idx, new) -> None:
+        if isinstance(new, float):
+            for i in idx:
+                values[i] = new
+        else:
+            for i, v in zip(idx, new):
+                values[i] = v
+
+    def fill(self, values, new) -> None:
+        values[:] = new if not isinstance(new, float) else self.full(new)
+
+    def map(self, fn: Callable[..., Any], operands: list[Any], n: int):
+        if all(isinstance(o, float) for o in operands):
+            return [float(fn(*operands))] * n
+        columns = [itertools.repeat(o) if isinstance(o, float) else o for o in operands]
+        return [float(fn(*row)) for row in zip(*columns)]
+
+    def fast(self, opcode: str) -> Optional[Callable[..., Any]]:
+        return None
+
+    def choose(self, cond, a, b, n: int):
+        columns = [itertools.repeat(o, n) if isinstance(o, float) else o for o in (cond, a, b)]
+        return [x if c != 0 else y for c, x, y in zip(*columns)]
+
+    def split(self, idx, keys):
+        """Group the lane set by `keys` (aligned with it): [(key, lanes), ...]."""
+
+        if isinstance(keys, float):
+            return [(keys, idx)]
+        groups: dict[float, list[int]] = {}
+        for i, key in zip(idx, keys):
+            groups.setdefault(key, []).append(i)
+        return list(groups.items())
+
+    def ready(self, state, wake, tick: int):
+        return [i for i in range(self.count) if state[i] == RUNNING or (state[i] == SLEEPING and wake[i] <= tick)]
+
+    def count_up(self, counter, idx) -> None:
+        for i in idx:
+            counter[i] += 1
+
+    def below(self, counter, idx, limit: float):
+        """Split a lane set into (counter < limit, counter >= limit)."""
+
+        under = [i for i in idx if counter[i] < limit]
+        if len(under) == len(idx):
+            return idx, []
+        return under, [i for i in idx if counter[i] >= limit]
+
+    def without(self, idx, lanes: set[int]):
+        return [i for i in idx if i not in lanes]
+
+    def count_changes(self, counter, idx, old, new) -> None:
+        columns = [itertools.repeat(new) if isinstance(new, float) else new]
+        for i, a, b in zip(idx, old, *columns):
+            if a != b:
+                counter[i] += 1
+
+    def count_nonzero(self, counter, values) -> None:
+        for i, v in enumerate(values):
+            if v != 0:
+                counter[i] += 1
+
+    def maximum(self, target, values) -> None:
+        for i, v in enumerate(values):
+            if v > target[i]:
+                target[i] = v
+
+    def tolist(self, values) -> list[float]:
+        return list(values)
+
+
+class NumpyLanes(ArrayLanes):
+    """Lane vectors and lane sets as NumPy arrays."""
+
+    name = "numpy"
+
+    FAST: dict[str, Callable[..., Any]] = {}
+    if np is not None:
+        FAST = {
+            "add": np.add,
+            "sub": np.subtract,
+            "mul": np.multiply,
+            "seq": np.equal,
+            "sne": np.not_equal,
+            "slt": np.less,
+            "sle": np.less_equal,
+            "sgt": np.greater,
+            "sge": np.greater_equal,
+            "seqz": lambda a: np.equal(a, 0.0),
+            "snez": lambda a: np.not_equal(a, 0.0),
+            "sltz": lambda a: np.less(a, 0.0),
+            "slez": lambda a: np.less_equal(a, 0.0),
+            "sgtz": lambda a: np.greater(a, 0.0),
+            "sgez": lambda a: np.greater_equal(a, 0.0),
+        }
+
+    def full(self, value: float):
+        return np.full(self.count, value, dtype=float)
+
+    def vector(self, values: Iterable[float]):
+        return np.fromiter(values, dtype=float)
+
+    def tile(self, values, reps: int):
+        return np.tile(values, reps)
+
+    def join(self, a, b):
+        return np.concatenate((a, b))
+
+    def take(self, values, idx):
+        return values[idx]
+
+    def put(self, values, idx, new) -> None:
+        values[idx] = new
+
+    def fill(self, values, new) -> None:
+        values[:] = new
+
+    def _lane_array(self, result, n: int):
+        result = np.asarray(result, dtype=float)
+        return np.full(n, float(result)) if result.ndim == 0 else result
+
+    def map(self, fn: Callable[..., Any], operands: list[Any], n: int):
+        if all(isinstance(o, float) for o in operands):
+            return np.full(n, float(fn(*operands)))
+        return np.frompyfunc(fn, len(operands), 1)(*operands).astype(float)
+
+    def fast(self, opcode: str) -> Optional[Callable[..., Any]]:
+        fn = self.FAST.get(opcode)
+        if fn is None:
+            return None
+        return lambda operands, n: self._lane_array(fn(*operands), n)
+
+    def choose(self, cond, a, b, n: int):
+        return self._lane_array(np.where(np.asarray(cond) != 0, a, b), n)
+
+    def split(self, idx, keys):
+        if isinstance(keys, float):
+            return [(keys, idx)]
+        if not len(idx):
+            return []
+        keys = np.asarray(keys)
+        first = keys[0]
+        if (keys == first).all():
+            return [(float(first), idx)]
+        return [(float(key), idx[keys == key]) for key in np.unique(keys)]
+
+    def ready(self, state, wake, tick: int):
+        return np.flatnonzero((state == RUNNING) | ((state == SLEEPING) & (wake <= tick)))
+
+    def count_up(self, counter, idx) -> None:
+        counter[idx] += 1
+
+    def below(self, counter, idx, limit: float):
+        reached = counter[idx] >= limit
+        if not reached.any():
+            return idx, idx[:0]
+        return idx[~reached], idx[reached]
+
+    def without(self, idx, lanes: set[int]):
+        return idx[~np.isin(idx, np.fromiter(lanes, dtype=np.intp))]
+
+    def count_changes(self, counter, idx, old, new) -> None:
+        counter[idx] += np.asarray(old) != new
+
+    def count_nonzero(self, counter, values) -> None:
+        counter += values != 0
+
+    def maximum(self, target, values) -> None:
+        np.maximum(target, values, out=target)
+
+    def tolist(self, values) -> list[float]:
+        return values.tolist()
+
+
+BACKENDS = {"array": ArrayLanes, "numpy": NumpyLanes}
+
+
+def make_lanes(count: int, backend: Optional[str] = None) -> ArrayLanes:
+    """`numpy` when available (or asked for), else the stdlib `array` backend."""
+
+    if backend is None:
+        backend = "numpy" if np is not None else "array"
+    if backend == "numpy" and np is None:
+        raise ValueError("the numpy backend needs NumPy installed")
+    return BACKENDS[backend](count)
+
+
+# ---- lane devices ----------------------------------------------------------------
+
+
+@dataclass
+class LaneDevice:
+    """A `Device` whose fields hold one value per lane."""
+
+    prefab_hash: int
+    name: str
+    label: str  # pin or name, for reports
+    fields: dict[str, Any]
+    reference_id: int = 0
+    name_hash: int = 0
+    traces: dict[str, list[Any]] = field(default_factory=dict)  # per tick: float or lane vector
+
+    def fixed(self, logic_type: str) -> Optional[float]:
+        if logic_type == "PrefabHash":
+            return float(self.prefab_hash)
+        if logic_type == "NameHash":
+            return float(self.name_hash)
+        if logic_type == "ReferenceId":
+            return float(self.reference_id)
+        return None
+
+
+def _lane_device(device: Device, label: str, lanes: ArrayLanes) -> LaneDevice:
+    return LaneDevice(
+        prefab_hash=device.prefab_hash,
+        name=device.name,
+        label=label,
+        fields={k: lanes.full(v) for k, v in device.fields.items()},
+        reference_id=device.reference_id,
+        name_hash=device.name_hash,
+        traces={k: [float(v) for v in values] for k, values in device.traces.items() if values},
+    )
+
+
+@dataclass
+class Tracked:
+    """A device field the script writes: per-lane change and non-zero tick counts."""
+
+    device: LaneDevice
+    logic_type: str
+    changes: Any
+    duty: Any
+
+    @property
+    def label(self) -> str:
+        return f"{self.device.label}.{self.logic_type}"
+
+
+def batch_targets(program: Program) -> list[tuple[int, str]]:
+    """(prefab hash, name) for every constant prefab hash used by `sb`/`lb`."""
+
+    out: dict[int, str] = {}
+    for line in program.lines:
+        if line.opcode not in ("sb", "lb") or len(line.args) < 2:
+            continue
+        token = program.resolve_alias(line.args[0] if line.opcode == "sb" else line.args[1])
+        value = program.resolve_constant(token)
+        if value is not None and value == int(value):
+            out.setdefault(int(value), token if token in program.defines else f"batch_{int(value)}")
+    return list(out.items())
+
+
+# ---- vectorized chip ---------------------------------------------------------------
+
+
+Getter = Any  # float, or a callable idx -> lane values
+Handler = Callable[[Any, int], Any]  # (idx, line) -> None (fall through) or next line per lane
+
+
+class LaneChip:
+    """One IC10 program run for `lanes.count` independent scenarios."""
+
+    def __init__(
+        self,
+        program: Program,
+        lanes: ArrayLanes,
+        *,
+        env: Optional[dict[str, Any]] = None,
+        defines: Optional[dict[str, Any]] = None,
+        budget: int = DEFAULT_TICK_BUDGET,
+        seed: int = 0,
+    ) -> None:
+        self.program = program
+        self.lanes = lanes
+        self.budget = budget
+        self.seed = seed
+        self.registers = [lanes.full(0.0) for _ in range(REGISTER_COUNT)]
+        self.stacks: Optional[list[list[float]]] = None  # per lane, allocated on first use
+        self.pc = lanes.full(0.0)
+        self.state = lanes.full(RUNNING)
+        self.wake = lanes.full(0.0)
+        self.executed = lanes.full(0.0)
+        self.peak = lanes.full(0.0)
+        self.overruns = lanes.full(0.0)
+        self.errors: dict[int, str] = {}
+        self.tracked: dict[tuple[int, str], Tracked] = {}
+        self.tick = 0
+        self.ticks = 0
+        self._rands: Optional[list[random.Random]] = None
+        self._failed: set[int] = set()
+        self._sweep_traces: list[tuple[Any, list[Any], int]] = []
+        self.defines: dict[str, Any] = {k: float(v) for k, v in program.defines.items()}
+        for name, values in (defines or {}).items():
+            if name not in program.defines:
+                raise ValueError(f"'{name}' is not a define in {program.path}")
+            self.defines[name] = values
+
+        housing, pins, network = build_environment(program, env)
+        if env is None:
+            for prefab_hash, name in batch_targets(program):
+                if not network.matching(prefab_hash):
+                    network.add(Device(prefab_hash=prefab_hash, name=name))
+        labels = {id(d): pin for pin, d in pins.items() if d is not None}
+        labels[id(housing)] = "db"
+        self.network = [_lane_device(d, labels.get(id(d), d.name), lanes) for d in network.devices]
+        by_id = {id(d): lane for d, lane in zip(network.devices, self.network)}
+        self.housing = by_id[id(housing)]
+        self.pins = {pin: by_id[id(d)] if d is not None else None for pin, d in pins.items()}
+        self._ops = [self._decode(i) for i in range(len(program.lines))]
+
+    def find(self, ref: str) -> LaneDevice:
+        """A device by pin (`d0..d5`), `db`, or name."""
+
+        if ref == "db":
+            return self.housing
+        if ref in DEVICE_PINS:
+            device = self.pins.get(ref)
+            if device is None:
+                raise ValueError(f"pin {ref} has no device")
+            return device
+        for device in self.network:
+            if ref in (device.name, device.label):
+                return device
+        raise ValueError(f"no device '{ref}' (expected d0..d5, db or a device name)")
+
+    def add_trace(self, device: LaneDevice, logic_type: str, columns: list[Any], reps: int) -> None:
+        """Feed a per-tick field trace; `columns[tick]` is tiled `reps` times over the lanes."""
+
+        if logic_type not in device.fields:
+            device.fields[logic_type] = self.lanes.full(0.0)
+        device.traces.pop(logic_type, None)
+        self._sweep_traces.append((device.fields[logic_type], columns, reps))
+
+    # ---- lane helpers ----------------------------------------------------------
+
+    def _per_lane(self, idx) -> list[int]:
+        return idx if isinstance(idx, list) else [int(i) for i in idx]
+
+    def _fail(self, idx, message: str) -> None:
+        for i in self._per_lane(idx):
+            self.state[i] = FAULTED
+            self.errors.setdefault(i, message)
+            self._failed.add(i)
+
+    def _values(self, getters: list[Getter], idx) -> list[Any]:
+        return [g if isinstance(g, float) else g(idx) for g in getters]
+
+    def _compute(self, fn: Callable[..., Any], opcode: str, operands: list[Any], idx, where: int):
+        n = self.lanes.size(idx)
+        fast = self.lanes.fast(opcode)
+        if fast is not None:
+            return fast(operands, n)
+        try:
+            return self.lanes.map(fn, operands, n)
+        except Ic10RuntimeError:
+            pass
+        # a lane faulted: redo one lane at a time to find which
+        out = []
+        for k, lane in enumerate(self._per_lane(idx)):
+            try:
+                out.append(float(fn(*(o if isinstance(o, float) else o[k] for o in operands))))
+            except Ic10RuntimeError as e:
+                self._fail([lane], f"{self.program.describe(where)}: {e}")
+                out.append(math.nan)
+        return self.lanes.vector(out)
+
+    # ---- decoding (once per line) -----------------------------------------------
+
+    def _register(self, token: str) -> int:
+        target = self.program.resolve_alias(token)
+        ref = register_ref(target)
+        if ref is None:
+            raise Ic10RuntimeError(f"'{token}' is not a register")
+        depth, index = ref
+        if depth:
+            raise ValueError(f"indirect register '{target}' is not vectorized (use tools/ic10_sim.py)")
+        return index
+
+    def _operand(self, token: str) -> Getter:
+        target = self.program.resolve_alias(token)
+        lanes = self.lanes
+        if register_ref(target) is not None:
+            values = self.registers[self._register(target)]
+            return lambda idx: lanes.take(values, idx)
+        value = parse_number(target)
+        if value is not None:
+            return value
+        if target in self.defines:
+            define = self.defines[target]
+            return define if isinstance(define, float) else lambda idx: lanes.take(define, idx)
+        if target in self.program.labels:
+            return float(self.program.labels[target])
+        raise Ic10RuntimeError(f"unknown value '{token}'")
+
+    def _device(self, token: str) -> LaneDevice:
+        target = self.program.resolve_alias(token)
+        pin = device_ref(target)
+        if pin is None:
+            raise Ic10RuntimeError(f"'{token}' is not a device")
+        if pin.startswith("dr"):
+            raise ValueError(f"indirect device '{target}' is not vectorized (use tools/ic10_sim.py)")
+        if pin == "db":
+            return self.housing
+        device = self.pins.get(pin)
+        if device is None:
+            raise Ic10RuntimeError(f"device {pin} not set")
+        return device
+
+    def _device_set(self, token: str) -> bool:
+        try:
+            self._device(token)
+        except Ic10RuntimeError:
+            return False
+        return True
+
+    def _decode(self, index: int) -> Optional[Handler]:
+        line = self.program.lines[index]
+        opcode = line.opcode
+        if opcode is None or opcode in NOOP_OPCODES or opcode in ("alias", "yield", "hcf"):
+            return None
+        try:
+            return self._handler(opcode, line.args, index)
+        except Ic10RuntimeError as e:
+            message = f"{self.program.describe(index)}: {e}"
+        except IndexError:
+            message = f"{self.program.describe(index)}: '{opcode}' is missing operands"
+        return lambda idx, p: self._fail(idx, message)
+
+    def _handler(self, opcode: str, a: tuple[str, ...], index: int) -> Handler:
+        if opcode in UNSUPPORTED_OPCODES:
+            raise ValueError(f"{self.program.describe(index)}: '{opcode}' is not vectorized (use tools/ic10_sim.py)")
+        if opcode == "move":
+            return self._store(a[0], lambda idx, v: v[0], a[1:2])
+        if opcode in UNARY_MATH:
+            return self._math(opcode, UNARY_MATH[opcode], a[0], a[1:2], index)
+        if opcode in BINARY_MATH:
+            return self._math(opcode, BINARY_MATH[opcode], a[0], a[1:3], index)
+        if opcode == "select":
+            lanes = self.lanes
+            return self._store(a[0], lambda idx, v: lanes.choose(v[0], v[1], v[2], lanes.size(idx)), a[1:4])
+        if opcode == "rand":
+            return self._store(a[0], lambda idx, v: self._random(idx), ())
+        if opcode == "sleep":
+            return self._sleep(a[0] if a else "0")
+        if opcode in ("j", "jal"):
+            return self._branch(lambda idx: 1.0, a[0], link=opcode == "jal")
+        if opcode == "jr":
+            return self._branch(lambda idx: 1.0, a[0], relative=True)
+        if opcode in ("sdse", "sdns", "bdse", "bdns", "bdseal", "bdnsal", "brdse", "brdns"):
+            is_set = self._device_set(a[1] if opcode.startswith("s") else a[0])
+            flag = 1.0 if is_set == ("dse" in opcode) else 0.0
+            if opcode.startswith("s"):
+                return self._store(a[0], lambda idx, v: flag, ())
+            return self._branch(lambda idx: flag, a[1], link=opcode.endswith("al"), relative=opcode.startswith("br"))
+        for prefix in ("br", "b", "s"):
+            suffix = opcode[len(prefix) :] if opcode.startswith(prefix) else ""
+            link = prefix == "b" and suffix.endswith("al") and suffix[:-2] in CONDITIONS
+            if link:
+                suffix = suffix[:-2]
+            if suffix not in CONDITIONS:
+                continue
+            arity, pred = CONDITIONS[suffix]
+            if prefix == "s":
+                return self._math(opcode, pred, a[0], a[1 : 1 + arity], index)
+            getters = [self._operand(t) for t in a[:arity]]
+            fast = "s" + suffix
+
+            def test(idx, getters=getters, pred=pred, fast=fast):
+                return self._compute(pred, fast, self._values(getters, idx), idx, index)
+
+            return self._branch(test, a[arity], link=link, relative=prefix == "br")
+        if opcode == "l":
+            return self._load(a[0], self._device(a[1]), a[2])
+        if opcode == "s":
+            return self._write(self._device(a[0]), a[1], a[2])
+        if opcode == "lb":
+            return self._batch_load(a[0], a[1], None, a[2], a[3])
+        if opcode == "lbn":
+            return self._batch_load(a[0], a[1], a[2], a[3], a[4])
+        if opcode == "sb":
+            return self._batch_write(a[0], None, a[1], a[2])
+        if opcode == "sbn":
+            return self._batch_write(a[0], a[1], a[2], a[3])
+        if opcode in ("push", "pop", "peek", "poke", "get", "put", "clr"):
+            return self._memory(opcode, a)
+        raise Ic10RuntimeError(f"unsupported instruction '{opcode}'")
+
+    # ---- handler builders ----------------------------------------------------------
+
+    def _store(self, dest: str, compute: Callable[[Any, list[Any]], Any], tokens: Iterable[str]) -> Handler:
+        out = self.registers[self._register(dest)]
+        getters = [self._operand(t) for t in tokens]
+        lanes = self.lanes
+
+        def op(idx, p):
+            lanes.put(out, idx, compute(idx, self._values(getters, idx)))
+
+        return op
+
+    def _math(self, opcode: str, fn: Callable[..., Any], dest: str, tokens: Iterable[str], index: int) -> Handler:
+        return self._store(dest, lambda idx, v: self._compute(fn, opcode, v, idx, index), tokens)
+
+    def _branch(self, test: Callable[[Any], Any], token: str, *, link=False, relative=False) -> Handler:
+        target = float(self.program.labels[token]) if token in self.program.labels else self._operand(token)
+        ra = self.registers[RA_INDEX]
+        lanes = self.lanes
+
+        def op(idx, p):
+            taken = test(idx)
+            if isinstance(taken, float) and not taken:
+                return None
+            n = lanes.size(idx)
+            goal = target if isinstance(target, float) else self._compute(_to_int, "", [target(idx)], idx, p)
+            if relative:
+                goal = lanes.map(lambda g: p + g, [goal], n)
+            if link:
+                for flag, sub in lanes.split(idx, taken):
+                    if flag:
+                        lanes.put(ra, sub, float(p + 1))
+            return goal if isinstance(taken, float) else lanes.choose(taken, goal, float(p + 1), n)
+
+        return op
+
+    def _sleep(self, token: str) -> Handler:
+        getter = self._operand(token)
+        lanes = self.lanes
+
+        def wake(seconds: float) -> float:
+            return float(self.tick + max(1, math.ceil(seconds / TICK_SECONDS)))
+
+        def op(idx, p):
+            lanes.put(self.wake, idx, self._compute(wake, "", self._values([getter], idx), idx, p))
+
+        return op
+
+    def _random(self, idx) -> list[float]:
+        if self._rands is None:
+            self._rands = [random.Random(self.seed) for _ in range(self.lanes.count)]
+        return [self._rands[i].random() for i in self._per_lane(idx)]
+
+    def _field(self, device: LaneDevice, logic_type: str) -> Any:
+        if logic_type not in device.fields:
+            device.fields[logic_type] = self.lanes.full(0.0)
+        return device.fields[logic_type]
+
+    def _track(self, device: LaneDevice, logic_type: str) -> tuple[Any, Any]:
+        """(change counter, values) of a field the script writes."""
+
+        key = (id(device), logic_type)
+        if key not in self.tracked:
+            # batch writes to a per-lane prefab hash are only known at run time;
+            # their on% then counts from the first write
+            self.tracked[key] = Tracked(device, logic_type, self.lanes.full(0.0), self.lanes.full(0.0))
+        return self.tracked[key].changes, self._field(device, logic_type)
+
+    def _load(self, dest: str, device: LaneDevice, logic_type: str) -> Handler:
+        fixed = device.fixed(logic_type)
+        if fixed is not None:
+            return self._store(dest, lambda idx, v: fixed, ())
+        values = self._field(device, logic_type)
+        lanes = self.lanes
+        return self._store(dest, lambda idx, v: lanes.take(values, idx), ())
+
+    def _write(self, device: LaneDevice, logic_type: str, token: str) -> Handler:
+        if logic_type in READ_ONLY_FIELDS:
+            raise Ic10RuntimeError(f"{logic_type} is read-only")
+        changes, values = self._track(device, logic_type)
+        getter = self._operand(token)
+        lanes = self.lanes
+
+        def op(idx, p):
+            new = getter if isinstance(getter, float) else getter(idx)
+            lanes.count_changes(changes, idx, lanes.take(values, idx), new)
+            lanes.put(values, idx, new)
+
+        return op
+
+    def _matching(self, prefab_hash: float, name_hash: Optional[float]) -> list[LaneDevice]:
+        return [
+            d
+            for d in self.network
+            if d.prefab_hash == prefab_hash and (name_hash is None or d.name_hash == name_hash)
+        ]
+
+    def _batch_groups(
+        self, hash_getter: Getter, name_getter: Optional[Getter], idx
+    ) -> list[tuple[list[LaneDevice], Any]]:
+        """[(matching devices, lanes)]; the hash operands may differ per lane."""
+
+        out = []
+        for prefab_hash, sub in self.lanes.split(idx, self._values([hash_getter], idx)[0]):
+            if name_getter is None:
+                out.append((self._matching(prefab_hash, None), sub))
+                continue
+            for name_hash, named in self.lanes.split(sub, self._values([name_getter], sub)[0]):
+                out.append((self._matching(prefab_hash, name_hash), named))
+        return out
+
+    def _batch_load(self, dest: str, prefab: str, name: Optional[str], logic_type: str, mode: str) -> Handler:
+        out = self.registers[self._register(dest)]
+        hash_getter = self._operand(prefab)
+        name_getter = self._operand(name) if name is not None else None
+        mode_getter = float(BATCH_MODES[mode]) if mode in BATCH_MODES else self._operand(mode)
+        lanes = self.lanes
+
+        def aggregate(mode: float, *values: float) -> float:
+            return _aggregate(list(values), mode)
+
+        def op(idx, p):
+            for devices, sub in self._batch_groups(hash_getter, name_getter, idx):
+                columns = [
+                    d.fixed(logic_type)
+                    if d.fixed(logic_type) is not None
+                    else lanes.take(self._field(d, logic_type), sub)
+                    for d in devices
+                ]
+                mode_values = self._values([mode_getter], sub)[0]
+                lanes.put(out, sub, self._compute(aggregate, "", [mode_values, *columns], sub, p))
+
+        return op
+
+    def _batch_write(self, prefab: str, name: Optional[str], logic_type: str, token: str) -> Handler:
+        if logic_type in READ_ONLY_FIELDS:
+            raise Ic10RuntimeError(f"{logic_type} is read-only")
+        hash_getter = self._operand(prefab)
+        name_getter = self._operand(name) if name is not None else None
+        getter = self._operand(token)
+        if isinstance(hash_getter, float) and (name_getter is None or isinstance(name_getter, float)):
+            for d in self._matching(hash_getter, name_getter):
+                self._track(d, logic_type)
+        lanes = self.lanes
+
+        def op(idx, p):
+            for devices, sub in self._batch_groups(hash_getter, name_getter, idx):
+                new = getter if isinstance(getter, float) else getter(sub)
+                for d in devices:
+                    changes, values = self._track(d, logic_type)
+                    lanes.count_changes(changes, sub, lanes.take(values, sub), new)
+                    lanes.put(values, sub, new)
+
+        return op
+
+    def _memory(self, opcode: str, a: tuple[str, ...]) -> Handler:
+        """Stack and `db` memory operations, one lane at a time (rarely hot)."""
+
+        if opcode in ("get", "put", "clr"):
+            token = a[1] if opcode == "get" else a[0]
+            if self._device(token) is not self.housing:
+                raise Ic10RuntimeError(f"device '{token}' has no memory")
+        tokens = {"push": a[0:1], "poke": a[0:2], "get": a[2:3], "put": a[1:3]}.get(opcode, ())
+        getters = [self._operand(t) for t in tokens]
+        dest = self.registers[self._register(a[0])] if opcode in ("pop", "peek", "get") else None
+        sp = self.registers[SP_INDEX]
+
+        def step(i: int, stack: list[float], values: tuple[float, ...]) -> None:
+            if opcode == "clr":
+                stack[:] = [0.0] * STACK_SIZE
+            elif opcode == "push":
+                address = _to_int(sp[i])
+                if not 0 <= address < STACK_SIZE:
+                    raise Ic10RuntimeError("stack overflow")
+                stack[address] = values[0]
+                sp[i] = float(address + 1)
+            elif opcode in ("pop", "peek"):
+                address = _to_int(sp[i]) - 1
+                if not 0 <= address < STACK_SIZE:
+                    raise Ic10RuntimeError("stack underflow")
+                if opcode == "pop":
+                    sp[i] = float(address)
+                dest[i] = stack[address]
+            else:
+                address = _to_int(values[0])
+                if not 0 <= address < STACK_SIZE:
+                    kind = "stack" if opcode == "poke" else "memory"
+                    raise Ic10RuntimeError(f"{kind} address {address} out of range")
+                if opcode == "get":
+                    dest[i] = stack[address]
+                else:
+                    stack[address] = values[1]
+
+        def op(idx, p):
+            if self.stacks is None:
+                self.stacks = [[0.0] * STACK_SIZE for _ in range(self.lanes.count)]
+            columns = [itertools.repeat(v) if isinstance(v, float) else v for v in self._values(getters, idx)]
+            rows = zip(*columns) if columns else itertools.repeat(())
+            for i, values in zip(self._per_lane(idx), rows):
+                try:
+                    step(i, self.stacks[i], tuple(float(v) for v in values))
+                except Ic10RuntimeError as e:
+                    self._fail([i], f"{self.program.describe(p)}: {e}")
+
+        return op
+
+    # ---- execution -----------------------------------------------------------------
+
+    def _apply_traces(self, tick: int) -> None:
+        lanes = self.lanes
+        for d in self.network:
+            for logic_type, values in d.traces.items():
+                lanes.fill(d.fields[logic_type], values[min(tick, len(values) - 1)])
+        for values, columns, reps in self._sweep_traces:
+            lanes.fill(values, lanes.tile(columns[min(tick, len(columns) - 1)], reps))
+
+    def _leave(self, idx, pc: float, state: Optional[float] = None) -> None:
+        self.lanes.put(self.pc, idx, pc)
+        if state is not None:
+            self.lanes.put(self.state, idx, state)
+
+    def run_tick(self, tick: int) -> None:
+        """Run every ready lane until it yields, sleeps, halts, faults or spends the budget."""
+
+        lanes = self.lanes
+        lines = self.program.lines
+        self.tick = tick
+        self._apply_traces(tick)
+        ready = lanes.ready(self.state, self.wake, tick)
+        lanes.put(self.state, ready, RUNNING)
+        lanes.fill(self.executed, 0.0)
+        groups: dict[int, Any] = {int(pc): sub for pc, sub in lanes.split(ready, lanes.take(self.pc, ready))}
+
+        while groups:
+            p = min(groups)
+            idx = groups.pop(p)
+            if p >= len(lines):
+                self._leave(idx, float(p), HALTED)
+                continue
+            lanes.count_up(self.executed, idx)
+            opcode = lines[p].opcode
+            if opcode == "yield":
+                self._leave(idx, float(p + 1))
+                continue
+            if opcode == "hcf":
+                self._leave(idx, float(p), HALTED)
+                continue
+
+            handler = self._ops[p]
+            try:
+                targets = handler(idx, p) if handler is not None else None
+            except Ic10RuntimeError as e:
+                self._fail(idx, f"{self.program.describe(p)}: {e}")
+                targets = None
+            failed, self._failed = self._failed, set()
+            if opcode == "sleep":
+                self._leave(lanes.without(idx, failed) if failed else idx, float(p + 1), SLEEPING)
+                continue
+            for target, sub in lanes.split(idx, float(p + 1) if targets is None else targets):
+                if failed:
+                    sub = lanes.without(sub, failed)
+                target = int(target)
+                if target < 0 and lanes.size(sub):
+                    self._fail(sub, f"{self.program.describe(p)}: jump to line {target}")
+                    self._failed.clear()
+                    continue
+                sub, spent = lanes.below(self.executed, sub, self.budget)
+                if lanes.size(spent):
+                    self._leave(spent, float(target))
+                    lanes.count_up(self.overruns, spent)
+                if lanes.size(sub):
+                    groups[target] = lanes.join(groups[target], sub) if target in groups else sub
+
+        lanes.maximum(self.peak, self.executed)
+        for t in self.tracked.values():
+            lanes.count_nonzero(t.duty, t.device.fields[t.logic_type])
+        self.ticks += 1
+
+    def run(self, ticks: int) -> None:
+        for tick in range(ticks):
+            self.run_tick(tick)
+
+
+# ---- scenarios -----------------------------------------------------------------------
+
+
+@dataclass
+class Axis:
+    """One swept value: a `define` name or a `DEVICE.LogicType` initial field."""
+
+    name: str
+    values: list[float]
+
+    @property
+    def is_field(self) -> bool:
+        return "." in self.name
+
+
+@dataclass
+class SweepRow:
+    values: dict[str, float]
+    fields: dict[str, tuple[float, float]]  # label -> (mean changes, mean on%)
+    peak: int
+    overrun_lanes: int
+    faulted_lanes: int
+    error: str = ""
+
+
+@dataclass
+class SweepReport:
+    path: str
+    backend: str
+    ticks: int
+    traces: int
+    rows: list[SweepRow]
+    seconds: float
+
+    @property
+    def lanes(self) -> int:
+        return len(self.rows) * self.traces
+
+    @property
+    def ok(self) -> bool:
+        return not any(r.overrun_lanes or r.faulted_lanes for r in self.rows)
+
+
+def parse_values(text: str) -> list[float]:
+    """`20,22,24` or `START:STOP:STEP` (inclusive)."""
+
+    if ":" in text:
+        parts = [float(p) for p in text.split(":")]
+        if len(parts) != 3 or parts[2] <= 0 or parts[1] < parts[0]:
+            raise ValueError(f"bad range {text!r} (expected START:STOP:STEP with STEP > 0)")
+        start, stop, step = parts
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + i * step, 9) for i in range(count)]
+    values = [float(p) for p in text.split(",") if p.strip()]
+    if not values:
+        raise ValueError(f"no values in {text!r}")
+    return values
+
+
+def random_walks(start: float, sigma: float, pull: float, *, ticks: int, count: int, key: str) -> list[list[float]]:
+    """`count` mean-reverting random walks around `start`, reproducible per `key`."""
+
+    walks = []
+    for k in range(count):
+        rng = random.Random(f"{key}:{k}")
+        x = start
+        walk = []
+        for _ in range(ticks):
+            walk.append(x)
+            x += pull * (start - x) + rng.gauss(0.0, sigma)
+        walks.append(walk)
+    return walks
+
+
+def sweep(
+    program: Program,
+    axes: list[Axis],
+    traces: dict[str, list[list[float]]],
+    *,
+    ticks: int = DEFAULT_TICKS,
+    budget: int = DEFAULT_TICK_BUDGET,
+    env: Optional[dict[str, Any]] = None,
+    backend: Optional[str] = None,
+    seed: int = 0,
+) -> SweepReport:
+    """Run every combination of `axes` against every trace (`DEVICE.LogicType` -> traces)."""
+
+    counts = {len(t) for t in traces.values()}
+    if len(counts) > 1:
+        raise ValueError("every trace target needs the same number of traces")
+    reps = counts.pop() if counts else 1
+    combos = list(itertools.product(*(axis.values for axis in axes)))
+    lanes = make_lanes(len(combos) * reps, backend)
+
+    def per_lane(column: int) -> Any:
+        return lanes.vector(combo[column] for combo in combos for _ in range(reps))
+
+    started = time.perf_counter()
+    chip = LaneChip(
+        program,
+        lanes,
+        env=env,
+        defines={a.name: per_lane(i) for i, a in enumerate(axes) if not a.is_field},
+        budget=budget,
+        seed=seed,
+    )
+    for i, axis in enumerate(axes):
+        if axis.is_field:
+            ref, logic_type = axis.name.split(".", 1)
+            chip.find(ref).fields[logic_type] = per_lane(i)
+    for target, walks in traces.items():
+        ref, logic_type = target.split(".", 1)
+        length = max(len(w) for w in walks)
+        columns = [lanes.vector(w[min(t, len(w) - 1)] for w in walks) for t in range(min(length, ticks))]
+        chip.add_trace(chip.find(ref), logic_type, columns, len(combos))
+    chip.run(ticks)
+    seconds = time.perf_counter() - started
+
+    peak = lanes.tolist(chip.peak)
+    overruns = lanes.tolist(chip.overruns)
+    tracked = [(t.label, lanes.tolist(t.changes), lanes.tolist(t.duty)) for t in chip.tracked.values()]
+    rows = []
+    for r, combo in enumerate(combos):
+        block = range(r * reps, (r + 1) * reps)
+        errors = [chip.errors[i] for i in block if i in chip.errors]
+        rows.append(
+            SweepRow(
+                values={axis.name: value for axis, value in zip(axes, combo)},
+                fields={
+                    label: (
+                        sum(changes[i] for i in block) / reps,
+                        100.0 * sum(duty[i] for i in block) / (reps * ticks),
+                    )
+                    for label, changes, duty in tracked
+                },
+                peak=int(max(peak[i] for i in block)),
+                overrun_lanes=sum(1 for i in block if overruns[i]),
+                faulted_lanes=len(errors),
+                error=errors[0] if errors else "",
+            )
+        )
+    return SweepReport(str(program.path), lanes.name, ticks, reps, rows, seconds)
+
+
+# ---- reporting -------------------------------------------------------------------
+
+
+def _number(value: float) -> str:
+    return f"{value:.0f}" if value == int(value) else f"{value:g}"
+
+
+def format_report(report: SweepReport, *, sort: str = "sweep", limit: int = DEFAULT_LIMIT) -> list[str]:
+    rows = report.rows
+    if sort == "changes":
+        rows = sorted(rows, key=lambda r: sum(c for c, _ in r.fields.values()))
+    labels = sorted({label for r in rows for label, (changes, _) in r.fields.items() if changes})
+    names = list(rows[0].values) if rows else []
+    out = [
+        f"{report.path}: {len(report.rows)} scenario(s) x {report.traces} trace(s) = {report.lanes} lane(s), "
+        f"{report.ticks} tick(s) ({report.backend} backend, {report.seconds:.1f}s)"
+    ]
+    header = [f"{n:>{max(len(n), 8)}}" for n in names]
+    header += [f"{label + ' changes':>{len(label) + 8}} {'on%':>6}" for label in labels]
+    header += [f"{'max/tick':>8}", f"{'faults':>6}"]
+    out.append("  " + "  ".join(header))
+    for r in rows[:limit]:
+        cells = [f"{_number(r.values[n]):>{max(len(n), 8)}}" for n in names]
+        for label in labels:
+            changes, duty = r.fields.get(label, (0.0, 0.0))
+            cells.append(f"{changes:>{len(label) + 8}.1f} {duty:>6.1f}")
+        cells += [f"{r.peak:>8}", f"{r.faulted_lanes + r.overrun_lanes:>6}"]
+        out.append("  " + "  ".join(cells))
+    if len(rows) > limit:
+        out.append(f"  ... {len(rows) - limit} more row(s) (--limit, --json)")
+    if not labels:
+        out.append("  (the script changed no device field in any scenario)")
+    for r in report.rows:
+        if r.error:
+            out.append(f"  ERROR: {r.faulted_lanes} lane(s) with {r.values}: {r.error}")
+        if r.overrun_lanes:
+            out.append(f"  BUDGET: {r.overrun_lanes} lane(s) with {r.values} exhausted the line budget")
+    return out
+
+
+def _target(spec: str, flag: str) -> tuple[str, str]:
+    target, sep, value = spec.partition("=")
+    ref, dot, logic_type = target.partition(".")
+    if not sep or not dot or not ref or not logic_type or not value:
+        raise ValueError(f"bad {flag} {spec!r} (expected DEVICE.LogicType=...)")
+    return target, value
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sweep an IC10 script's defines over many sensor traces at once")
+    parser.add_argument("path", help="IC10 file to run")
+    parser.add_argument(
+        "--define",
+        action="append",
+        default=[],
+        metavar="NAME=VALUES",
+        help="Sweep a define (repeatable)",
+    )
+    parser.add_argument(
+        "--field",
+        action="append",
+        default=[],
+        metavar="DEVICE.LogicType=VALUES",
+        help="Sweep an initial device field (repeatable)",
+    )
+    parser.add_argument(
+        "--walk",
+        action="append",
+        default=[],
+        metavar="DEVICE.LogicType=START,SIGMA[,PULL]",
+        help="Feed a field with random-walk traces (repeatable)",
+    )
+    parser.add_argument(
+        "--trace-file",
+        action="append",
+        default=[],
+        metavar="DEVICE.LogicType=FILE",
+        help="Feed a field with traces from a JSON list of per-tick lists (repeatable)",
+    )
+    parser.add_argument(
+        "--traces",
+        type=int,
+        default=DEFAULT_TRACES,
+        help=f"Random walks per scenario (default: {DEFAULT_TRACES})",
+    )
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=DEFAULT_TICKS,
+        help=f"Game ticks per lane (default: {DEFAULT_TICKS})",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=DEFAULT_TICK_BUDGET,
+        help=f"Per-tick instruction budget (default: {DEFAULT_TICK_BUDGET})",
+    )
+    parser.add_argument("--devices", help="JSON mock device environment (see tools/ic10_sim.py)")
+    parser.add_argument("--seed", type=int, default=0, help="Random walk seed (default: 0)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Lane backend (default: numpy when installed)")
+    parser.add_argument("--sort", choices=("sweep", "changes"), default="sweep", help="Row order (default: sweep)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help=f"Rows to print (default: {DEFAULT_LIMIT})")
+    parser.add_argument("--json", action="store_true", help="Emit a JSON report instead of text")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.is_file():
+        print(f"ERROR: not found: {path}")
+        return 2
+    if args.ticks < 1 or args.budget < 1 or args.traces < 1 or args.limit < 1:
+        print("ERROR: --ticks, --budget, --traces and --limit must be >= 1")
+        return 2
+
+    try:
+        axes = []
+        for spec in args.define:
+            name, sep, values = spec.partition("=")
+            if not sep or not name or not values:
+                raise ValueError(f"bad --define {spec!r} (expected NAME=VALUES)")
+            axes.append(Axis(name, parse_values(values)))
+        for spec in args.field:
+            target, values = _target(spec, "--field")
+            axes.append(Axis(target, parse_values(values)))
+        traces: dict[str, list[list[float]]] = {}
+        for spec in args.trace_file:
+            target, file_name = _target(spec, "--trace-file")
+            data = json.loads(Path(file_name).read_text(encoding="utf-8"))
+            if data and not isinstance(data[0], list):
+                data = [data]
+            if not data or not all(isinstance(t, list) and t for t in data):
+                raise ValueError(f"{file_name}: expected a list of non-empty per-tick lists")
+            traces[target] = [[float(v) for v in t] for t in data]
+        file_counts = {len(t) for t in traces.values()}
+        walk_count = file_counts.pop() if len(file_counts) == 1 else args.traces
+        for spec in args.walk:
+            target, values = _target(spec, "--walk")
+            numbers = [float(v) for v in values.split(",")]
+            if len(numbers) not in (2, 3) or numbers[1] < 0:
+                raise ValueError(f"bad --walk {spec!r} (expected START,SIGMA[,PULL] with SIGMA >= 0)")
+            pull = numbers[2] if len(numbers) == 3 else DEFAULT_PULL
+            traces[target] = random_walks(
+                numbers[0], numbers[1], pull, ticks=args.ticks, count=walk_count, key=f"{args.seed}:{target}"
+            )
+        env: Optional[dict[str, Any]] = None
+        if args.devices:
+            env = json.loads(Path(args.devices).read_text(encoding="utf-8"))
+        program = parse_file(path)
+        report = sweep(
+            program,
+            axes,
+            traces,
+            ticks=args.ticks,
+            budget=args.budget,
+            env=env,
+            backend=args.backend,
+            seed=args.seed,
+        )
+    except (Ic10ParseError, ValueError, OSError) as e:
+        print(f"ERROR: {e}")
+        return 2
+
+    if args.json:
+        payload = {
+            "path": report.path,
+            "backend": report.backend,
+            "ticks": report.ticks,
+            "traces": report.traces,
+            "lanes": report.lanes,
+            "ok": report.ok,
+            "rows": [
+                {
+                    "values": r.values,
+                    "fields": {label: {"changes": c, "onPercent": d} for label, (c, d) in r.fields.items()},
+                    "maxPerTick": r.peak,
+                    "overrunLanes": r.overrun_lanes,
+                    "faultedLanes": r.faulted_lanes,
+                    "error": r.error,
+                }
+                for r in report.rows
+            ],
+        }
+        print(json.dumps(payload, indent=2))
+    else:
+        for text in format_report(report, sort=args.sort, limit=args.limit):
+            print(text)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,348 @@
+"""Redundant device write checker for IC10 scripts.
+
+Repo convention: "read first, write only on change" for `On`, `Open` and
+`Setting`. This tool flags `s`/`sb`/`sbn` writes to those fields that can
+repeat every loop iteration without a compare that detects a change, i.e.
+writes that hit the device (and the data network, for batch writes) every
+tick even when the value is already right.
+
+Analysis (on the control-flow graph from `tools/ic10_cfg.py`)
+- Register provenance (forward dataflow, may): which device reads and
+  which register reads each register's value derives from. `l`/`lb`/`lbn`
+  start a chain; arithmetic, `select`, `s*` compares and `move` propagate it.
+- A conditional branch is a change check for a write when its operands
+  derive from
+  - a read of the written device (`lb`/`lbn` reads cover `sb`/`sbn` writes
+    with the same prefab, and name), or of any device the script itself
+    writes (a Logic Memory cell used as a flag or mailbox), or
+  - loop-carried state: a register that the loop reassigns, but not on every
+    cycle back to where it is read (last-written shadows, latches, state
+    machines). Registers set once before the loop are constants, not state.
+  A compare against a fresh reading of some other device (pressure,
+  temperature) is a level check, not a change check.
+- A write is flagged when some cycle from it back to itself passes no
+  change check that can skip it (a compare whose branches both lead to the
+  write again does not guard it).
+
+Writes to `db` (the IC housing itself, used for status codes) are ignored.
+Cycles that only close through a device-presence branch (`bdns`/`bdse`
+back to a boot block) are not loops. Matching is by device, not field: a
+compare of `On` guards the `Open` write right after it, which is how the
+shipped scripts pair the two.
+
+Examples
+    python tools/ic10_write_check.py scripts/
+    python tools/ic10_write_check.py "modular scripts/" --field Mode
+
+Exit codes
+  0 - no unguarded writes
+  1 - one or more unguarded writes in loops
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from ic10_cfg import (
+    Cfg,
+    branch_shape,
+    build_cfg,
+    cyclic_nodes,
+    register_def,
+    strongly_connected_components,
+)
+from ic10_parse import (
+    REGISTER_COUNT,
+    Ic10ParseError,
+    Line,
+    Program,
+    device_ref,
+    iter_ic10_files,
+    parse_file,
+    register_ref,
+)
+
+
+WATCHED_FIELDS = ("On", "Open", "Setting")
+WRITE_OPCODES = {"s": 0, "sb": 0, "sbn": 0}  # opcode -> index of first device arg
+READ_OPCODES = {"l": 1, "lb": 1, "lbn": 1}
+# A device key: ("pin", "d0") or ("batch", prefab, name-or-None); provenance
+# sets also hold ("use", line, register) for register reads.
+Key = tuple
+Regs = tuple[frozenset, ...]
+
+
+@dataclass(frozen=True)
+class Violation:
+    path: Path
+    message: str
+
+
+def _token_value(program: Program, token: str) -> str:
+    """Canonical text for a hash operand (number if constant, register otherwise)."""
+
+    target = program.resolve_alias(token)
+    value = program.resolve_constant(target)
+    return repr(value) if value is not None else target
+
+
+def _device_key(program: Program, line: Line, first: int) -> Optional[Key]:
+    args = line.args
+    if line.opcode in ("s", "l"):
+        pin = device_ref(program.resolve_alias(args[first]))
+        return ("pin", pin) if pin else None
+    name = _token_value(program, args[first + 1]) if line.opcode in ("sbn", "lbn") else None
+    return ("batch", _token_value(program, args[first]), name)
+
+
+def _guards(read: Key, write: Key) -> bool:
+    if read == write:
+        return True
+    # A prefab-wide read (lb) also tells you the state of a named subset.
+    return read[0] == write[0] == "batch" and read[1] == write[1] and read[2] is None
+
+
+def _field_arg(line: Line) -> Optional[str]:
+    offset = {"s": 1, "sb": 1, "sbn": 2}[line.opcode]
+    return line.args[offset] if len(line.args) > offset else None
+
+
+def _reg(program: Program, token: str) -> Optional[int]:
+    ref = register_ref(program.resolve_alias(token))
+    return ref[1] if ref is not None and ref[0] == 0 else None
+
+
+def _uses(program: Program, line: Line, tokens: tuple[str, ...], regs: Regs) -> set:
+    out: set = set()
+    for token in tokens:
+        reg = _reg(program, token)
+        if reg is not None:
+            out |= regs[reg]
+            out.add(("use", line.index, reg))
+    return out
+
+
+def _transfer(program: Program, line: Line, regs: Regs) -> Regs:
+    dest = register_def(program, line)
+    if dest is None:
+        return regs
+    opcode = line.opcode
+
+    if opcode in READ_OPCODES and len(line.args) >= 3:
+        key = _device_key(program, line, READ_OPCODES[opcode])
+        value: frozenset = frozenset({key}) if key is not None else frozenset()
+    else:
+        value = frozenset(_uses(program, line, line.args[1:], regs))
+    out = list(regs)
+    out[dest] = value
+    return tuple(out)
+
+
+def _branch_sources(program: Program, line: Line, regs: Regs) -> frozenset:
+    shape = branch_shape(line.opcode or "")
+    if shape is None:
+        return frozenset()
+    return frozenset(_uses(program, line, line.args[: shape[0]], regs))
+
+
+def _provenance(cfg: Cfg) -> list[Optional[Regs]]:
+    """Register provenance at each line entry (None when unreachable)."""
+
+    program = cfg.program
+    regs_in: list[Optional[Regs]] = [None] * len(cfg)
+    if not regs_in:
+        return regs_in
+    regs_in[0] = tuple(frozenset() for _ in range(REGISTER_COUNT))
+    work = [0]
+    while work:
+        node = work.pop()
+        regs_out = _transfer(program, program.lines[node], regs_in[node])
+        for t in cfg.succ[node]:
+            old = regs_in[t]
+            new = regs_out if old is None else tuple(a | b for a, b in zip(old, regs_out))
+            if new != old:
+                regs_in[t] = new
+                work.append(t)
+    return regs_in
+
+
+def _steady_succ(cfg: Cfg) -> list[list[int]]:
+    """CFG without device-presence branch edges (`bdns dish boot` re-entry)."""
+
+    out: list[list[int]] = []
+    for node, targets in enumerate(cfg.succ):
+        opcode = cfg.program.lines[node].opcode or ""
+        if branch_shape(opcode) is not None and opcode.removesuffix("al").endswith(("dns", "dse")):
+            fall = cfg.flows[node].fall
+            out.append([fall] if fall is not None else [])
+        else:
+            out.append(targets)
+    return out
+
+
+def _carried(program: Program, succ: list[list[int]], scc: dict[int, int], use: int, reg: int) -> bool:
+    """True when `reg` is state: reassigned in the loop around `use`, but not on every cycle."""
+
+    if not any(
+        scc[line.index] == scc[use] and register_def(program, line) == reg for line in program.lines
+    ):
+        return False
+    seen: set[int] = set()
+    stack = list(succ[use])
+    while stack:
+        node = stack.pop()
+        if node == use:
+            return True
+        if node in seen or register_def(program, program.lines[node]) == reg:
+            continue
+        seen.add(node)
+        stack.extend(succ[node])
+    return False
+
+
+def analyze(program: Program, fields: tuple[str, ...] = WATCHED_FIELDS) -> list[tuple[int, str]]:
+    """Return (line index, message) for each write that can repeat unchecked."""
+
+    cfg = build_cfg(program)
+    regs_in = _provenance(cfg)
+    succ = _steady_succ(cfg)
+    in_loop = cyclic_nodes(succ)
+    scc = {node: ci for ci, comp in enumerate(strongly_connected_components(succ)) for node in comp}
+    written = {
+        _device_key(program, line, WRITE_OPCODES[line.opcode])
+        for line in program.lines
+        if line.opcode in WRITE_OPCODES and len(line.args) >= 3
+    }
+    carried: dict[tuple[int, int], bool] = {}
+
+    def is_change_check(source: tuple, key: Key) -> bool:
+        if source[0] != "use":
+            return source in written or _guards(source, key)
+        if source[1:] not in carried:
+            carried[source[1:]] = _carried(program, succ, scc, source[1], source[2])
+        return carried[source[1:]]
+
+    def skips(branch: int, write: int) -> bool:
+        """Some outcome of `branch` gets back to it (or leaves the loop) without `write`."""
+
+        for first in succ[branch]:
+            seen: set[int] = set()
+            stack = [first]
+            hit_write = False
+            while stack:
+                node = stack.pop()
+                if node == branch:
+                    return True
+                if node == write:
+                    hit_write = True
+                    continue
+                if node in seen:
+                    continue
+                seen.add(node)
+                stack.extend(succ[node])
+            if not hit_write:
+                return True
+        return False
+
+    def checked_every_cycle(start: int, key: Key) -> bool:
+        seen: set[int] = set()
+        stack = list(succ[start])
+        while stack:
+            node = stack.pop()
+            if node == start:
+                return False
+            if node in seen:
+                continue
+            seen.add(node)
+            regs = regs_in[node]
+            sources = _branch_sources(program, program.lines[node], regs) if regs is not None else ()
+            if any(is_change_check(source, key) for source in sources) and skips(node, start):
+                continue
+            stack.extend(succ[node])
+        return True
+
+    out: list[tuple[int, str]] = []
+    for line in program.lines:
+        if line.opcode not in WRITE_OPCODES or len(line.args) < 3:
+            continue
+        field = _field_arg(line)
+        if field not in fields or line.index not in in_loop or regs_in[line.index] is None:
+            continue
+        key = _device_key(program, line, WRITE_OPCODES[line.opcode])
+        if key is None or key == ("pin", "db") or checked_every_cycle(line.index, key):
+            continue
+        target = " ".join(line.args[:-2]) if line.opcode != "s" else line.args[0]
+        out.append(
+            (
+                line.index,
+                f"`{line.opcode} {target} {field}` can repeat every loop without a change check "
+                "(read first, write only on change)",
+            )
+        )
+    return out
+
+
+def check_file(path: Path, fields: tuple[str, ...] = WATCHED_FIELDS) -> list[Violation]:
+    try:
+        program = parse_file(path)
+    except UnicodeDecodeError:
+        return [Violation(path=path, message="not valid UTF-8 text")]
+    except OSError as e:
+        return [Violation(path=path, message=f"read error: {e}")]
+    except Ic10ParseError as e:
+        return [Violation(path=path, message=f"parse error: {e}")]
+
+    return [
+        Violation(path=path, message=f"{program.describe(index)}: {message}")
+        for index, message in analyze(program, fields)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Flag IC10 device writes in loops that skip a read/compare")
+    parser.add_argument("path", help="File or directory to check")
+    parser.add_argument(
+        "--ext",
+        action="append",
+        default=[],
+        help="File extension(s) to include when checking a directory (repeatable). Example: --ext .ic10",
+    )
+    parser.add_argument(
+        "--field",
+        action="append",
+        default=[],
+        help=f"Extra logic type(s) to watch besides {', '.join(WATCHED_FIELDS)} (repeatable)",
+    )
+
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Path not found: {path}")
+        return 2
+
+    exts = args.ext
+    if path.is_dir() and not exts:
+        exts = [".ic10", ".ic"]
+    fields = WATCHED_FIELDS + tuple(f for f in args.field if f not in WATCHED_FIELDS)
+
+    all_violations: list[Violation] = []
+    for f in iter_ic10_files(path, exts):
+        all_violations.extend(check_file(f, fields))
+
+    if not all_violations:
+        print("OK")
+        return 0
+
+    for v in all_violations:
+        print(f"{v.path}: {v.message}")
+
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,496 @@
+"""Discrete-event throughput simulator for producers working a restock queue.
+
+Models one or more producers (Autolathes by default) building a restock
+queue from the recipe catalog's `time` and `energy`, under a shared power
+budget and a shared ingot supply, and compares queue ordering policies:
+- `fifo`     - queue order (hash order, as `AutolatheVendStock`'s stock
+               worker scans its table)
+- `sjf`      - shortest job (crafts x recipe time) first
+- `deficit`  - largest stack deficit (missing items / stack size) first
+- `ingots`   - the job whose next craft the ingot stock covers best first
+               (ties: shortest job)
+
+Model
+- A job is one item's deficit: target stock (`--stacks` x stack size) minus
+  its current stock. Current stock is drawn per item from `[0, --fill)` of
+  the target with `--seed`, so every policy sees the same queue.
+- A free producer takes the next job by policy, waits `--request-latency`
+  seconds (the stock worker notices a missing item while scanning its
+  vending machine one slot per tick; 100 slots at 0.5 s is 50 s worst case),
+  then builds the job one craft at a time.
+- A craft takes the recipe's ingots when it starts and draws
+  `energy / time` watts until it ends. It waits while the ingots are short
+  (the supply refills at `--ingot-rate` per minute per ingot type) or while
+  starting it would exceed `--power` (until another craft ends; a craft
+  that alone exceeds the budget still runs by itself).
+- Events (job picked, craft ends, ingots arrive) are processed in time order;
+  nothing is stepped per tick, so long queues simulate in milliseconds.
+
+Reported per policy: makespan, items per hour, producer idle time (not
+crafting, split into request latency, waiting on ingots and waiting on
+power), peak power and the mean time until a job is restocked. Jobs that can
+never finish (an ingot with no stock and no refill) are reported as stalled.
+
+Examples
+    python tools/production_sim.py --stock "modular scripts/AutolatheVendStock"
+    python tools/production_sim.py --stock "modular scripts/AutolatheVendStock" --machines 2 --power 3000
+    python tools/production_sim.py Iron_Frames=60 Kit_(Door)=10 --policy sjf --policy ingots --ingot-stock 50
+    python tools/production_sim.py --all --json
+
+Exit codes
+  0 - every job finished under every policy
+  1 - some jobs stalled (or a target is not a recipe item)
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import math
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from ic10_parse import Ic10ParseError
+from recipe_bom import Recipe, load_recipes, stock_targets
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+POLICIES = ("fifo", "sjf", "deficit", "ingots")
+DEFAULT_REQUEST_LATENCY = 50.0  # seconds; stock worker scan of 100 vending slots at one per tick
+DEFAULT_POWER = 2000.0  # watts shared by every producer
+DEFAULT_INGOT_STOCK = 200.0  # per ingot type; the logistics worker tops reagents up to 200
+DEFAULT_INGOT_RATE = 60.0  # per minute per ingot type
+EPSILON = 1e-9
+
+
+@dataclass
+class Job:
+    order: int  # position in the queue (fifo)
+    recipe: Recipe
+    crafts: int
+    deficit: float  # missing stacks
+
+    @property
+    def work(self) -> float:
+        return self.crafts * self.recipe.time
+
+    @property
+    def power(self) -> float:
+        return self.recipe.energy / self.recipe.time if self.recipe.time > 0 else 0.0
+
+
+class IngotSupply:
+    """Ingot stock that refills linearly over time (evaluated lazily at event times)."""
+
+    def __init__(self, stock: dict[str, float], default_stock: float, rate_per_s: float) -> None:
+        self._stock = dict(stock)
+        self._default = default_stock
+        self.rate = rate_per_s
+        self._at: dict[str, float] = {}  # title -> time `_stock[title]` was last brought up to date
+
+    def available(self, title: str, now: float) -> float:
+        amount = self._stock.get(title, self._default)
+        return amount + self.rate * (now - self._at.get(title, 0.0))
+
+    def wait(self, inputs: tuple[tuple[str, float], ...], now: float) -> Optional[float]:
+        """Seconds until every input is available (0: now; None: never)."""
+
+        longest = 0.0
+        for title, quantity in inputs:
+            short = quantity - self.available(title, now)
+            if short > EPSILON:
+                if self.rate <= 0:
+                    return None
+                longest = max(longest, short / self.rate)
+        return longest
+
+    def coverage(self, inputs: tuple[tuple[str, float], ...], now: float) -> float:
+        """How many crafts the current stock covers (the scarcest input decides)."""
+
+        return min((self.available(t, now) / q for t, q in inputs if q > 0), default=math.inf)
+
+    def take(self, inputs: tuple[tuple[str, float], ...], now: float) -> None:
+        for title, quantity in inputs:
+            self._stock[title] = self.available(title, now) - quantity
+            self._at[title] = now
+
+
+@dataclass
+class Producer:
+    index: int
+    job: Optional[Job] = None
+    done: int = 0  # crafts of `job` finished
+    crafting: float = 0.0  # seconds spent crafting
+    latency: float = 0.0
+    ingot_wait: float = 0.0
+    power_wait: float = 0.0
+    waiting_since: Optional[float] = None  # waiting on power since
+
+
+@dataclass
+class PolicyResult:
+    policy: str
+    makespan: float
+    crafts: int
+    items_per_hour: float
+    idle: float  # producer-seconds not crafting
+    latency: float
+    ingot_wait: float
+    power_wait: float
+    peak_power: float
+    mean_restock: float  # mean seconds from start until a job finishes
+    stalled: list[str] = field(default_factory=list)
+
+
+PolicyKey = Callable[[Job, IngotSupply, float], tuple]
+
+POLICY_KEYS: dict[str, PolicyKey] = {
+    "fifo": lambda job, supply, now: (job.order,),
+    "sjf": lambda job, supply, now: (job.work, job.order),
+    "deficit": lambda job, supply, now: (-job.deficit, job.order),
+    "ingots": lambda job, supply, now: (-min(supply.coverage(job.recipe.inputs, now), job.crafts), job.work, job.order),
+}
+
+
+class Simulation:
+    def __init__(
+        self,
+        jobs: list[Job],
+        policy: str,
+        *,
+        machines: int,
+        power: float,
+        supply: IngotSupply,
+        request_latency: float,
+    ) -> None:
+        self.queue = list(jobs)
+        self.policy = policy
+        self.key = POLICY_KEYS[policy]
+        self.producers = [Producer(i) for i in range(machines)]
+        self.power_budget = power
+        self.supply = supply
+        self.request_latency = request_latency
+        self.now = 0.0
+        self.draw = 0.0
+        self.peak = 0.0
+        self.crafts = 0
+        self.finished: list[float] = []
+        self.stalled: list[str] = []
+        self._events: list[tuple[float, int, str, int]] = []
+        self._seq = 0
+
+    def _schedule(self, at: float, kind: str, producer: Producer) -> None:
+        self._seq += 1
+        heapq.heappush(self._events, (at, self._seq, kind, producer.index))
+
+    def _next_job(self, producer: Producer) -> None:
+        while self.queue:
+            job = min(self.queue, key=lambda j: self.key(j, self.supply, self.now))
+            self.queue.remove(job)
+            if job.crafts <= 0:
+                continue
+            producer.job, producer.done = job, 0
+            producer.latency += self.request_latency
+            self._schedule(self.now + self.request_latency, "start", producer)
+            return
+        producer.job = None
+
+    def _try_craft(self, producer: Producer) -> None:
+        job = producer.job
+        assert job is not None
+        if producer.waiting_since is not None:
+            producer.power_wait += self.now - producer.waiting_since
+            producer.waiting_since = None
+        wait = self.supply.wait(job.recipe.inputs, self.now)
+        if wait is None:
+            self.stalled.append(job.recipe.title)
+            self._next_job(producer)
+            return
+        if wait > 0:
+            producer.ingot_wait += wait
+            self._schedule(self.now + wait, "start", producer)
+            return
+        if self.draw > 0 and self.draw + job.power > self.power_budget + EPSILON:
+            producer.waiting_since = self.now
+            return  # retried whenever a craft ends; alone, any craft may start
+        self.supply.take(job.recipe.inputs, self.now)
+        self.draw += job.power
+        self.peak = max(self.peak, self.draw)
+        producer.crafting += job.recipe.time
+        self._schedule(self.now + job.recipe.time, "end", producer)
+
+    def _end_craft(self, producer: Producer) -> None:
+        job = producer.job
+        assert job is not None
+        self.draw -= job.power
+        self.crafts += 1
+        producer.done += 1
+        if producer.done < job.crafts:
+            self._try_craft(producer)
+        else:
+            self.finished.append(self.now)
+            self._next_job(producer)
+        for other in self.producers:  # power freed up
+            if other.waiting_since is not None:
+                self._try_craft(other)
+
+    def run(self) -> PolicyResult:
+        for producer in self.producers:
+            self._next_job(producer)
+        while self._events:
+            self.now, _, kind, index = heapq.heappop(self._events)
+            producer = self.producers[index]
+            if kind == "start":
+                self._try_craft(producer)
+            else:
+                self._end_craft(producer)
+
+        makespan = self.now
+        crafting = sum(p.crafting for p in self.producers)
+        return PolicyResult(
+            policy=self.policy,
+            makespan=makespan,
+            crafts=self.crafts,
+            items_per_hour=self.crafts * 3600 / makespan if makespan > 0 else 0.0,
+            idle=makespan * len(self.producers) - crafting,
+            latency=sum(p.latency for p in self.producers),
+            ingot_wait=sum(p.ingot_wait for p in self.producers),
+            power_wait=sum(p.power_wait for p in self.producers),
+            peak_power=self.peak,
+            mean_restock=sum(self.finished) / len(self.finished) if self.finished else 0.0,
+            stalled=sorted(self.stalled),
+        )
+
+
+def build_jobs(targets: list[tuple[Recipe, float]], fill: float, seed: int) -> list[Job]:
+    """Jobs for (recipe, target stock) pairs, each with a random current stock below `fill` of the target."""
+
+    rng = random.Random(seed)
+    jobs: list[Job] = []
+    for order, (recipe, target) in enumerate(targets):
+        current = math.floor(target * rng.uniform(0.0, fill)) if fill > 0 else 0
+        missing = max(0, math.ceil(target) - current)
+        jobs.append(Job(order, recipe, missing, missing / recipe.stack_size))
+    return jobs
+
+
+def simulate(
+    jobs: list[Job],
+    policy: str,
+    *,
+    machines: int = 1,
+    power: float = DEFAULT_POWER,
+    ingot_stock: Optional[dict[str, float]] = None,
+    default_ingot_stock: float = DEFAULT_INGOT_STOCK,
+    ingot_rate: float = DEFAULT_INGOT_RATE,
+    request_latency: float = DEFAULT_REQUEST_LATENCY,
+) -> PolicyResult:
+    supply = IngotSupply(ingot_stock or {}, default_ingot_stock, ingot_rate / 60.0)
+    return Simulation(
+        jobs,
+        policy,
+        machines=machines,
+        power=power,
+        supply=supply,
+        request_latency=request_latency,
+    ).run()
+
+
+def _hours(seconds: float) -> str:
+    return f"{seconds / 3600:.2f} h"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare restock queue policies for producers under a power budget")
+    parser.add_argument("targets", nargs="*", help="ITEM=COUNT items to build (wiki title, item name or item hash)")
+    parser.add_argument("--stock", help="Restock every recipe item whose hash appears in the IC10 scripts here")
+    parser.add_argument("--all", action="store_true", help="Restock every recipe item of --producer")
+    parser.add_argument(
+        "--producer",
+        default="Autolathe",
+        help="Producer wiki title for --stock/--all (default: Autolathe)",
+    )
+    parser.add_argument("--stacks", type=float, default=1, help="Target stacks per --stock/--all item (default: 1)")
+    parser.add_argument(
+        "--fill",
+        type=float,
+        default=0.8,
+        help="Current stock is random in [0, FILL) of the target (default: 0.8)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for current stock (default: 1)")
+    parser.add_argument("--machines", type=int, default=1, help="Producers working the queue (default: 1)")
+    parser.add_argument(
+        "--power",
+        type=float,
+        default=DEFAULT_POWER,
+        help=f"Power budget in W (default: {DEFAULT_POWER:g})",
+    )
+    parser.add_argument(
+        "--ingot-stock",
+        type=float,
+        default=DEFAULT_INGOT_STOCK,
+        help=f"Starting stock per ingot type (default: {DEFAULT_INGOT_STOCK:g})",
+    )
+    parser.add_argument(
+        "--ingot",
+        action="append",
+        default=[],
+        metavar="TITLE=N",
+        help="Starting stock for one ingot type, e.g. Ingot_(Invar)=0 (repeatable)",
+    )
+    parser.add_argument(
+        "--ingot-rate",
+        type=float,
+        default=DEFAULT_INGOT_RATE,
+        help=f"Refill per ingot type per minute (default: {DEFAULT_INGOT_RATE:g})",
+    )
+    parser.add_argument(
+        "--request-latency",
+        type=float,
+        default=DEFAULT_REQUEST_LATENCY,
+        help=f"Seconds between a producer freeing up and its next job starting (default: {DEFAULT_REQUEST_LATENCY:g})",
+    )
+    parser.add_argument(
+        "--policy",
+        action="append",
+        default=[],
+        choices=POLICIES,
+        help="Policies to compare (default: all)",
+    )
+    parser.add_argument("--catalog-dir", default="catalog", help="Catalog root directory (default: catalog)")
+    parser.add_argument("--json", action="store_true", help="Emit a JSON report instead of text")
+    args = parser.parse_args()
+
+    if not args.targets and not args.stock and not args.all:
+        parser.print_usage()
+        return 2
+    if args.machines < 1 or args.power <= 0 or args.ingot_rate < 0 or args.request_latency < 0:
+        print("ERROR: --machines and --power must be positive; --ingot-rate and --request-latency not negative")
+        return 2
+    if not 0 <= args.fill <= 1:
+        print("ERROR: --fill must be between 0 and 1")
+        return 2
+    ingot_stock: dict[str, float] = {}
+    for spec in args.ingot:
+        title, _, amount = spec.partition("=")
+        try:
+            ingot_stock[title.strip()] = float(amount)
+        except ValueError:
+            print(f"ERROR: bad --ingot {spec!r} (expected TITLE=N)")
+            return 2
+
+    catalog_dir = (ROOT / args.catalog_dir).resolve()
+    try:
+        book = load_recipes(catalog_dir)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: cannot load recipes: {e}")
+        return 2
+    if not book.recipes:
+        print(f"ERROR: no recipes found under {catalog_dir / 'recipes'} (check --catalog-dir)")
+        return 2
+
+    targets: list[tuple[Recipe, float]] = []
+    unknown: list[str] = []
+    for target in args.targets:
+        key, _, count = target.partition("=")
+        recipe = book.lookup(key)
+        try:
+            quantity = float(count) if count else 1.0
+        except ValueError:
+            print(f"ERROR: bad count in {target!r}")
+            return 2
+        if recipe is None:
+            unknown.append(key)
+        else:
+            targets.append((recipe, quantity))
+    if args.stock:
+        stock_path = ROOT / args.stock
+        if not stock_path.exists():
+            print(f"ERROR: not found: {args.stock}")
+            return 2
+        try:
+            found = stock_targets(book, stock_path)
+        except (OSError, Ic10ParseError) as e:
+            print(f"ERROR: {e}")
+            return 2
+        found = sorted((r for r in found if r.producer == args.producer), key=lambda r: r.item_hash or 0)
+        targets.extend((r, args.stacks * r.stack_size) for r in found)
+    if args.all:
+        targets.extend((r, args.stacks * r.stack_size) for r in book.recipes.values() if r.producer == args.producer)
+    for key in unknown:
+        print(f"ERROR: no recipe makes {key}")
+    if unknown:
+        return 1
+    if not targets:
+        print(f"ERROR: no {args.producer} recipe items to restock")
+        return 2
+
+    # Explicit ITEM=COUNT targets are exact deficits; only --stock/--all targets get a random current stock.
+    explicit = len(args.targets)
+    jobs = build_jobs(targets[:explicit], 0.0, args.seed) + build_jobs(targets[explicit:], args.fill, args.seed)
+    for order, job in enumerate(jobs):
+        job.order = order
+
+    policies = args.policy or list(POLICIES)
+    start = time.perf_counter()
+    results = [
+        simulate(
+            jobs,
+            policy,
+            machines=args.machines,
+            power=args.power,
+            ingot_stock=ingot_stock,
+            default_ingot_stock=args.ingot_stock,
+            ingot_rate=args.ingot_rate,
+            request_latency=args.request_latency,
+        )
+        for policy in policies
+    ]
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stalled = any(r.stalled for r in results)
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "jobs": [
+                        {"item": j.recipe.title, "crafts": j.crafts, "deficitStacks": round(j.deficit, 3)} for j in jobs
+                    ],
+                    "results": [asdict(r) for r in results],
+                },
+                indent=2,
+            )
+        )
+        return 1 if stalled else 0
+
+    crafts = sum(j.crafts for j in jobs)
+    print(
+        f"{len(jobs)} job(s), {crafts} craft(s); {args.machines} producer(s), power budget {args.power:g} W; "
+        f"ingots {args.ingot_stock:g} each + {args.ingot_rate:g}/min; request latency {args.request_latency:g} s"
+    )
+    print(
+        f"{'policy':<8} {'makespan':>9} {'items/h':>8} {'idle':>8} {'latency':>8} {'ingots':>8} "
+        f"{'power':>8} {'peak W':>8} {'restock':>9}"
+    )
+    for r in results:
+        print(
+            f"{r.policy:<8} {_hours(r.makespan):>9} {r.items_per_hour:>8.1f} {_hours(r.idle):>8} "
+            f"{_hours(r.latency):>8} {_hours(r.ingot_wait):>8} {_hours(r.power_wait):>8} "
+            f"{r.peak_power:>8.0f} {_hours(r.mean_restock):>9}"
+        )
+    for r in results:
+        if r.stalled:
+            print(f"FAILED: {r.policy}: {len(r.stalled)} job(s) stalled: {', '.join(r.stalled)}")
+    best = max(results, key=lambda r: (not r.stalled, r.items_per_hour))
+    print(f"best throughput: {best.policy}; simulated in {elapsed_ms:.1f} ms")
+    return 1 if stalled else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
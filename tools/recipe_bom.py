@@ -0,0 +1,279 @@
+"""Bill of materials from the recipe catalog.
+
+Expands target items into the raw materials, build `time` and `energy`
+needed to make them, using every `catalog/recipes/<Producer>/recipes.json`.
+An input that another recipe produces is expanded through that recipe
+(recursively); anything no recipe produces (ingots, ...) is a raw material.
+
+Model
+- One craft makes one item (the catalog does not record output counts).
+- `time` and `energy` add up over every craft, intermediate items included,
+  as if one machine built everything in sequence.
+- When several producers make the same item, the first producer by name is
+  used.
+- Per-item costs are memoized, so a target list of any size expands each
+  distinct item once.
+
+Targets are given as `ITEM` or `ITEM=COUNT`, where ITEM is a wiki title,
+item name or item hash. `--stock DIR` targets every recipe item whose hash
+appears in the IC10 scripts under DIR (for example the products a stock
+worker keeps in a vending machine), `--all` every recipe item; both are
+counted in stacks (`--stacks`, using each recipe's `stackSize`).
+
+Examples
+    python tools/recipe_bom.py Iron_Frames=10 ItemCableCoilHeavy
+    python tools/recipe_bom.py --stock "modular scripts/AutolatheVendStock" --stacks 2
+    python tools/recipe_bom.py --all
+
+Exit codes
+  0 - bill of materials printed
+  1 - a target is not a recipe item (or the recipes form a cycle)
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from ic10_parse import Ic10ParseError, iter_ic10_files, parse_file
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CATALOG_DIR = ROOT / "catalog"
+
+
+@dataclass(frozen=True)
+class Recipe:
+    producer: str
+    title: str  # wiki title of the item made
+    item_name: Optional[str]
+    item_hash: Optional[int]
+    time: float
+    energy: float
+    stack_size: int
+    inputs: tuple[tuple[str, float], ...]  # (wiki title, quantity per craft)
+
+
+@dataclass
+class Cost:
+    raw: dict[str, float] = field(default_factory=dict)  # raw material -> quantity
+    time: float = 0.0
+    energy: float = 0.0
+    crafts: float = 0.0
+
+    def add(self, other: "Cost", factor: float = 1.0) -> None:
+        for title, quantity in other.raw.items():
+            self.raw[title] = self.raw.get(title, 0.0) + quantity * factor
+        self.time += other.time * factor
+        self.energy += other.energy * factor
+        self.crafts += other.crafts * factor
+
+
+class RecipeCycleError(ValueError):
+    pass
+
+
+class RecipeBook:
+    """Recipes by item, with memoized per-unit costs."""
+
+    def __init__(self, recipes: Iterable[Recipe]) -> None:
+        self.recipes: dict[str, Recipe] = {}
+        self.by_hash: dict[int, Recipe] = {}
+        self.by_name: dict[str, Recipe] = {}
+        for recipe in sorted(recipes, key=lambda r: r.producer):
+            self.recipes.setdefault(recipe.title, recipe)
+            if recipe.item_hash is not None:
+                self.by_hash.setdefault(recipe.item_hash, recipe)
+            if recipe.item_name is not None:
+                self.by_name.setdefault(recipe.item_name, recipe)
+        self._unit_costs: dict[str, Cost] = {}
+        self._expanding: set[str] = set()
+
+    def lookup(self, key: Union[int, str]) -> Optional[Recipe]:
+        """Find a recipe by item hash (int or numeric text), item name or wiki title."""
+
+        if isinstance(key, int):
+            return self.by_hash.get(key)
+        text = key.strip()
+        try:
+            return self.by_hash.get(int(text))
+        except ValueError:
+            pass
+        return self.by_name.get(text) or self.recipes.get(text)
+
+    def unit_cost(self, title: str) -> Cost:
+        """Cost of one `title`: raw materials plus every craft needed to make it."""
+
+        cached = self._unit_costs.get(title)
+        if cached is not None:
+            return cached
+        recipe = self.recipes.get(title)
+        if recipe is None:
+            cost = Cost(raw={title: 1.0})
+        else:
+            if title in self._expanding:
+                raise RecipeCycleError(f"recipe cycle through {title}")
+            self._expanding.add(title)
+            try:
+                cost = Cost(time=recipe.time, energy=recipe.energy, crafts=1)
+                for input_title, quantity in recipe.inputs:
+                    cost.add(self.unit_cost(input_title), quantity)
+            finally:
+                self._expanding.discard(title)
+        self._unit_costs[title] = cost
+        return cost
+
+    def resolve(self, targets: Iterable[tuple[Recipe, float]]) -> Cost:
+        total = Cost()
+        for recipe, count in targets:
+            total.add(self.unit_cost(recipe.title), count)
+        return total
+
+
+def _recipe(producer: str, data: dict) -> Optional[Recipe]:
+    item = data.get("item") if isinstance(data.get("item"), dict) else {}
+    title = item.get("wikiTitle")
+    if not isinstance(title, str):
+        return None
+    item_hash = item.get("itemHash")
+    inputs = [
+        (i["wikiTitle"], float(i["quantity"]))
+        for i in data.get("inputs") or []
+        if isinstance(i, dict) and isinstance(i.get("wikiTitle"), str) and isinstance(i.get("quantity"), (int, float))
+    ]
+    stack_size = data.get("stackSize")
+    return Recipe(
+        producer=producer,
+        title=title,
+        item_name=item.get("itemName") if isinstance(item.get("itemName"), str) else None,
+        item_hash=item_hash if isinstance(item_hash, int) and not isinstance(item_hash, bool) else None,
+        time=float(data.get("time") or 0),
+        energy=float(data.get("energy") or 0),
+        stack_size=stack_size if isinstance(stack_size, int) and stack_size > 0 else 1,
+        inputs=tuple(inputs),
+    )
+
+
+def load_recipes(catalog_dir: Path = CATALOG_DIR) -> RecipeBook:
+    recipes: list[Recipe] = []
+    for path in sorted((catalog_dir / "recipes").glob("*/recipes.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        producer = (data.get("producer") or {}).get("wikiTitle") or path.parent.name
+        for entry in data.get("recipes") or []:
+            recipe = _recipe(producer, entry) if isinstance(entry, dict) else None
+            if recipe is not None:
+                recipes.append(recipe)
+    return RecipeBook(recipes)
+
+
+def stock_targets(book: RecipeBook, path: Path) -> list[Recipe]:
+    """Recipe items whose hash appears as a constant in the IC10 scripts under `path`."""
+
+    found: dict[str, Recipe] = {}
+    for script in iter_ic10_files(path, [".ic10"]):
+        program = parse_file(script)
+        for line in program.lines:
+            for arg in line.args:
+                value = program.resolve_constant(arg)
+                if value is None or not value.is_integer():
+                    continue
+                recipe = book.by_hash.get(int(value))
+                if recipe is not None:
+                    found.setdefault(recipe.title, recipe)
+    return list(found.values())
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.0f}" if value == int(value) else f"{value:.2f}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Expand recipe items into raw materials, time and energy")
+    parser.add_argument("targets", nargs="*", help="ITEM or ITEM=COUNT (wiki title, item name or item hash)")
+    parser.add_argument("--stock", help="Target every recipe item whose hash appears in the IC10 scripts here")
+    parser.add_argument("--all", action="store_true", help="Target every recipe item")
+    parser.add_argument("--stacks", type=float, default=1, help="Stacks of each --stock/--all item (default: 1)")
+    parser.add_argument(
+        "--catalog-dir",
+        default="catalog",
+        help="Catalog root directory (default: catalog)",
+    )
+    args = parser.parse_args()
+    if not args.targets and not args.stock and not args.all:
+        parser.print_usage()
+        return 2
+
+    start = time.perf_counter()
+    catalog_dir = (ROOT / args.catalog_dir).resolve()
+    try:
+        book = load_recipes(catalog_dir)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: cannot load recipes: {e}")
+        return 2
+    if not book.recipes:
+        print(f"ERROR: no recipes found under {catalog_dir / 'recipes'} (check --catalog-dir)")
+        return 2
+    load_ms = (time.perf_counter() - start) * 1000
+
+    targets: list[tuple[Recipe, float]] = []
+    unknown: list[str] = []
+    for target in args.targets:
+        key, _, count = target.partition("=")
+        recipe = book.lookup(key)
+        try:
+            quantity = float(count) if count else 1.0
+        except ValueError:
+            print(f"ERROR: bad count in {target!r}")
+            return 2
+        if recipe is None:
+            unknown.append(key)
+        else:
+            targets.append((recipe, quantity))
+    if args.stock:
+        stock_path = ROOT / args.stock
+        if not stock_path.exists():
+            print(f"ERROR: not found: {args.stock}")
+            return 2
+        try:
+            targets.extend((r, args.stacks * r.stack_size) for r in stock_targets(book, stock_path))
+        except (OSError, Ic10ParseError) as e:
+            print(f"ERROR: {e}")
+            return 2
+    if args.all:
+        targets.extend((r, args.stacks * r.stack_size) for r in book.recipes.values())
+    for key in unknown:
+        print(f"ERROR: no recipe makes {key}")
+    if unknown:
+        return 1
+
+    start = time.perf_counter()
+    try:
+        lines = [(recipe, count, book.unit_cost(recipe.title)) for recipe, count in targets]
+        total = book.resolve(targets)
+    except RecipeCycleError as e:
+        print(f"ERROR: {e}")
+        return 1
+    resolve_ms = (time.perf_counter() - start) * 1000
+
+    width = max([len(r.title) for r, _, _ in lines] + [len(t) for t in total.raw] + [4])
+    print(f"{'item':<{width}} {'count':>8} {'time':>10} {'energy':>12}")
+    for recipe, count, unit in lines:
+        print(f"{recipe.title:<{width}} {_fmt(count):>8} {_fmt(unit.time * count):>10} {_fmt(unit.energy * count):>12}")
+    print("raw materials:")
+    for title, quantity in sorted(total.raw.items()):
+        print(f"  {title:<{width - 2}} {_fmt(quantity):>8}")
+    print(
+        f"total: {len(lines)} target(s), {_fmt(total.crafts)} craft(s), "
+        f"time {_fmt(total.time)}, energy {_fmt(total.energy)}"
+    )
+    print(f"resolved in {resolve_ms:.2f} ms (recipes loaded in {load_ms:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
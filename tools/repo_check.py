@@ -0,0 +1,97 @@
+"""Run every repo check from a single walk of the tree.
+
+Walks the repo once (`tools/repo_files.py`), reads each file at most once,
+and feeds the same in-memory content to:
+- `size`    - IC10 size limits (`tools/ic10_size_check.py`, default limits)
+- `docs`    - path references in docs (`tools/doc_path_check.py`)
+- `setup`   - modular Setup.md contracts (`tools/setup_contract_check.py`)
+- `catalog` - catalog index and JSON schema (`tools/catalog_check.py`)
+
+Each check prints what it prints when run on its own, then a summary shows
+the time spent walking the tree, the time and result of each check, and how
+many files were read.
+
+Examples
+    python tools/repo_check.py
+    python tools/repo_check.py --only docs --only setup
+
+Exit codes
+  0 - all selected checks passed
+  1 - one or more checks found problems
+  2 - usage / input error (or a check could not run)
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable
+
+import catalog_check
+import doc_path_check
+import ic10_size_check
+import setup_contract_check
+from repo_files import RepoFiles
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CheckFn = Callable[[RepoFiles], tuple[int, list[str]]]
+
+
+def _size(files: RepoFiles) -> tuple[int, list[str]]:
+    violations = ic10_size_check.check_tree(files.root, files)
+    if not violations:
+        return 0, ["OK"]
+    return 1, [f"{v.path.relative_to(files.root)}: {v.message}" for v in violations]
+
+
+CHECKS: dict[str, CheckFn] = {
+    "size": _size,
+    "docs": lambda files: doc_path_check.check(files.root, files),
+    "setup": lambda files: setup_contract_check.check(files.root / "modular scripts", files),
+    "catalog": lambda files: catalog_check.check(files.root / "catalog", files),
+}
+STATUS = {0: "OK", 1: "FAILED", 2: "ERROR"}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run all repo checks from one walk of the tree")
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        choices=sorted(CHECKS),
+        help="Run only this check (repeatable; default: all)",
+    )
+    args = parser.parse_args()
+
+    selected = [name for name in CHECKS if not args.only or name in args.only]
+
+    start = time.perf_counter()
+    files = RepoFiles(ROOT)
+    walk_ms = (time.perf_counter() - start) * 1000
+
+    results: list[tuple[str, int, float]] = []
+    for name in selected:
+        print(f"== {name} ==")
+        start = time.perf_counter()
+        status, out = CHECKS[name](files)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for line in out:
+            print(line)
+        results.append((name, status, elapsed_ms))
+
+    print("== summary ==")
+    print(f"  {'walk':<8} {'':<6} {walk_ms:8.1f} ms  ({len(files.files)} files)")
+    for name, status, elapsed_ms in results:
+        print(f"  {name:<8} {STATUS.get(status, status):<6} {elapsed_ms:8.1f} ms")
+    total_ms = walk_ms + sum(ms for _, _, ms in results)
+    print(f"  {'total':<8} {'':<6} {total_ms:8.1f} ms  ({files.reads} files read once each)")
+
+    return max((status for _, status, _ in results), default=0)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+"""File access shared by the repo checkers.
+
+`DiskFiles` reads straight from the filesystem (what each checker uses when
+run on its own). `RepoFiles` walks the repo once and reads each file at most
+once, so `tools/repo_check.py` can feed the same in-memory content to every
+check. Both expose the same small interface: `exists`, `is_file`, `is_dir`,
+`list_dir`, `glob` and `walk` (files only, sorted), `read_bytes` and
+`read_text`.
+
+Paths outside the snapshot (outside the root, or under a pruned directory
+such as `.git`) fall back to the filesystem, so results never differ from
+`DiskFiles`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+
+PRUNED_DIRS = frozenset({".git", "build", "__pycache__", ".venv", "venv", ".mypy_cache", ".pytest_cache"})
+
+
+def _normalize_text(raw: bytes) -> str:
+    # Same as Path.read_text(): UTF-8 with universal newlines.
+    return raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _glob_regex(pattern: str) -> re.Pattern[str]:
+    """pathlib-style glob (`*`, `?`, `**` for any depth) as a regex over posix paths."""
+
+    out = []
+    parts = pattern.split("/")
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == "**":
+            out.append(".*" if last else "(?:[^/]+/)*")
+            continue
+        piece = "".join("[^/]*" if ch == "*" else "[^/]" if ch == "?" else re.escape(ch) for ch in part)
+        out.append(piece if last else piece + "/")
+    return re.compile("".join(out) + r"\Z")
+
+
+class DiskFiles:
+    """Direct filesystem access."""
+
+    def exists(self, path: Path) -> bool:
+        return path.exists()
+
+    def is_file(self, path: Path) -> bool:
+        return path.is_file()
+
+    def is_dir(self, path: Path) -> bool:
+        return path.is_dir()
+
+    def list_dir(self, path: Path) -> list[Path]:
+        return sorted(path.iterdir())
+
+    def glob(self, base: Path, pattern: str) -> list[Path]:
+        return sorted(p for p in base.glob(pattern) if p.is_file())
+
+    def walk(self, base: Path) -> list[Path]:
+        """Every file under `base`."""
+
+        out: list[Path] = []
+        for dirpath, _, filenames in os.walk(base):
+            out.extend(Path(dirpath) / name for name in filenames)
+        return sorted(out)
+
+    def read_bytes(self, path: Path) -> bytes:
+        return path.read_bytes()
+
+    def read_text(self, path: Path) -> str:
+        return _normalize_text(self.read_bytes(path))
+
+
+class RepoFiles(DiskFiles):
+    """One walk of a directory tree; file contents are read once and kept."""
+
+    def __init__(self, root: Path, pruned: frozenset[str] = PRUNED_DIRS) -> None:
+        self.root = Path(os.path.abspath(root))
+        self.files: list[str] = []  # posix paths relative to root, sorted
+        self.dirs: set[str] = {""}
+        self._file_set: set[str] = set()
+        self._pruned = pruned
+        self._content: dict[str, bytes] = {}
+        self.reads = 0
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in pruned]
+            rel_dir = Path(dirpath).relative_to(self.root).as_posix()
+            rel_dir = "" if rel_dir == "." else rel_dir
+            for d in dirnames:
+                self.dirs.add(f"{rel_dir}/{d}" if rel_dir else d)
+            for name in filenames:
+                self.files.append(f"{rel_dir}/{name}" if rel_dir else name)
+        self.files.sort(key=lambda rel: rel.split("/"))
+        self._file_set = set(self.files)
+
+    def _rel(self, path: Path) -> Optional[str]:
+        """Snapshot key for a path, or None when the snapshot cannot answer."""
+
+        try:
+            rel = Path(os.path.abspath(path)).relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+        rel = "" if rel == "." else rel
+        if any(part in self._pruned for part in rel.split("/")):
+            return None
+        return rel
+
+    def exists(self, path: Path) -> bool:
+        return self.is_file(path) or self.is_dir(path)
+
+    def is_file(self, path: Path) -> bool:
+        rel = self._rel(path)
+        if rel is None or (rel not in self._file_set and rel not in self.dirs):
+            # Unknown to the snapshot (pruned, outside root, or a symlink spelling).
+            return super().is_file(path)
+        return rel in self._file_set
+
+    def is_dir(self, path: Path) -> bool:
+        rel = self._rel(path)
+        if rel is None or (rel not in self._file_set and rel not in self.dirs):
+            return super().is_dir(path)
+        return rel in self.dirs
+
+    def _under(self, rel: str) -> list[str]:
+        prefix = f"{rel}/" if rel else ""
+        return [f for f in self.files if f.startswith(prefix)]
+
+    def list_dir(self, path: Path) -> list[Path]:
+        rel = self._rel(path)
+        if rel is None or rel not in self.dirs:
+            return super().list_dir(path)
+        prefix = f"{rel}/" if rel else ""
+        names = {f[len(prefix) :].split("/", 1)[0] for f in self.files if f.startswith(prefix)}
+        names |= {d[len(prefix) :].split("/", 1)[0] for d in self.dirs if d.startswith(prefix) and d != rel}
+        return sorted(path / name for name in names)
+
+    def glob(self, base: Path, pattern: str) -> list[Path]:
+        rel = self._rel(base)
+        if rel is None or rel not in self.dirs:
+            return super().glob(base, pattern)
+        regex = _glob_regex(pattern)
+        prefix = f"{rel}/" if rel else ""
+        hits = [f for f in self._under(rel) if regex.match(f[len(prefix) :])]
+        return sorted(base / f[len(prefix) :] for f in hits)
+
+    def walk(self, base: Path) -> list[Path]:
+        rel = self._rel(base)
+        if rel is None or rel not in self.dirs:
+            return super().walk(base)
+        prefix = f"{rel}/" if rel else ""
+        return sorted(base / f[len(prefix) :] for f in self._under(rel))
+
+    def read_bytes(self, path: Path) -> bytes:
+        rel = self._rel(path)
+        if rel is None or rel not in self._file_set:
+            return super().read_bytes(path)
+        if rel not in self._content:
+            self._content[rel] = super().read_bytes(path)
+            self.reads += 1
+        return self._content[rel]
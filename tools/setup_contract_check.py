@@ -19,6 +19,9 @@ from __future__ import annotations
 import argparse
 import re
 from pathlib import Path
+from typing import Optional
+
+from repo_files import DiskFiles
 
 ROOT = Path(__file__).resolve().parents[1]
 
@@ -29,40 +32,38 @@ SECTION_NAME = "## Name contract"
 SECTION_STEPS = "## Setup steps"
 
 
-def _read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8")
-
-
-def _feature_dirs(modular_root: Path) -> list[Path]:
+def _feature_dirs(modular_root: Path, files: DiskFiles) -> list[Path]:
     out: list[Path] = []
-    for p in sorted(modular_root.iterdir()):
-        if not p.is_dir():
+    for p in files.list_dir(modular_root):
+        if not files.is_dir(p):
             continue
         if p.name.startswith("_"):
             continue
-        if (p / "Setup.md").exists():
+        if files.exists(p / "Setup.md"):
             out.append(p)
     return out
 
 
-def _is_deprecated_ic10(script_path: Path) -> bool:
+def _is_deprecated_ic10(script_path: Path, files: DiskFiles) -> bool:
     try:
-        head = "\n".join(_read_text(script_path).splitlines()[:5]).lower()
+        head = "\n".join(files.read_text(script_path).splitlines()[:5]).lower()
     except OSError:
         return False
     return "deprecated placeholder" in head
 
 
-def _collect_feature_requirements(feature_dir: Path) -> tuple[set[str], set[str], list[str]]:
+def _collect_feature_requirements(
+    feature_dir: Path, files: DiskFiles
+) -> tuple[set[str], set[str], list[str]]:
     hash_names: set[str] = set()
     channels: set[str] = set()
     script_files: list[str] = []
 
-    for script in sorted(feature_dir.glob("*.ic10")):
-        if _is_deprecated_ic10(script):
+    for script in files.glob(feature_dir, "*.ic10"):
+        if _is_deprecated_ic10(script, files):
             continue
         script_files.append(script.name)
-        text = _read_text(script)
+        text = files.read_text(script)
         hash_names.update(HASH_RE.findall(text))
         channels.update(CHANNEL_RE.findall(text))
 
@@ -73,27 +74,28 @@ def _as_code_span(token: str) -> str:
     return f"`{token}`"
 
 
-def run(modular_dir: Path) -> int:
-    if not modular_dir.exists() or not modular_dir.is_dir():
-        print(f"ERROR: modular scripts dir not found: {modular_dir}")
-        return 2
+def check(modular_dir: Path, files: Optional[DiskFiles] = None) -> tuple[int, list[str]]:
+    """Run the check; return (exit code, output lines)."""
+
+    files = files or DiskFiles()
+    if not files.is_dir(modular_dir):
+        return 2, [f"ERROR: modular scripts dir not found: {modular_dir}"]
 
     errors: list[str] = []
-    features = _feature_dirs(modular_dir)
+    features = _feature_dirs(modular_dir, files)
     if not features:
-        print(f"ERROR: no feature folders with Setup.md found under {modular_dir}")
-        return 2
+        return 2, [f"ERROR: no feature folders with Setup.md found under {modular_dir}"]
 
     for feature in features:
         setup = feature / "Setup.md"
-        setup_text = _read_text(setup)
+        setup_text = files.read_text(setup)
 
         if SECTION_NAME not in setup_text:
             errors.append(f"{setup}: missing section '{SECTION_NAME}'")
         if SECTION_STEPS not in setup_text:
             errors.append(f"{setup}: missing section '{SECTION_STEPS}'")
 
-        hash_names, channels, script_files = _collect_feature_requirements(feature)
+        hash_names, channels, script_files = _collect_feature_requirements(feature, files)
         housing_names = sorted(set(HOUSING_RE.findall(setup_text)))
 
         if not housing_names:
@@ -126,15 +128,19 @@ def run(modular_dir: Path) -> int:
                     f"{setup}: missing script path/name reference '{filename}'"
                 )
 
-    for e in errors:
-        print(f"ERROR: {e}")
-
+    out = [f"ERROR: {e}" for e in errors]
     if errors:
-        print(f"FAILED: setup contract check found {len(errors)} issue(s)")
-        return 1
+        out.append(f"FAILED: setup contract check found {len(errors)} issue(s)")
+        return 1, out
+
+    return 0, [f"OK: setup contract check passed ({len(features)} feature(s))"]
 
-    print(f"OK: setup contract check passed ({len(features)} feature(s))")
-    return 0
+
+def run(modular_dir: Path) -> int:
+    status, out = check(modular_dir)
+    for line in out:
+        print(line)
+    return status
 
 
 def main() -> int:
@@ -0,0 +1,602 @@
+"""Wiki fixture corpus and local stand-in server for the importers.
+
+A corpus is a folder of pages keyed by the request path the importers use
+(`/Pipe_Analyzer`, `/index.php?title=Pipe_Analyzer&action=raw`, ...) plus a
+`manifest.json`. `serve` answers those paths over HTTP (with
+`ETag`/`Last-Modified` and `304 Not Modified`), so `tools/wiki_import.py` and
+`tools/wiki_recipe_import.py` can run against it with `--base-url` and never
+touch stationeers-wiki.com. It also answers batched `api.php` revision
+and page-info queries (`--source api` and `tools/wiki_refresh.py`, see
+`tools/wiki_source.py`) from the same pages: a title's wikitext is its
+`action=raw` page, or the source in its `action=edit` page, and its revision
+id is derived from that text and the rendered page.
+
+Commands
+- `render`: build a corpus from the committed catalog. Device pages carry the
+  catalog's Data Parameters/Data Outputs tables and identity rows in
+  MediaWiki-shaped HTML (padded to a realistic page size); recipe pages carry
+  the recipe table as raw wikitext. Deterministic, so timings are repeatable.
+- `record`: turn a wiki HTTP cache (`tools/wiki_http.py`, filled by a real
+  import run) into a corpus of the pages exactly as the wiki served them.
+- `serve`: serve a corpus on localhost.
+- `bench`: serve a corpus in-process, import every device and recipe page it
+  covers, and report fetch+parse time (cold), conditional re-fetch time
+  (all 304s) and parse-only time (offline from cache), with the number of
+  requests each pass made. Nothing is written to `catalog/`; imported
+  devices are compared with the catalog instead.
+
+Examples
+    python tools/wiki_fixtures.py render
+    python tools/wiki_fixtures.py bench --jobs 8 --latency-ms 40
+    python tools/wiki_fixtures.py bench --source api --latency-ms 40
+    python tools/wiki_fixtures.py serve --port 8000
+    python tools/wiki_import.py --cache-dir build/wiki_record --from-catalog
+    python tools/wiki_fixtures.py record build/wiki_record --out build/wiki_recorded
+
+Exit codes
+  0 - done (bench: every page imported)
+  1 - bench: one or more imports failed
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+import wiki_http
+import wiki_source
+from wiki_import import DeviceCatalogEntry, _parse_wiki_url, _with_query, import_batch
+from wiki_recipe_import import _build_page_url, fetch_wikitext, parse_recipes
+from wiki_source import build_action_url, extract_textarea
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CATALOG_DIR = ROOT / "catalog"
+DEFAULT_CORPUS = ROOT / "build" / "wiki_fixtures"
+MANIFEST = "manifest.json"
+CORPUS_VERSION = 1
+DEFAULT_PAGE_KB = 96  # rendered device pages are padded to about this size
+
+
+def _key(url: str) -> str:
+    """Corpus key for a URL: path plus query, as the server sees it."""
+
+    parsed = urlparse(url)
+    return parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+
+def _file_name(key: str, taken: set[str]) -> str:
+    base = re.sub(r"[^A-Za-z0-9_().-]+", "_", key.strip("/")) or "index"
+    name = f"{base}.html"
+    n = 2
+    while name in taken:
+        name = f"{base}.{n}.html"
+        n += 1
+    taken.add(name)
+    return name
+
+
+def write_corpus(
+    out_dir: Path,
+    pages: dict[str, bytes],
+    *,
+    origin: str,
+    devices: list[str],
+    recipes: list[str],
+) -> None:
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+    taken: set[str] = set()
+    files: dict[str, str] = {}
+    for key in sorted(pages):
+        files[key] = _file_name(key, taken)
+        (out_dir / files[key]).write_bytes(pages[key])
+    manifest = {
+        "version": CORPUS_VERSION,
+        "origin": origin,
+        "devices": devices,
+        "recipes": recipes,
+        "pages": files,
+    }
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+
+def load_corpus(corpus_dir: Path) -> tuple[dict[str, Any], dict[str, bytes]]:
+    manifest = json.loads((corpus_dir / MANIFEST).read_text(encoding="utf-8"))
+    if manifest.get("version") != CORPUS_VERSION:
+        raise ValueError(f"{corpus_dir / MANIFEST}: unsupported corpus version {manifest.get('version')!r}")
+    pages = {key: (corpus_dir / name).read_bytes() for key, name in manifest["pages"].items()}
+    return manifest, pages
+
+
+# --- render -----------------------------------------------------------------
+
+
+def _filler(title: str, size: int) -> str:
+    """Deterministic navigation/body text standing in for MediaWiki page chrome."""
+
+    parts: list[str] = []
+    n = 0
+    total = 0
+    while total < size:
+        chunk = (
+            f'<li id="n-{n}" class="mw-list-item"><a href="/Category:{n % 37}" title="{title} {n}">'
+            f"<span>Related page {n} for {escape(title)}</span></a></li>\n"
+        )
+        parts.append(chunk)
+        total += len(chunk)
+        n += 1
+    return '<div id="mw-navigation"><ul>\n' + "".join(parts) + "</ul></div>\n"
+
+
+def _type_cell(t: str) -> str:
+    return t[:1].upper() + t[1:]
+
+
+def _io_tables(device: dict[str, Any], suffix: str) -> str:
+    io = device.get("io") or {}
+    rows = [
+        f"<tr><td>{escape(f['name'])}</td><td>{_type_cell(f['type'])}</td><td>Write</td>"
+        f"<td>{escape(f['description'])}</td></tr>"
+        for f in io.get("parameters") or []
+    ]
+    out_rows = [
+        f"<tr><td>{escape(f['name'])}</td><td>{_type_cell(f['type'])}</td><td>{escape(f['description'])}</td></tr>"
+        for f in io.get("outputs") or []
+    ]
+    return (
+        f'<h3><span class="mw-headline" id="Data_Parameters{suffix}">Data Parameters</span></h3>\n'
+        '<table class="wikitable">\n'
+        "<tr><th>Parameter Name</th><th>Data Type</th><th>Access</th><th>Description</th></tr>\n"
+        + "\n".join(rows)
+        + "\n</table>\n"
+        f'<h3><span class="mw-headline" id="Data_Outputs{suffix}">Data Outputs</span></h3>\n'
+        '<table class="wikitable">\n'
+        "<tr><th>Output Name</th><th>Data Type</th><th>Description</th></tr>\n"
+        + "\n".join(out_rows)
+        + "\n</table>\n"
+    )
+
+
+def _identity_rows(device: dict[str, Any], label: str) -> str:
+    identity = device.get("identity") or {}
+    rows = []
+    if identity.get("itemHash") is not None:
+        rows.append(f"<tr><th>{label} Hash</th><td>{identity['itemHash']}</td></tr>")
+    if identity.get("itemName") is not None:
+        rows.append(f"<tr><th>{label} Name</th><td>{escape(identity['itemName'])}</td></tr>")
+    return f'<table class="infobox">{"".join(rows)}</table>\n' if rows else ""
+
+
+def _render_device_page(page: str, main: Optional[dict], sections: list[tuple[str, dict]], page_kb: int) -> str:
+    # The importer reads Item Name/Hash page-wide for whole-page imports and
+    # Prefab Name/Hash next to the section anchor for `Page#Section` imports.
+    body = [f'<h1 id="firstHeading">{escape(page.replace("_", " "))}</h1>\n']
+    n = 1
+    if main is not None:
+        body.append(_identity_rows(main, "Item"))
+        body.append(_io_tables(main, ""))
+        n += 1
+    for fragment, device in sections:
+        body.append(f'<h2><span class="mw-headline" id="{escape(fragment)}">{escape(fragment)}</span></h2>\n')
+        body.append(_identity_rows(device, "Prefab"))
+        body.append(_io_tables(device, "" if n == 1 else f"_{n}"))
+        n += 1
+    chrome = _filler(page, page_kb * 1024)
+    return (
+        "<!DOCTYPE html>\n<html><head>"
+        f"<title>{escape(page)} - Stationeers Community Wiki</title></head>\n<body>\n"
+        f'{chrome}<div id="bodyContent">\n{"".join(body)}</div>\n</body></html>\n'
+    )
+
+
+def _render_itembox(page: str, recipe: Optional[dict[str, Any]] = None) -> str:
+    lines = ["{{Itembox", f"| name = {page.replace('_', ' ')}"]
+    if recipe is not None:  # item pages carry what the rendered infobox shows
+        item = recipe["item"]
+        if item.get("itemName") is not None:
+            lines.append(f"| item_name = {item['itemName']}")
+        if item.get("itemHash") is not None:
+            lines.append(f"| item_hash = {item['itemHash']}")
+        lines.append(f"| stacks = {recipe.get('stackSize', 1)}")
+    return "\n".join(lines) + "\n}}\n"
+
+
+def _quantity(value: Any) -> str:
+    return str(value).replace(".", ",")  # the wiki writes decimal commas
+
+
+def _render_recipe_wikitext(catalog: dict[str, Any]) -> str:
+    lines = ['{| class="wikitable sortable"', "! '''Item''' !! '''Tier''' !! '''Details'''"]
+    for recipe in catalog.get("recipes") or []:
+        item = recipe["item"]
+        tokens = [
+            f"[[File:{m['wikiTitle']}.png|32px|link={m['wikiTitle']}]]"
+            f'<div class="stationeers-icon-text">{_quantity(m["quantity"])}</div>'
+            for m in recipe["inputs"]
+        ]
+        for kind, key in (("Time", "time"), ("Energy", "energy")):
+            tokens.append(
+                f"[[File:{kind}.png|32px|link={kind}]]"
+                f'<div class="stationeers-icon-text">{_quantity(recipe[key])}</div>'
+            )
+        lines.append("|-")
+        lines.append(
+            f"| '''[[{item['wikiTitle']}|{item['displayName']}]]''' || '''{recipe['tier']}''' || " + " ".join(tokens)
+        )
+    lines.append("|}")
+    return "\n".join(lines) + "\n"
+
+
+def _render_item_page(recipe: dict[str, Any]) -> str:
+    item = recipe["item"]
+    rows = []
+    if item.get("itemName") is not None:
+        rows.append(f"<tr><th>Item Name</th><td>{escape(item['itemName'])}</td></tr>")
+    if item.get("itemHash") is not None:
+        rows.append(f"<tr><th>Item Hash</th><td>{item['itemHash']}</td></tr>")
+    if recipe.get("stackSize", 1) > 1:
+        rows.append(f"<tr><th>Stacks</th><td>{recipe['stackSize']}x</td></tr>")
+    return (
+        "<!DOCTYPE html>\n<html><head>"
+        f"<title>{escape(item['displayName'])} - Stationeers Community Wiki</title></head>\n<body>\n"
+        f'<table class="infobox">{"".join(rows)}</table>\n</body></html>\n'
+    )
+
+
+def render_corpus(catalog_dir: Path, page_kb: int = DEFAULT_PAGE_KB) -> tuple[dict[str, bytes], list[str], list[str]]:
+    """Pages rendered from the catalog: (pages by key, device URLs, recipe URLs)."""
+
+    by_page: dict[str, dict[str, Any]] = {}
+    device_urls: list[str] = []
+    for path in sorted((catalog_dir / "devices").glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        source = data.get("source") or {}
+        url = source.get("wikiUrl")
+        if source.get("kind", "wiki_import") != "wiki_import" or not url:
+            continue  # best-guess entries have no wiki page to stand in for
+        _, fetch_url, fragment = _parse_wiki_url(url)
+        page = by_page.setdefault(fetch_url, {"main": None, "sections": []})
+        if fragment:
+            page["sections"].append((fragment, data))
+        else:
+            page["main"] = data
+        device_urls.append(url)
+
+    pages: dict[str, bytes] = {}
+    for fetch_url, page in by_page.items():
+        title = _key(fetch_url).lstrip("/")
+        html = _render_device_page(title, page["main"], page["sections"], page_kb)
+        pages[_key(fetch_url)] = html.encode("utf-8")
+        pages[_key(build_action_url(title, "raw"))] = _render_itembox(title).encode("utf-8")
+
+    recipe_urls: list[str] = []
+    for path in sorted((catalog_dir / "recipes").glob("*/recipes.json")):
+        catalog = json.loads(path.read_text(encoding="utf-8"))
+        page_title = catalog["source"]["wikiTitle"]
+        recipe_urls.append(catalog["source"]["wikiUrl"])
+        pages[_key(build_action_url(page_title, "raw"))] = _render_recipe_wikitext(catalog).encode("utf-8")
+        for recipe in catalog.get("recipes") or []:
+            item_title = recipe["item"]["wikiTitle"]
+            pages[_key(_build_page_url(item_title))] = _render_item_page(recipe).encode("utf-8")
+            pages[_key(build_action_url(item_title, "raw"))] = _render_itembox(item_title, recipe).encode("utf-8")
+    return pages, device_urls, recipe_urls
+
+
+# --- record -----------------------------------------------------------------
+
+
+def record_corpus(cache_dir: Path) -> dict[str, bytes]:
+    """Pages from a wiki_http cache, keyed by request path (wiki URLs only)."""
+
+    pages: dict[str, bytes] = {}
+    for meta_path in sorted(cache_dir.glob("*.json")):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = meta_path.with_suffix(".body").read_bytes()
+        except (OSError, ValueError):
+            continue
+        url = meta.get("url") if isinstance(meta, dict) else None
+        if isinstance(url, str) and url.startswith(wiki_http.WIKI_ORIGIN + "/"):
+            pages[_key(url)] = body
+    return pages
+
+
+# --- serve ------------------------------------------------------------------
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], pages: dict[str, bytes], latency: float = 0.0) -> None:
+        super().__init__(address, _Handler)
+        self.pages = {key: (body, _etag(body)) for key, body in pages.items()}
+        self.latency = latency
+        self.last_modified = formatdate(0, usegmt=True)
+        self.counts = {200: 0, 304: 0, 404: 0}
+        self.bytes_sent = 0
+        self.quiet = True
+        self._lock = threading.Lock()
+
+    def count(self, status: int, size: int) -> None:
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+            self.bytes_sent += size
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def wikitext(self, title: str) -> Optional[str]:
+        """A title's source: its raw page, else the textarea of its edit page."""
+
+        title = title.replace(" ", "_")
+        raw = self.pages.get(_key(build_action_url(title, "raw")))
+        if raw is not None:
+            return raw[0].decode("utf-8", errors="replace")
+        for url in (_with_query(_build_page_url(title), query="action=edit"), build_action_url(title, "edit")):
+            edit = self.pages.get(_key(url))
+            if edit is not None:
+                return extract_textarea(edit[0].decode("utf-8", errors="replace"))
+        return None
+
+    def revision_id(self, title: str) -> Optional[int]:
+        """Stand-in revision id: changes whenever the title's rendered page or source does."""
+
+        rendered = self.pages.get(_key(_build_page_url(title.replace(" ", "_"))))
+        text = self.wikitext(title)
+        if rendered is None and text is None:
+            return None
+        digest = hashlib.sha1((rendered[0] if rendered else b"") + (text or "").encode("utf-8"))
+        return int(digest.hexdigest()[:7], 16)
+
+    def api_response(self, path: str) -> Optional[bytes]:
+        """Answer an `api.php` revisions/info query like MediaWiki (formatversion=2); None if unsupported."""
+
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        prop = (query.get("prop") or [""])[0]
+        if parsed.path != "/api.php" or query.get("action") != ["query"] or prop not in ("revisions", "info"):
+            return None
+        normalized: list[dict[str, Any]] = []
+        pages: list[dict[str, Any]] = []
+        for requested in (query.get("titles") or [""])[0].split("|"):
+            title = requested.replace("_", " ")
+            if title != requested:
+                normalized.append({"fromencoded": False, "from": requested, "to": title})
+            revid = self.revision_id(title)
+            text = self.wikitext(title)
+            if revid is None or prop == "revisions" and text is None:
+                pages.append({"ns": 0, "title": title, "missing": True})
+            elif prop == "info":
+                pages.append({"ns": 0, "title": title, "contentmodel": "wikitext", "lastrevid": revid})
+            else:
+                main = {"contentmodel": "wikitext", "contentformat": "text/x-wiki", "content": text}
+                pages.append({"ns": 0, "title": title, "revisions": [{"revid": revid, "slots": {"main": main}}]})
+        result: dict[str, Any] = {"batchcomplete": True, "query": {"pages": pages}}
+        if normalized:
+            result["query"]["normalized"] = normalized
+        return json.dumps(result).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FixtureServer
+    protocol_version = "HTTP/1.0"
+
+    def do_GET(self) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        entry = self.server.pages.get(self.path)
+        if entry is None:
+            api_body = self.server.api_response(self.path)
+            entry = (api_body, _etag(api_body)) if api_body is not None else None
+        if entry is None:
+            self.server.count(404, 0)
+            self.send_error(404)
+            return
+        body, etag = entry
+        if self.headers.get("If-None-Match") == etag:
+            self.server.count(304, 0)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.server.count(200, len(body))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.server.last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def start_server(
+    pages: dict[str, bytes],
+    *,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.0,
+) -> FixtureServer:
+    """Serve `pages` from a background thread; call `.shutdown()` when done."""
+
+    server = FixtureServer((host, port), pages, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- bench ------------------------------------------------------------------
+
+
+def _same_as_catalog(device: DeviceCatalogEntry, expected: dict[str, Any]) -> bool:
+    return device.identity == expected.get("identity") and all(
+        device.io[key] == (expected.get("io") or {}).get(key, []) for key in ("parameters", "outputs")
+    )
+
+
+def _bench(args: argparse.Namespace) -> int:
+    corpus_dir = Path(args.corpus)
+    if not (corpus_dir / MANIFEST).exists():
+        if corpus_dir.resolve() != DEFAULT_CORPUS.resolve():
+            print(f"ERROR: corpus not found: {corpus_dir}")
+            return 2
+        pages, devices, recipes = render_corpus(CATALOG_DIR)
+        write_corpus(corpus_dir, pages, origin="rendered", devices=devices, recipes=recipes)
+    manifest, pages = load_corpus(corpus_dir)
+    device_urls: list[str] = manifest.get("devices") or []
+    recipe_urls: list[str] = manifest.get("recipes") or []
+
+    expected: dict[str, dict[str, Any]] = {}
+    for path in sorted((CATALOG_DIR / "devices").glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        url = (data.get("source") or {}).get("wikiUrl")
+        if isinstance(url, str) and (data.get("source") or {}).get("kind", "wiki_import") == "wiki_import":
+            expected[url] = data
+
+    server = start_server(pages, latency=args.latency_ms / 1000)
+    cache_dir = Path(tempfile.mkdtemp(prefix="wiki_bench_"))
+    status = 0
+    print(
+        f"corpus: {corpus_dir} ({manifest.get('origin')}, {len(pages)} pages, "
+        f"{sum(len(b) for b in pages.values()) // 1024} KiB); "
+        f"{len(device_urls)} device(s), {len(recipe_urls)} recipe page(s); "
+        f"jobs {args.jobs}, latency {args.latency_ms} ms, source {args.source}"
+    )
+    try:
+        for label, offline in (("cold", False), ("revalidate", False), ("offline", True)):
+            wiki_http.configure(cache_dir=cache_dir, offline=offline, base_url=server.base_url)
+            wiki_source.configure(args.source)
+            before = dict(server.counts)
+            start = time.perf_counter()
+            devices, failures = import_batch(device_urls, args.jobs)
+            recipe_count = 0
+            for url in recipe_urls:
+                try:
+                    recipe_count += len(parse_recipes(fetch_wikitext(_key(url).lstrip("/")), jobs=args.jobs))
+                except Exception as e:
+                    failures.append((url, f"{type(e).__name__}: {e}"))
+            elapsed = (time.perf_counter() - start) * 1000
+            served = {code: server.counts.get(code, 0) - before.get(code, 0) for code in (200, 304, 404)}
+            print(
+                f"  {label:<11} {elapsed:9.1f} ms  {len(devices)} device(s), {recipe_count} recipe(s)  "
+                f"http 200={served[200]} 304={served[304]} 404={served[404]}"
+            )
+            for url, error in failures:
+                print(f"    ERROR: {url}: {error}")
+                status = 1
+            if label == "cold":
+                by_url = {d.source["wikiUrl"]: d for d in devices}
+                same = [
+                    url
+                    for url in device_urls
+                    if url in expected and url in by_url and _same_as_catalog(by_url[url], expected[url])
+                ]
+                print(f"  round-trip: {len(same)}/{len(device_urls)} device(s) match the catalog")
+                if args.verbose:
+                    for url in device_urls:
+                        if url not in same:
+                            print(f"    differs: {url}")
+    finally:
+        server.shutdown()
+        wiki_http.configure()
+        wiki_source.configure()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Wiki fixture corpus and local stand-in server")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_render = sub.add_parser("render", help="Build a corpus from the catalog")
+    p_render.add_argument("--out", default=str(DEFAULT_CORPUS), help="Corpus folder (default: build/wiki_fixtures)")
+    p_render.add_argument("--page-kb", type=int, default=DEFAULT_PAGE_KB, help="Approximate device page size")
+
+    p_record = sub.add_parser("record", help="Build a corpus from a wiki HTTP cache")
+    p_record.add_argument("cache_dir", help="Cache folder filled by the importers (--cache-dir)")
+    p_record.add_argument("--out", default=str(DEFAULT_CORPUS), help="Corpus folder (default: build/wiki_fixtures)")
+
+    p_serve = sub.add_parser("serve", help="Serve a corpus over HTTP")
+    p_serve.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="Corpus folder (default: build/wiki_fixtures)")
+    p_serve.add_argument("--port", type=int, default=8000)
+    p_serve.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+
+    p_bench = sub.add_parser("bench", help="Time the importers against a corpus")
+    p_bench.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="Corpus folder (rendered first if missing)")
+    p_bench.add_argument("--jobs", type=int, default=8, help="Concurrent device imports (default: 8)")
+    p_bench.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    p_bench.add_argument("--verbose", action="store_true", help="List devices that do not round-trip")
+    wiki_source.add_arguments(p_bench)
+
+    args = parser.parse_args()
+
+    if args.command == "render":
+        pages, devices, recipes = render_corpus(CATALOG_DIR, args.page_kb)
+        write_corpus(Path(args.out), pages, origin="rendered", devices=devices, recipes=recipes)
+        print(f"Wrote {len(pages)} page(s) to {args.out}")
+        return 0
+
+    if args.command == "record":
+        cache_dir = Path(args.cache_dir)
+        if not cache_dir.is_dir():
+            print(f"ERROR: cache dir not found: {cache_dir}")
+            return 2
+        pages = record_corpus(cache_dir)
+        if not pages:
+            print(f"ERROR: no wiki pages in {cache_dir}")
+            return 2
+        _, devices, recipes = render_corpus(CATALOG_DIR, page_kb=0)
+        keys = set(pages)
+        devices = [u for u in devices if _key(_parse_wiki_url(u)[1]) in keys]
+        recipes = [u for u in recipes if _key(build_action_url(_key(u).lstrip("/"), "raw")) in keys]
+        write_corpus(Path(args.out), pages, origin="recorded", devices=devices, recipes=recipes)
+        print(f"Wrote {len(pages)} page(s) to {args.out}")
+        return 0
+
+    if args.command == "bench" and args.jobs < 1:
+        print("ERROR: --jobs must be 1 or more")
+        return 2
+
+    if args.command == "serve":
+        try:
+            _, pages = load_corpus(Path(args.corpus))
+        except (OSError, ValueError) as e:
+            print(f"ERROR: cannot load corpus: {e}")
+            return 2
+        server = FixtureServer(("127.0.0.1", args.port), pages, args.latency_ms / 1000)
+        server.quiet = False
+        print(f"Serving {len(pages)} page(s) at {server.base_url} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    return _bench(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+"""Cached HTTP GET for the wiki importers.
+
+Responses are kept on disk (default: `build/cache/wiki_http/`), one body file
+plus one JSON metadata file per URL. When a cached copy exists, the next
+request for that URL is conditional (`If-None-Match` / `If-Modified-Since`
+from the stored `ETag` / `Last-Modified`); a `304 Not Modified` answer is
+served from the cache without re-downloading the page.
+
+Offline mode serves only from the cache and raises `CacheMiss` for anything
+that was never fetched. The importers expose this as `--offline`, and
+`--no-cache` bypasses the cache entirely.
+
+`--base-url` (or `STATIONEERS_WIKI_BASE_URL`) sends every request for
+`https://stationeers-wiki.com/...` to another server with the same paths,
+such as the fixture server in `tools/wiki_fixtures.py`. Only the fetch is
+redirected: imported entries still record the real wiki URLs.
+
+Settings are process-wide (`configure`) because the importers fetch from
+many helper functions; writes are per-URL and atomic, so concurrent
+fetches from a thread pool are safe.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT / "build" / "cache" / "wiki_http"
+DEFAULT_TIMEOUT = 30
+WIKI_ORIGIN = "https://stationeers-wiki.com"
+BASE_URL_ENV = "STATIONEERS_WIKI_BASE_URL"
+
+
+class CacheMiss(OSError):
+    """Offline mode and the URL is not in the cache."""
+
+
+@dataclass
+class _Settings:
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR  # None disables the cache
+    offline: bool = False
+    base_url: Optional[str] = None  # stand-in for WIKI_ORIGIN
+
+
+_settings = _Settings(base_url=os.environ.get(BASE_URL_ENV) or None)
+
+
+def configure(
+    *,
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+    offline: bool = False,
+    base_url: Optional[str] = None,
+) -> None:
+    """Set the cache directory (None = no cache), offline mode and wiki stand-in for this process."""
+
+    if offline and cache_dir is None:
+        raise ValueError("offline mode needs a cache")
+    _settings.cache_dir = cache_dir
+    _settings.offline = offline
+    _settings.base_url = base_url.rstrip("/") if base_url else None
+
+
+def resolve_url(url: str) -> str:
+    """The URL actually requested for `url` (rewritten when a base URL is set)."""
+
+    base = _settings.base_url
+    if base and (url == WIKI_ORIGIN or url.startswith(WIKI_ORIGIN + "/")):
+        return base + url[len(WIKI_ORIGIN) :]
+    return url
+
+
+def add_arguments(parser: Any) -> None:
+    """The fetch flags shared by the importers' argparse parsers."""
+
+    parser.add_argument("--offline", action="store_true", help="Serve wiki pages only from the local cache")
+    parser.add_argument("--no-cache", action="store_true", help="Always download; do not read or write the cache")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="HTTP cache directory (default: build/cache/wiki_http under the repo)",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=os.environ.get(BASE_URL_ENV),
+        help=f"Fetch wiki pages from this server instead (same paths; env: {BASE_URL_ENV})",
+    )
+
+
+def configure_from_args(args: Any) -> None:
+    configure(cache_dir=None if args.no_cache else args.cache_dir, offline=args.offline, base_url=args.base_url)
+
+
+def _paths(cache_dir: Path, url: str) -> tuple[Path, Path]:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return cache_dir / f"{key}.json", cache_dir / f"{key}.body"
+
+
+def _read_cached(cache_dir: Path, url: str) -> tuple[Optional[dict], Optional[bytes]]:
+    meta_path, body_path = _paths(cache_dir, url)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        body = body_path.read_bytes()
+    except (OSError, ValueError):
+        return None, None
+    if not isinstance(meta, dict) or meta.get("url") != url:
+        return None, None
+    return meta, body
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{id(data)}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _store(cache_dir: Path, url: str, headers: Any, body: bytes) -> None:
+    meta_path, body_path = _paths(cache_dir, url)
+    meta = {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "lastModified": headers.get("Last-Modified"),
+        "fetchedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Body first: a metadata file never points at a body that is not there yet.
+        _atomic_write(body_path, body)
+        _atomic_write(meta_path, (json.dumps(meta, indent=2) + "\n").encode("utf-8"))
+    except OSError:
+        pass  # a read-only checkout still imports, just without caching
+
+
+def fetch_bytes(url: str, *, user_agent: str, timeout: int = DEFAULT_TIMEOUT) -> bytes:
+    """GET `url`, revalidating against (or serving from) the on-disk cache."""
+
+    url = resolve_url(url)
+    cache_dir = _settings.cache_dir
+    meta, cached = _read_cached(cache_dir, url) if cache_dir is not None else (None, None)
+    if _settings.offline:
+        if cached is None:
+            raise CacheMiss(f"not in the wiki cache (offline): {url}")
+        return cached
+
+    headers = {"User-Agent": user_agent}
+    if meta is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("lastModified"):
+            headers["If-Modified-Since"] = meta["lastModified"]
+
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as resp:
+            body = resp.read()
+            response_headers = resp.headers
+    except HTTPError as e:
+        if e.code == 304 and cached is not None:
+            return cached
+        raise
+
+    if cache_dir is not None:
+        _store(cache_dir, url, response_headers, body)
+    return body
@@ -13,28 +13,54 @@ Design constraints
 
 Usage
   python tools/wiki_import.py https://stationeers-wiki.com/Pipe_Analyzer
+  python tools/wiki_import.py --manifest devices.txt --jobs 8
+  python tools/wiki_import.py --from-catalog
+  python tools/wiki_import.py --from-catalog --offline
+  python tools/wiki_import.py --from-catalog --source api
+
+Batch mode (several URLs, `--manifest` with one URL per line, or
+`--from-catalog` to refresh every wiki-imported device) fetches pages on a
+bounded thread pool, then writes the device files and updates
+catalog/index.json once, atomically. A page that fails is reported and
+skipped; the rest are still written (exit code 1).
+
+Pages are cached under build/cache/wiki_http/ and revalidated with
+conditional requests (see tools/wiki_http.py); `--offline` re-imports from
+the cache only, `--no-cache` always downloads. Page wikitext (Structurebox
+identity, `*/Data_Network` transclusions) comes from the per-page raw view,
+or with `--source api` from batched api.php queries that batch mode issues
+up front for every page (see tools/wiki_source.py).
 
 """
 
 from __future__ import annotations
 
+import argparse
 import json
+import os
 import re
 import sys
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from html import unescape
 from html.parser import HTMLParser
 from pathlib import Path
 from typing import Iterable, List, Optional
-from urllib.parse import parse_qs, urldefrag, urlparse
-from urllib.request import Request, urlopen
+from urllib.parse import parse_qs, unquote, urldefrag, urlparse
+
+import wiki_source
+from wiki_http import add_arguments as add_cache_arguments
+from wiki_http import CacheMiss, configure_from_args, fetch_bytes
 
 
 ROOT = Path(__file__).resolve().parents[1]
 CATALOG_DIR = ROOT / "catalog"
 DEVICES_DIR = CATALOG_DIR / "devices"
 INDEX_PATH = CATALOG_DIR / "index.json"
+DEFAULT_JOBS = 8  # concurrent page fetches in batch mode; be polite to the wiki
 
 
 @dataclass
@@ -220,25 +246,98 @@ class _TableTextExtractor(HTMLParser):
             self._cell_buf.append(data)
 
 
+class _PageIndex(HTMLParser):
+    """One pass over a page: where every anchor id is, where tables start, and the visible text.
+
+    Table lookups after an anchor and identity extraction read from this
+    instead of rescanning (or re-parsing) the full HTML for every query.
+    """
+
+    _ID_ATTR_RE = re.compile(r"(?<![\w-])id\s*=", re.IGNORECASE)
+    _STEM_RE = re.compile(r"_[0-9]+$")
+
+    def __init__(self, html: str) -> None:
+        super().__init__()
+        self.html = html
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", html)]
+        # offsets of `id=`, by exact id and by id with any `_N` repeat suffix dropped
+        self._by_id: dict[str, list[int]] = {}
+        self._by_stem: dict[str, list[int]] = {}
+        self._table_starts: list[int] = []
+        self._tables: dict[int, Optional[str]] = {}
+        self._text: list[tuple[int, str]] = []
+        self.feed(html)
+        self.close()
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_starts[line - 1] + col
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag == "table":
+            self._table_starts.append(self._offset())
+        for key, value in attrs:
+            if key != "id" or not value:
+                continue
+            start = self._offset()
+            m = self._ID_ATTR_RE.search(self.get_starttag_text() or "")
+            pos = start + (m.start() if m else 0)
+            self._by_id.setdefault(value, []).append(pos)
+            self._by_stem.setdefault(value, []).append(pos)
+            stem = self._STEM_RE.sub("", value)
+            if stem != value:
+                self._by_stem.setdefault(stem, []).append(pos)
+
+    def handle_data(self, data: str) -> None:
+        if data:
+            self._text.append((self._offset(), data))
+
+    def anchor_pos(self, prefix: str, *, start_pos: int = 0, exact: bool = False) -> Optional[int]:
+        """First `id=` at or after start_pos for `prefix` (or `prefix_N` unless exact)."""
+
+        positions = (self._by_id if exact else self._by_stem).get(prefix, [])
+        i = bisect_left(positions, start_pos)
+        return positions[i] if i < len(positions) else None
+
+    def table_after(self, pos: int) -> Optional[str]:
+        """Raw HTML of the first <table> starting after `pos` (up to its first </table>)."""
+
+        if pos not in self._tables:
+            i = bisect_right(self._table_starts, pos)
+            table: Optional[str] = None
+            if i < len(self._table_starts):
+                start = self._table_starts[i]
+                end = self.html.find("</table>", start)
+                if end != -1:
+                    table = self.html[start : end + len("</table>")]
+            self._tables[pos] = table
+        return self._tables[pos]
+
+    def text(self, start_pos: int = 0, end_pos: Optional[int] = None) -> str:
+        """Visible text (as HTMLParser data) of the parts starting in [start_pos, end_pos)."""
+
+        stop = len(self.html) if end_pos is None else end_pos
+        return " ".join(data for offset, data in self._text if start_pos <= offset < stop)
+
+
+@lru_cache(maxsize=16)
+def _page_index(html: str) -> _PageIndex:
+    # Multi-device pages (Sensors, Logic_Switch) are imported once per section;
+    # the index is built once per page content.
+    return _PageIndex(html)
+
+
 def _extract_first_table_after_anchor(html: str, anchor_id: str) -> Optional[str]:
     """Return the raw HTML for the first <table> after a heading anchor id."""
-    anchor_pos = html.find(f'id="{anchor_id}"')
-    if anchor_pos == -1:
-        return None
-    table_start = html.find("<table", anchor_pos)
-    if table_start == -1:
+    index = _page_index(html)
+    anchor_pos = index.anchor_pos(anchor_id, exact=True)
+    if anchor_pos is None:
         return None
-    table_end = html.find("</table>", table_start)
-    if table_end == -1:
-        return None
-    return html[table_start : table_end + len("</table>")]
+    return index.table_after(anchor_pos)
 
 
 def _find_anchor_pos(html: str, anchor_id: str, *, start_pos: int = 0) -> Optional[int]:
-    m = re.search(rf"id=[\"']{re.escape(anchor_id)}[\"']", html[start_pos:])
-    if not m:
-        return None
-    return start_pos + m.start()
+    return _page_index(html).anchor_pos(anchor_id, start_pos=start_pos, exact=True)
 
 
 def _extract_first_table_after_anchor_prefix(
@@ -253,20 +352,11 @@ def _extract_first_table_after_anchor_prefix(
     disambiguates anchors with suffixes like Data_Parameters_3.
     """
 
-    m = re.search(
-        rf"id=[\"']{re.escape(anchor_prefix)}(?:_[0-9]+)?[\"']",
-        html[start_pos:],
-    )
-    if not m:
+    index = _page_index(html)
+    anchor_pos = index.anchor_pos(anchor_prefix, start_pos=start_pos)
+    if anchor_pos is None:
         return None
-    anchor_pos = start_pos + m.start()
-    table_start = html.find("<table", anchor_pos)
-    if table_start == -1:
-        return None
-    table_end = html.find("</table>", table_start)
-    if table_end == -1:
-        return None
-    return html[table_start : table_end + len("</table>")]
+    return index.table_after(anchor_pos)
 
 
 def _extract_first_table_after_any_anchor_prefix(
@@ -428,20 +518,7 @@ def _extract_identity(
     If Item Name/Hash are not present, fall back to Prefab Name/Hash.
     """
 
-    class _TextOnly(HTMLParser):
-        def __init__(self) -> None:
-            super().__init__()
-            self.parts: List[str] = []
-
-        def handle_data(self, data: str) -> None:
-            if data:
-                self.parts.append(data)
-
-    snippet = html[start_pos:end_pos]
-
-    p = _TextOnly()
-    p.feed(snippet)
-    text = unescape(" ".join(p.parts))
+    text = unescape(_page_index(html).text(start_pos, end_pos))
     text = re.sub(r"\s+", " ", text)
 
     item_name: Optional[str] = None
@@ -539,18 +616,24 @@ def _extract_identity(
 
 
 def fetch_html(url: str) -> str:
-    req = Request(
+    raw = fetch_bytes(
         url,
-        headers={
-            "User-Agent": "stationeers_IC10-wiki-import/0.1 (text-based IC10 IDE tooling)"
-        },
+        user_agent="stationeers_IC10-wiki-import/0.1 (text-based IC10 IDE tooling)",
     )
-    with urlopen(req, timeout=30) as resp:
-        raw = resp.read()
     # Let Python guess; MediaWiki is typically UTF-8.
     return raw.decode("utf-8", errors="replace")
 
 
+def _page_title(fetch_url: str) -> str:
+    """Full page title of a (fragment-free) wiki URL, e.g. Kit_(Satellite_Dish)/Data_Network."""
+
+    parsed = urlparse(fetch_url)
+    path = (parsed.path or "/").lstrip("/")
+    if path.lower() == "index.php":
+        return (parse_qs(parsed.query).get("title") or [""])[0]
+    return unquote(path)
+
+
 def _with_query(url: str, *, query: str) -> str:
     """Return url with the given query string.
 
@@ -561,8 +644,8 @@ def _with_query(url: str, *, query: str) -> str:
     return parsed._replace(query=query).geturl()
 
 
-def _extract_transcluded_data_network_title(edit_html: str) -> Optional[str]:
-    """Try to find a transcluded */Data_Network page title from edit view HTML.
+def _extract_transcluded_data_network_title(page_source: str) -> Optional[str]:
+    """Try to find a transcluded */Data_Network page title in a page's wikitext.
 
     Many device pages don't embed the IO tables directly; instead they include a
     collapsible transclusion like:
@@ -571,22 +654,21 @@ def _extract_transcluded_data_network_title(edit_html: str) -> Optional[str]:
     This function is intentionally permissive and only returns the first match.
     """
 
-    # The edit page HTML contains the raw wikitext inside the form.
     # Look for a transclusion that ends with /Data_Network.
-    m = re.search(r"\{\{\s*:\s*([^\}|\n]+?/Data_Network)\s*\}\}", edit_html)
+    m = re.search(r"\{\{\s*:\s*([^\}|\n]+?/Data_Network)\s*\}\}", page_source)
     if not m:
         return None
     return m.group(1).strip()
 
 
-def _extract_structure_identity_from_edit_source(
-    edit_html: str,
+def _extract_structure_identity_from_page_source(
+    page_source: str,
     *,
     structure_name: str,
 ) -> tuple[bool, Optional[str], Optional[int]]:
     """Extract prefab identity from the matching Structurebox in raw wiki source."""
 
-    blocks = re.findall(r"\{\{Structurebox.*?\}\}", edit_html, re.IGNORECASE | re.DOTALL)
+    blocks = re.findall(r"\{\{Structurebox.*?\}\}", page_source, re.IGNORECASE | re.DOTALL)
     for block in blocks:
         name_match = re.search(r"\|\s*name\s*=\s*([^|}{\n]+)", block, re.IGNORECASE)
         if not name_match:
@@ -620,30 +702,38 @@ def _extract_structure_identity_from_edit_source(
 
 
 def upsert_index(entry: dict) -> None:
+    upsert_index_entries([entry])
+
+
+def upsert_index_entries(entries: List[dict]) -> None:
+    """Replace/add index entries by wikiTitle in one atomic rewrite of the index."""
+
     INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
     if INDEX_PATH.exists():
         data = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
     else:
         data = {"version": 1, "devices": []}
 
+    titles = {e.get("wikiTitle") for e in entries}
     devices = data.setdefault("devices", [])
     # Replace by wikiTitle
-    devices = [d for d in devices if d.get("wikiTitle") != entry.get("wikiTitle")]
-    devices.append(entry)
+    devices = [d for d in devices if d.get("wikiTitle") not in titles]
+    devices.extend(entries)
     devices.sort(key=lambda d: d.get("wikiTitle", ""))
     data["devices"] = devices
 
-    INDEX_PATH.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    tmp = INDEX_PATH.with_name(INDEX_PATH.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    os.replace(tmp, INDEX_PATH)
 
 
-def main(argv: List[str]) -> int:
-    if len(argv) != 2:
-        print("Usage: python tools/wiki_import.py <stationeers-wiki device URL>")
-        print("  Tip: for multi-device pages, you can import a specific section:")
-        print("    python tools/wiki_import.py https://stationeers-wiki.com/Sensors#Gas_Sensor")
-        return 2
+def import_device(url: str, revision_id: Optional[int] = None) -> DeviceCatalogEntry:
+    """Fetch and parse one device page (nothing is written).
+
+    `revision_id` is the page revision the caller saw before fetching; it is
+    recorded as `source.revisionId` for `tools/wiki_refresh.py`.
+    """
 
-    url = argv[1]
     wiki_title, fetch_url, fragment = _parse_wiki_url(url)
 
     html = fetch_html(fetch_url)
@@ -652,7 +742,7 @@ def main(argv: List[str]) -> int:
     if fragment:
         section_start_pos = _find_anchor_pos(html, fragment)
 
-    edit_html = ""
+    page_source = ""
 
     if section_start_pos is not None:
         parameters_table = _extract_first_table_after_anchor_prefix(
@@ -697,13 +787,15 @@ def main(argv: List[str]) -> int:
             outs.extend(_parse_io_table(output_table))
 
     if not params and not outs:
-        # Attempt to follow a transclusion to */Data_Network by grabbing the edit view.
+        # Attempt to follow a transclusion to */Data_Network in the page source.
         try:
-            edit_html = fetch_html(_with_query(fetch_url, query="action=edit"))
+            page_source = wiki_source.wikitext(_page_title(fetch_url))
+        except CacheMiss:
+            raise  # offline: a missing page must not quietly change the result
         except Exception:
-            edit_html = ""
+            page_source = ""
 
-        dn_title = _extract_transcluded_data_network_title(edit_html) if edit_html else None
+        dn_title = _extract_transcluded_data_network_title(page_source) if page_source else None
         if dn_title:
             # Fetch the transcluded page and parse its Input/Output tables.
             dn_url = f"https://stationeers-wiki.com/{dn_title}"
@@ -742,15 +834,17 @@ def main(argv: List[str]) -> int:
     else:
         item_name, item_hash = _extract_identity(html)
 
-        if not edit_html:
+        if not page_source:
             try:
-                edit_html = fetch_html(_with_query(fetch_url, query="action=edit"))
+                page_source = wiki_source.wikitext(_page_title(fetch_url))
+            except CacheMiss:
+                raise
             except Exception:
-                edit_html = ""
+                page_source = ""
 
-        if edit_html:
-            matched_structure, structure_item_name, structure_item_hash = _extract_structure_identity_from_edit_source(
-                edit_html,
+        if page_source:
+            matched_structure, structure_item_name, structure_item_hash = _extract_structure_identity_from_page_source(
+                page_source,
                 structure_name=wiki_title.replace("_", " "),
             )
             if matched_structure:
@@ -768,10 +862,12 @@ def main(argv: List[str]) -> int:
         "wikiTitle": wiki_title,
         "retrievedAt": retrieved_at,
     }
+    if revision_id is not None:
+        source["revisionId"] = revision_id
     if source_notes:
         source["notes"] = source_notes
 
-    device = DeviceCatalogEntry(
+    return DeviceCatalogEntry(
         source=source,
         identity={
             "itemName": item_name,
@@ -783,21 +879,214 @@ def main(argv: List[str]) -> int:
         },
     )
 
+
+def _load_existing(out_path: Path) -> dict:
+    """An existing device file's JSON ({} when it is missing or unreadable)."""
+
+    try:
+        data = json.loads(out_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _existing_mode_values(existing: dict) -> Optional[list]:
+    """Manually curated `io.modeValues` of an existing device file (the wiki pages do not carry them)."""
+
+    io = existing.get("io")
+    mode_values = io.get("modeValues") if isinstance(io, dict) else None
+    return mode_values if isinstance(mode_values, list) else None
+
+
+def _existing_revision_id(existing: dict) -> Optional[int]:
+    source = existing.get("source")
+    revision_id = source.get("revisionId") if isinstance(source, dict) else None
+    return revision_id if isinstance(revision_id, int) else None
+
+
+def write_device(device: DeviceCatalogEntry) -> Path:
+    wiki_title = device.source["wikiTitle"]
     DEVICES_DIR.mkdir(parents=True, exist_ok=True)
     out_path = DEVICES_DIR / f"{wiki_title}.json"
+    existing = _load_existing(out_path)
+    mode_values = _existing_mode_values(existing)
+    if mode_values is not None and "modeValues" not in device.io:
+        device.io = {"modeValues": mode_values, **device.io}
+    revision_id = _existing_revision_id(existing)
+    if revision_id is not None and "revisionId" not in device.source:
+        # the revision lookup failed: keep the recorded id rather than make the page look changed
+        source = dict(device.source)
+        notes = source.pop("notes", None)
+        source["revisionId"] = revision_id
+        if notes:
+            source["notes"] = notes
+        device.source = source
     out_path.write_text(json.dumps(asdict(device), indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return out_path
 
-    upsert_index(
-        {
-            "wikiTitle": wiki_title,
-            "file": f"devices/{wiki_title}.json",
-            "itemName": item_name,
-            "itemHash": item_hash,
-        }
+
+def _index_entry(device: DeviceCatalogEntry) -> dict:
+    wiki_title = device.source["wikiTitle"]
+    return {
+        "wikiTitle": wiki_title,
+        "file": f"devices/{wiki_title}.json",
+        "itemName": device.identity["itemName"],
+        "itemHash": device.identity["itemHash"],
+    }
+
+
+def _read_manifest(path: Path) -> List[str]:
+    """One URL per line; blank lines and `#` comments are ignored."""
+
+    urls: List[str] = []
+    for raw in path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return urls
+
+
+def _catalog_urls() -> List[str]:
+    """Source URLs of every indexed wiki-imported device (best-guess entries are skipped)."""
+
+    data = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+    urls: List[str] = []
+    for entry in data.get("devices", []):
+        path = CATALOG_DIR / str(entry.get("file", ""))
+        try:
+            source = json.loads(path.read_text(encoding="utf-8")).get("source") or {}
+        except (OSError, ValueError, AttributeError):
+            continue
+        if source.get("kind", "wiki_import") == "wiki_import" and source.get("wikiUrl"):
+            urls.append(source["wikiUrl"])
+    return urls
+
+
+def import_batch(
+    urls: List[str],
+    jobs: int,
+    revisions: Optional[dict[str, Optional[int]]] = None,
+) -> tuple[List[DeviceCatalogEntry], List[tuple[str, str]]]:
+    """Import URLs on a bounded thread pool; return (devices in input order, (url, error) failures).
+
+    `revisions` maps page titles to their current revision ids; when omitted
+    they are looked up in bulk first (before any page is read, so a page
+    edited mid-import is re-imported by the next refresh).
+    """
+
+    pages: dict[str, str] = {}
+    for url in urls:
+        try:
+            pages[url] = _page_title(_parse_wiki_url(url)[1])
+        except ValueError:
+            pass  # import_device reports it
+    if revisions is None:
+        try:
+            revisions = wiki_source.revision_ids(pages.values())
+        except wiki_source.REVISION_ERRORS as e:
+            print(
+                f"WARNING: cannot look up wiki revisions ({type(e).__name__}: {e}); "
+                "keeping the source.revisionId already recorded in each file",
+                file=sys.stderr,
+            )
+            revisions = {}
+
+    def run(url: str) -> tuple[Optional[DeviceCatalogEntry], Optional[str]]:
+        try:
+            return import_device(url, revisions.get(pages.get(url, ""))), None
+        except Exception as e:  # one bad page must not sink the batch
+            return None, f"{type(e).__name__}: {e}"
+
+    # Whole-page imports always read the page source; a batched source gets
+    # all of it in a few requests here instead of one per device.
+    try:
+        wiki_source.prefetch(title for url, title in pages.items() if "#" not in url)
+    except Exception:
+        pass  # each import still fetches (and reports) its own page source
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(urls) or 1))) as pool:
+        results = list(pool.map(run, urls))
+
+    devices: List[DeviceCatalogEntry] = []
+    failures: List[tuple[str, str]] = []
+    for url, (device, error) in zip(urls, results):
+        if device is not None:
+            devices.append(device)
+        else:
+            failures.append((url, error or "unknown error"))
+    return devices, failures
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="wiki_import.py",
+        description="Import Stationeers wiki device IO tables into catalog/",
     )
+    parser.add_argument("urls", nargs="*", help="Stationeers wiki device URL(s)")
+    parser.add_argument("--manifest", type=Path, help="File with one device URL per line (# comments allowed)")
+    parser.add_argument(
+        "--from-catalog",
+        action="store_true",
+        help="Re-import every wiki-imported device already in catalog/index.json",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Concurrent page fetches (default: {DEFAULT_JOBS})",
+    )
+    add_cache_arguments(parser)
+    wiki_source.add_arguments(parser)
+    args = parser.parse_args(argv[1:])
+    if args.offline and args.no_cache:
+        print("ERROR: --offline needs the cache; drop --no-cache")
+        return 2
+    configure_from_args(args)
+    wiki_source.configure_from_args(args)
+
+    urls = list(args.urls)
+    if args.manifest is not None:
+        try:
+            urls.extend(_read_manifest(args.manifest))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"ERROR: cannot read manifest {args.manifest}: {e}")
+            return 2
+    if args.from_catalog:
+        urls.extend(_catalog_urls())
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        parser.print_usage()
+        print("  Tip: for multi-device pages, you can import a specific section:")
+        print("    python tools/wiki_import.py https://stationeers-wiki.com/Sensors#Gas_Sensor")
+        return 2
+    if args.jobs < 1:
+        print("ERROR: --jobs must be 1 or more")
+        return 2
 
-    print(f"Wrote {out_path.relative_to(ROOT)}")
-    return 0
+    titles: dict[str, str] = {}
+    for url in urls:
+        try:
+            wiki_title = _parse_wiki_url(url)[0]
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return 2
+        if wiki_title in titles:
+            print(f"ERROR: {url} and {titles[wiki_title]} both import {wiki_title}")
+            return 2
+        titles[wiki_title] = url
+
+    devices, failures = import_batch(urls, args.jobs)
+
+    for device in devices:
+        out_path = write_device(device)
+        print(f"Wrote {out_path.relative_to(ROOT)}")
+    if devices:
+        upsert_index_entries([_index_entry(d) for d in devices])
+        if len(urls) > 1:
+            print(f"Updated {INDEX_PATH.relative_to(ROOT)} ({len(devices)} device(s))")
+
+    for url, error in failures:
+        print(f"ERROR: {url}: {error}")
+    return 1 if failures else 0
 
 
 if __name__ == "__main__":
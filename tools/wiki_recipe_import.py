@@ -12,23 +12,40 @@ Design constraints
 
 Usage
   python tools/wiki_recipe_import.py https://stationeers-wiki.com/Autolathe/Recipes
+  python tools/wiki_recipe_import.py https://stationeers-wiki.com/Autolathe/Recipes --offline
+  python tools/wiki_recipe_import.py https://stationeers-wiki.com/Autolathe/Recipes --refresh-items
+  python tools/wiki_recipe_import.py https://stationeers-wiki.com/Autolathe/Recipes --source api
+
+Wiki pages are cached and revalidated like tools/wiki_import.py does, and
+`--source api` reads wikitext through batched api.php queries
+(`tools/wiki_source.py`).
+
+Each recipe row needs the item's own wiki page (itemName/itemHash/stack
+size). The distinct item titles are collected first and fetched concurrently
+(`--jobs`), and the results are kept in `build/cache/wiki_item_metadata.json`
+so later imports (of any producer) skip items already looked up.
+`--refresh-items` looks every item up again; `--no-cache` skips both caches.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from html import unescape
 from html.parser import HTMLParser
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 from urllib.parse import parse_qs, quote, urlparse
-from urllib.request import Request, urlopen
 
+import wiki_source
+from wiki_http import add_arguments as add_cache_arguments
+from wiki_http import CacheMiss, configure_from_args
 from wiki_import import _extract_identity, fetch_html
 
 
@@ -37,6 +54,9 @@ CATALOG_DIR = ROOT / "catalog"
 DEVICES_DIR = CATALOG_DIR / "devices"
 RECIPES_DIR = CATALOG_DIR / "recipes"
 RECIPES_INDEX_PATH = RECIPES_DIR / "index.json"
+ITEM_CACHE_PATH = ROOT / "build" / "cache" / "wiki_item_metadata.json"
+ITEM_CACHE_VERSION = 1  # bump when the metadata extraction changes
+DEFAULT_JOBS = 8  # concurrent item-page lookups; be polite to the wiki
 
 
 @dataclass
@@ -103,46 +123,8 @@ def _parse_recipe_url(url: str) -> tuple[str, str, str]:
     return page_title, canonical_url, producer_title
 
 
-def _build_action_url(page_title: str, action: str) -> str:
-    return (
-        "https://stationeers-wiki.com/index.php?title="
-        f"{quote(page_title, safe='()/:_-')}&action={quote(action, safe='')}"
-    )
-
-
-def _fetch_text(url: str) -> str:
-    req = Request(
-        url,
-        headers={
-            "User-Agent": "stationeers_IC10-wiki-recipe-import/0.1 (text-based IC10 IDE tooling)"
-        },
-    )
-    with urlopen(req, timeout=30) as resp:
-        raw = resp.read()
-    return raw.decode("utf-8", errors="replace")
-
-
-def _extract_textarea(html: str) -> Optional[str]:
-    match = re.search(
-        r"<textarea[^>]*?(?:id=\"wpTextbox1\"|name=\"wpTextbox1\")[^>]*>(.*?)</textarea>",
-        html,
-        re.IGNORECASE | re.DOTALL,
-    )
-    if not match:
-        return None
-    return unescape(match.group(1))
-
-
 def fetch_wikitext(page_title: str) -> str:
-    raw_url = _build_action_url(page_title, "raw")
-    raw_text = _fetch_text(raw_url)
-    if raw_text.lstrip().startswith("<!DOCTYPE html"):
-        edit_text = _fetch_text(_build_action_url(page_title, "edit"))
-        extracted = _extract_textarea(edit_text)
-        if not extracted:
-            raise RuntimeError(f"Could not extract wikitext from {page_title}")
-        return extracted
-    return raw_text
+    return wiki_source.wikitext(page_title)
 
 
 def _wiki_title_to_display(wiki_title: str) -> str:
@@ -284,18 +266,29 @@ def _extract_metadata_from_wikitext(page_title: str, wikitext: str) -> ItemPageM
     return ItemPageMetadata(prefab_name, prefab_hash, stack_size)
 
 
-def _lookup_item_metadata(page_title: str, cache: dict[str, ItemPageMetadata]) -> ItemPageMetadata:
-    if page_title in cache:
-        return cache[page_title]
+def _fetch_item_metadata(page_title: str) -> tuple[ItemPageMetadata, bool]:
+    """Look up one item page; the flag is False when a fetch failed (do not persist)."""
+
+    # With a batched source the item's wikitext is usually in memory already;
+    # when its Itembox carries identity and stack size, skip the rendered page.
+    prefetched = wiki_source.peek_wikitext(page_title)
+    if prefetched is not None:
+        meta = _extract_metadata_from_wikitext(page_title, prefetched)
+        if (meta.itemName is not None or meta.itemHash is not None) and meta.stackSize is not None:
+            return meta, True
 
     page_url = _build_page_url(page_title)
     stack_size: Optional[int] = None
+    complete = True
     try:
         html = fetch_html(page_url)
         item_name, item_hash = _extract_identity(html)
         stack_size = _extract_stack_size_from_html(html)
+    except CacheMiss:
+        raise  # offline: a missing page must not quietly change the result
     except Exception:
         item_name, item_hash = None, None
+        complete = False
 
     if item_name is None and item_hash is None or stack_size is None:
         try:
@@ -305,11 +298,73 @@ def _lookup_item_metadata(page_title: str, cache: dict[str, ItemPageMetadata]) -
                 item_name, item_hash = meta.itemName, meta.itemHash
             if stack_size is None:
                 stack_size = meta.stackSize
+        except CacheMiss:
+            raise
         except Exception:
-            pass
+            complete = False
+
+    return ItemPageMetadata(item_name, item_hash, stack_size), complete
 
-    cache[page_title] = ItemPageMetadata(item_name, item_hash, stack_size)
-    return cache[page_title]
+
+class ItemMetadataCache:
+    """Item-page metadata by wiki title, persisted across runs (None path = this run only)."""
+
+    def __init__(self, path: Optional[Path] = ITEM_CACHE_PATH, *, refresh: bool = False) -> None:
+        self.path = path
+        self.items: dict[str, ItemPageMetadata] = {}
+        self.fetched = 0  # item pages looked up by this process
+        self._failed: set[str] = set()  # looked up, but a fetch failed: not persisted
+        self._dirty = False
+        if path is not None and not refresh:
+            self._load(path)
+
+    def _load(self, path: Path) -> None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != ITEM_CACHE_VERSION:
+            return
+        items = data.get("items")
+        for title, meta in (items.items() if isinstance(items, dict) else ()):
+            if isinstance(meta, dict):
+                self.items[title] = ItemPageMetadata(meta.get("itemName"), meta.get("itemHash"), meta.get("stackSize"))
+
+    def prefetch(self, titles: Iterable[str], jobs: int = DEFAULT_JOBS) -> None:
+        """Look up every title not cached yet, `jobs` item pages at a time."""
+
+        missing = sorted({t for t in titles if t not in self.items})
+        if not missing:
+            return
+        wiki_source.prefetch(missing)
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(missing)))) as pool:
+            # map() re-raises a worker's CacheMiss here, in the caller's thread.
+            for title, (meta, complete) in zip(missing, pool.map(_fetch_item_metadata, missing)):
+                self.items[title] = meta
+                self.fetched += 1
+                if complete:
+                    self._dirty = True
+                else:
+                    self._failed.add(title)
+
+    def get(self, page_title: str) -> ItemPageMetadata:
+        if page_title not in self.items:
+            self.prefetch([page_title], jobs=1)
+        return self.items[page_title]
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        items = {t: asdict(m) for t, m in sorted(self.items.items()) if t not in self._failed}
+        payload = {"version": ITEM_CACHE_VERSION, "items": items}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(payload, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # a read-only checkout still imports, just without the item cache
+        self._dirty = False
 
 
 _TOKEN_RE = re.compile(
@@ -324,14 +379,21 @@ _ROW_RE = re.compile(
 )
 
 
-def parse_recipes(wikitext: str) -> list[RecipeRecord]:
+def parse_recipes(
+    wikitext: str,
+    item_cache: Optional[ItemMetadataCache] = None,
+    jobs: int = DEFAULT_JOBS,
+) -> list[RecipeRecord]:
     table = _extract_recipe_table(wikitext)
     recipes: list[RecipeRecord] = []
-    identity_cache: dict[str, ItemPageMetadata] = {}
+    if item_cache is None:
+        item_cache = ItemMetadataCache(None)
 
-    for match in _ROW_RE.finditer(table):
-        item = _parse_recipe_item(match.group("item"))
-        meta = _lookup_item_metadata(item.wikiTitle, identity_cache)
+    rows = [(match, _parse_recipe_item(match.group("item"))) for match in _ROW_RE.finditer(table)]
+    item_cache.prefetch((item.wikiTitle for _, item in rows), jobs)
+
+    for match, item in rows:
+        meta = item_cache.get(item.wikiTitle)
         item.itemName = meta.itemName
         item.itemHash = meta.itemHash
         tier = re.sub(r"\s+", " ", match.group("tier")).strip()
@@ -425,6 +487,15 @@ def _load_existing_stack_sizes(out_path: Path) -> dict[str, int]:
     return stack_sizes
 
 
+def _load_existing_revision_id(out_path: Path) -> Optional[int]:
+    try:
+        source = json.loads(out_path.read_text(encoding="utf-8")).get("source")
+    except (OSError, ValueError, AttributeError):
+        return None
+    revision_id = source.get("revisionId") if isinstance(source, dict) else None
+    return revision_id if isinstance(revision_id, int) else None
+
+
 def upsert_recipe_index(entry: dict[str, Any]) -> None:
     RECIPES_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
     if RECIPES_INDEX_PATH.exists():
@@ -444,33 +515,46 @@ def upsert_recipe_index(entry: dict[str, Any]) -> None:
     )
 
 
-def main(argv: list[str] | None = None) -> int:
-    parser = argparse.ArgumentParser(description="Import Stationeers wiki recipe tables")
-    parser.add_argument("url", help="Stationeers wiki recipes URL, e.g. https://stationeers-wiki.com/Autolathe/Recipes")
-    args = parser.parse_args(argv)
+def import_producer(
+    url: str,
+    item_cache: ItemMetadataCache,
+    jobs: int = DEFAULT_JOBS,
+    revision_id: Optional[int] = None,
+) -> tuple[Path, int]:
+    """Import one recipes page and write its catalog and index entry; return (file, recipe count).
 
-    page_title, canonical_url, producer_title = _parse_recipe_url(args.url)
-    wikitext = fetch_wikitext(page_title)
-    recipes = parse_recipes(wikitext)
+    `revision_id` is the page revision seen before fetching, recorded as
+    `source.revisionId` for `tools/wiki_refresh.py` (None: keep the id the
+    existing file records).
+    """
+
+    page_title, canonical_url, producer_title = _parse_recipe_url(url)
+    recipes = parse_recipes(fetch_wikitext(page_title), item_cache, jobs)
     item_name, item_hash = _load_device_identity(producer_title)
     retrieved_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
     out_dir = RECIPES_DIR / producer_title
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / "recipes.json"
     existing_stack_sizes = _load_existing_stack_sizes(out_path)
+    if revision_id is None:
+        # the revision lookup failed: keep the recorded id rather than make the page look changed
+        revision_id = _load_existing_revision_id(out_path)
 
     for recipe in recipes:
         existing_stack_size = existing_stack_sizes.get(recipe.item.wikiTitle)
         if existing_stack_size is not None and recipe.stackSize == 1:
             recipe.stackSize = existing_stack_size
 
+    source: dict[str, Any] = {
+        "kind": "wiki_import",
+        "wikiUrl": canonical_url,
+        "wikiTitle": page_title,
+        "retrievedAt": retrieved_at,
+    }
+    if revision_id is not None:
+        source["revisionId"] = revision_id
     catalog = RecipeCatalogEntry(
-        source={
-            "kind": "wiki_import",
-            "wikiUrl": canonical_url,
-            "wikiTitle": page_title,
-            "retrievedAt": retrieved_at,
-        },
+        source=source,
         producer={
             "wikiTitle": producer_title,
             "itemName": item_name,
@@ -492,8 +576,55 @@ def main(argv: list[str] | None = None) -> int:
             "recipeCount": len(recipes),
         }
     )
+    return out_path, len(recipes)
 
-    print(f"Wrote {out_path.relative_to(ROOT)} ({len(recipes)} recipes)")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Import Stationeers wiki recipe tables")
+    parser.add_argument("url", help="Stationeers wiki recipes URL, e.g. https://stationeers-wiki.com/Autolathe/Recipes")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Concurrent item-page lookups (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--refresh-items",
+        action="store_true",
+        help="Ignore the item-metadata cache and look every item up again",
+    )
+    add_cache_arguments(parser)
+    wiki_source.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.offline and args.no_cache:
+        print("ERROR: --offline needs the cache; drop --no-cache")
+        return 2
+    if args.jobs < 1:
+        print("ERROR: --jobs must be 1 or more")
+        return 2
+    configure_from_args(args)
+    wiki_source.configure_from_args(args)
+
+    page_title = _parse_recipe_url(args.url)[0]
+    try:
+        revision_id = wiki_source.revision_ids([page_title]).get(page_title)
+    except wiki_source.REVISION_ERRORS as e:
+        print(
+            f"WARNING: cannot look up the wiki revision ({type(e).__name__}: {e}); "
+            "keeping the source.revisionId already recorded",
+            file=sys.stderr,
+        )
+        revision_id = None
+    item_cache = ItemMetadataCache(None if args.no_cache else ITEM_CACHE_PATH, refresh=args.refresh_items)
+    try:
+        out_path, recipe_count = import_producer(args.url, item_cache, args.jobs, revision_id)
+    except CacheMiss as e:
+        print(f"ERROR: {e}")
+        return 1
+    finally:
+        item_cache.save()
+
+    print(f"Wrote {out_path.relative_to(ROOT)} ({recipe_count} recipes, {item_cache.fetched} item page(s) looked up)")
     return 0
 
 
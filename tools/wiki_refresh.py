@@ -0,0 +1,179 @@
+"""Re-import only the catalog pages whose wiki revision changed.
+
+Every wiki-imported file in `catalog/devices/` and `catalog/recipes/` records
+the revision of its source page (`source.revisionId`). This asks the wiki for
+the current revision of all of those pages in bulk (`api.php`, 50 titles per
+request, see `tools/wiki_source.py`), then re-imports only the pages whose
+revision differs or was never recorded. Files for unchanged pages are not
+rewritten, and the indexes are only updated when something was re-imported.
+
+Several devices can come from one page (`Sensors#Gas_Sensor`); they are
+re-imported together when that page changes. Pages a device only transcludes
+(`*/Data_Network`) and recipe item pages are not tracked; a full re-import
+(`tools/wiki_import.py --from-catalog`) still picks those up.
+
+Examples
+    python tools/wiki_refresh.py --dry-run
+    python tools/wiki_refresh.py
+    python tools/wiki_refresh.py --only recipes --source api
+
+Exit codes
+  0 - catalog up to date (or every changed page re-imported)
+  1 - a page could not be checked or re-imported, or is gone from the wiki
+  2 - usage / input error
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import wiki_source
+from wiki_http import add_arguments as add_cache_arguments
+from wiki_http import CacheMiss, configure_from_args
+from wiki_import import (
+    DEFAULT_JOBS,
+    INDEX_PATH,
+    _index_entry,
+    _page_title,
+    _parse_wiki_url,
+    import_batch,
+    upsert_index_entries,
+    write_device,
+)
+from wiki_recipe_import import ITEM_CACHE_PATH, ItemMetadataCache, import_producer
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CATALOG_DIR = ROOT / "catalog"
+KINDS = ("devices", "recipes")
+
+
+@dataclass(frozen=True)
+class TrackedFile:
+    kind: str  # "devices" or "recipes"
+    path: Path
+    url: str
+    wiki_title: str  # as recorded; kept on re-import so the file name stays the same
+    page_title: str
+    revision_id: Optional[int]
+
+
+def _tracked_files(catalog_dir: Path, kinds: list[str]) -> tuple[list[TrackedFile], list[str]]:
+    """Wiki-imported catalog files and their recorded revisions; plus problems found."""
+
+    tracked: list[TrackedFile] = []
+    problems: list[str] = []
+    patterns = {"devices": "devices/*.json", "recipes": "recipes/*/recipes.json"}
+    for kind in kinds:
+        for path in sorted(catalog_dir.glob(patterns[kind])):
+            try:
+                source = json.loads(path.read_text(encoding="utf-8")).get("source") or {}
+            except (OSError, ValueError, AttributeError) as e:
+                problems.append(f"{path.relative_to(catalog_dir)}: cannot read: {e}")
+                continue
+            url = source.get("wikiUrl")
+            if source.get("kind", "wiki_import") != "wiki_import" or not isinstance(url, str) or not url:
+                continue  # best-guess entries have no page to compare against
+            try:
+                page_title = _page_title(_parse_wiki_url(url)[1])
+            except ValueError as e:
+                problems.append(f"{path.relative_to(catalog_dir)}: {e}")
+                continue
+            if kind == "recipes":
+                page_title = source.get("wikiTitle") or page_title
+            wiki_title = source.get("wikiTitle") if isinstance(source.get("wikiTitle"), str) else path.stem
+            revision_id = source.get("revisionId") if isinstance(source.get("revisionId"), int) else None
+            tracked.append(TrackedFile(kind, path, url, wiki_title, page_title, revision_id))
+    return tracked, problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-import catalog pages whose wiki revision changed")
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        choices=KINDS,
+        help="Refresh only devices or only recipes (repeatable; default: both)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only list the pages that changed")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Concurrent page fetches (default: {DEFAULT_JOBS})",
+    )
+    add_cache_arguments(parser)
+    wiki_source.add_arguments(parser)
+    args = parser.parse_args()
+    if args.offline:
+        print("ERROR: a refresh needs the current revisions; drop --offline")
+        return 2
+    if args.jobs < 1:
+        print("ERROR: --jobs must be 1 or more")
+        return 2
+    configure_from_args(args)
+    wiki_source.configure_from_args(args)
+
+    kinds = [kind for kind in KINDS if not args.only or kind in args.only]
+    tracked, problems = _tracked_files(CATALOG_DIR, kinds)
+    titles = sorted({t.page_title for t in tracked})
+    try:
+        current = wiki_source.revision_ids(titles)
+    except Exception as e:
+        print(f"ERROR: cannot fetch current revisions: {type(e).__name__}: {e}")
+        return 1
+
+    changed: list[TrackedFile] = []
+    for t in tracked:
+        revision_id = current.get(t.page_title)
+        if revision_id is None:
+            problems.append(f"{t.path.relative_to(CATALOG_DIR)}: page not found on the wiki: {t.page_title}")
+        elif revision_id != t.revision_id:
+            changed.append(t)
+    requests = -(-len(titles) // wiki_source.API_BATCH)
+    print(
+        f"{len(tracked)} file(s) from {len(titles)} page(s) checked in {requests} request(s); "
+        f"{len(changed)} changed"
+    )
+    for t in changed:
+        was = t.revision_id if t.revision_id is not None else "none"
+        print(f"  {t.path.relative_to(CATALOG_DIR)}: {t.page_title} revision {was} -> {current[t.page_title]}")
+
+    if not args.dry_run:
+        by_url = {t.url: t for t in changed if t.kind == "devices"}
+        if by_url:
+            devices, failures = import_batch(list(by_url), args.jobs, current)
+            for device in devices:
+                device.source["wikiTitle"] = by_url[device.source["wikiUrl"]].wiki_title
+                print(f"Wrote {write_device(device).relative_to(ROOT)}")
+            if devices:
+                upsert_index_entries([_index_entry(d) for d in devices])
+                print(f"Updated {INDEX_PATH.relative_to(ROOT)} ({len(devices)} device(s))")
+            problems.extend(f"{url}: {error}" for url, error in failures)
+
+        recipe_pages = [t for t in changed if t.kind == "recipes"]
+        if recipe_pages:
+            item_cache = ItemMetadataCache(None if args.no_cache else ITEM_CACHE_PATH)
+            try:
+                for t in recipe_pages:
+                    try:
+                        out_path, recipe_count = import_producer(t.url, item_cache, args.jobs, current[t.page_title])
+                    except (CacheMiss, RuntimeError, ValueError, OSError) as e:
+                        problems.append(f"{t.url}: {type(e).__name__}: {e}")
+                        continue
+                    print(f"Wrote {out_path.relative_to(ROOT)} ({recipe_count} recipes)")
+            finally:
+                item_cache.save()
+
+    for problem in problems:
+        print(f"ERROR: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
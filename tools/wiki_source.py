@@ -0,0 +1,261 @@
+"""Where the wiki importers get page source (wikitext) from.
+
+Both importers read two things from the wiki: the rendered page (IO tables,
+infobox rows) and the page's wikitext (Structurebox/Itembox parameters,
+transcluded `*/Data_Network` pages, recipe tables). Rendered pages are always
+fetched one by one (`wiki_import.fetch_html`). Wikitext comes from one of two
+backends, selected with `--source`:
+
+- `pages` (default): one request per title, `index.php?action=raw`, falling
+  back to the `action=edit` view when raw source is not served.
+- `api`: MediaWiki's `api.php` query module, up to `API_BATCH` titles per
+  request (`prop=revisions`, content of the latest revision plus its id).
+  `prefetch()` lets a bulk import ask for every title it will need up front.
+
+`revision_ids()` asks `api.php` (`prop=info`) for the current revision id of
+many titles at once; the importers record it as `source.revisionId` and
+`tools/wiki_refresh.py` compares it to decide what to re-import.
+
+Like `tools/wiki_http.py`, the backend is process-wide (`configure`), and all
+requests go through `wiki_http.fetch_bytes`, so the HTTP cache, `--offline`
+and `--base-url` (including the fixture server in `tools/wiki_fixtures.py`,
+which answers `api.php` queries too) apply to both.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from html import unescape
+from typing import Any, Iterable, Optional, Union
+from urllib.error import HTTPError
+from urllib.parse import quote, urlencode
+
+from wiki_http import WIKI_ORIGIN, CacheMiss, fetch_bytes
+
+
+API_URL = f"{WIKI_ORIGIN}/api.php"
+API_BATCH = 50  # MediaWiki's titles-per-query limit for ordinary clients
+SOURCES = ("pages", "api")
+USER_AGENT = "stationeers_IC10-wiki-import/0.1 (text-based IC10 IDE tooling)"
+
+
+def build_action_url(page_title: str, action: str) -> str:
+    return (
+        f"{WIKI_ORIGIN}/index.php?title="
+        f"{quote(page_title, safe='()/:_-')}&action={quote(action, safe='')}"
+    )
+
+
+def extract_textarea(html: str) -> Optional[str]:
+    match = re.search(
+        r"<textarea[^>]*?(?:id=\"wpTextbox1\"|name=\"wpTextbox1\")[^>]*>(.*?)</textarea>",
+        html,
+        re.IGNORECASE | re.DOTALL,
+    )
+    if not match:
+        return None
+    return unescape(match.group(1))
+
+
+def _fetch_text(url: str) -> str:
+    return fetch_bytes(url, user_agent=USER_AGENT).decode("utf-8", errors="replace")
+
+
+def _title_key(title: str) -> str:
+    """MediaWiki treats spaces and underscores alike and capitalizes the first letter."""
+
+    title = title.replace("_", " ").strip()
+    return title[:1].upper() + title[1:]
+
+
+@dataclass(frozen=True)
+class PageSource:
+    title: str
+    wikitext: Optional[str]  # None: the page does not exist
+    revision_id: Optional[int] = None
+
+
+def _api_query(titles: list[str], params: dict[str, str]) -> dict[str, dict[str, Any]]:
+    """`api.php?action=query` page objects for `titles`, keyed by `_title_key` of each requested title.
+
+    Follows title normalization and redirects, and merges continued responses.
+    """
+
+    found: dict[str, dict[str, Any]] = {}
+    aliases: dict[str, str] = {}  # requested/normalized/redirected key -> final key
+    cont: dict[str, str] = {}
+    while True:
+        query_params = {"action": "query", "format": "json", "formatversion": "2", "redirects": "1"}
+        query_params.update(params)
+        query_params["titles"] = "|".join(titles)
+        query_params.update({k: str(v) for k, v in cont.items()})
+        data = json.loads(_fetch_text(f"{API_URL}?{urlencode(query_params, safe='|()/:_-')}"))
+        if not isinstance(data, dict) or "error" in data:
+            raise RuntimeError(f"api.php query failed: {(data or {}).get('error')}")
+        query = data.get("query") or {}
+        for hop in (query.get("normalized") or []) + (query.get("redirects") or []):
+            aliases[_title_key(hop["from"])] = _title_key(hop["to"])
+        for page in query.get("pages") or []:
+            merged = found.setdefault(_title_key(page.get("title", "")), {})
+            for key, value in page.items():
+                if key == "revisions":
+                    merged.setdefault("revisions", []).extend(value)
+                else:
+                    merged[key] = value
+        cont = data.get("continue") or {}
+        if not cont:
+            break
+
+    result: dict[str, dict[str, Any]] = {}
+    for title in titles:
+        key = _title_key(title)
+        for _ in range(len(aliases) + 1):  # follow normalize -> redirect chains
+            if key not in aliases:
+                break
+            key = aliases[key]
+        if key in found:
+            result[_title_key(title)] = found[key]
+    return result
+
+
+class PagesSource:
+    """Wikitext from the per-page `action=raw` / `action=edit` views."""
+
+    def prefetch(self, titles: Iterable[str]) -> None:
+        pass  # nothing to batch
+
+    def peek(self, title: str) -> Optional[PageSource]:
+        """The source for `title` if it is already in memory (never fetches)."""
+
+        return None
+
+    def page(self, title: str) -> PageSource:
+        try:
+            raw_text = _fetch_text(build_action_url(title, "raw"))
+        except (HTTPError, CacheMiss):
+            raw_text = None  # no raw view (or not cached offline); the edit view shows the source too
+        if raw_text is not None and not raw_text.lstrip().startswith("<!DOCTYPE html"):
+            return PageSource(title, raw_text)
+        edit_text = extract_textarea(_fetch_text(build_action_url(title, "edit")))
+        if edit_text is None:
+            raise RuntimeError(f"Could not extract wikitext from {title}")
+        return PageSource(title, edit_text)
+
+
+class ApiSource:
+    """Wikitext from batched `api.php?action=query&prop=revisions` requests."""
+
+    def __init__(self, batch_size: int = API_BATCH) -> None:
+        self.batch_size = batch_size
+        self._pages: dict[str, PageSource] = {}  # by _title_key
+        self._lock = threading.Lock()
+
+    def _query(self, titles: list[str]) -> dict[str, PageSource]:
+        pages = _api_query(titles, {"prop": "revisions", "rvprop": "ids|content", "rvslots": "main"})
+        result: dict[str, PageSource] = {}
+        for key, page in pages.items():
+            revisions = page.get("revisions") or []
+            if page.get("missing") or page.get("invalid"):
+                result[key] = PageSource(page.get("title", ""), None)
+            elif revisions:
+                main = (revisions[0].get("slots") or {}).get("main") or {}
+                result[key] = PageSource(page["title"], main.get("content"), revisions[0].get("revid"))
+        return result
+
+    def prefetch(self, titles: Iterable[str]) -> None:
+        """Fetch the source of every title not in memory yet, `batch_size` titles per request."""
+
+        with self._lock:
+            wanted = sorted({_title_key(t) for t in titles} - set(self._pages))
+        for start in range(0, len(wanted), self.batch_size):
+            batch = self._query(wanted[start : start + self.batch_size])
+            with self._lock:
+                self._pages.update(batch)
+
+    def peek(self, title: str) -> Optional[PageSource]:
+        with self._lock:
+            return self._pages.get(_title_key(title))
+
+    def page(self, title: str) -> PageSource:
+        source = self.peek(title)
+        if source is None:
+            self.prefetch([title])
+            source = self.peek(title)
+        if source is None:
+            raise RuntimeError(f"api.php returned nothing for {title}")
+        return source
+
+
+_source: Union[PagesSource, ApiSource] = PagesSource()
+
+
+def configure(kind: str = "pages", *, batch_size: int = API_BATCH) -> None:
+    """Select the wikitext backend (`pages` or `api`) for this process."""
+
+    global _source
+    if kind not in SOURCES:
+        raise ValueError(f"unknown wiki source: {kind}")
+    _source = ApiSource(batch_size) if kind == "api" else PagesSource()
+
+
+def current() -> Union[PagesSource, ApiSource]:
+    return _source
+
+
+def add_arguments(parser: Any) -> None:
+    parser.add_argument(
+        "--source",
+        choices=SOURCES,
+        default="pages",
+        help="Where wikitext comes from: per-page views, or batched api.php queries (default: pages)",
+    )
+
+
+def configure_from_args(args: Any) -> None:
+    configure(args.source)
+
+
+def prefetch(titles: Iterable[str]) -> None:
+    _source.prefetch(titles)
+
+
+def peek_wikitext(title: str) -> Optional[str]:
+    """Wikitext for `title` if a prefetch already has it (never fetches)."""
+
+    source = _source.peek(title)
+    return source.wikitext if source is not None else None
+
+
+# What `revision_ids` raises when the wiki cannot answer: transport and HTTP
+# errors and offline cache misses (OSError), an api.php error reply
+# (RuntimeError) or a reply that is not JSON (ValueError).
+REVISION_ERRORS = (OSError, RuntimeError, ValueError)
+
+
+def revision_ids(titles: Iterable[str], *, batch_size: int = API_BATCH) -> dict[str, Optional[int]]:
+    """Current revision id of each title (None: no such page), `batch_size` titles per api.php request.
+
+    Always asks the wiki (`prop=info`), whichever backend is configured, so a
+    refresh sees edits made after this process read a page.
+    """
+
+    wanted = sorted(set(titles))
+    result: dict[str, Optional[int]] = {}
+    for start in range(0, len(wanted), batch_size):
+        batch = wanted[start : start + batch_size]
+        pages = _api_query(batch, {"prop": "info"})
+        for title in batch:
+            page = pages.get(_title_key(title)) or {}
+            revision_id = page.get("lastrevid")
+            result[title] = revision_id if isinstance(revision_id, int) and not page.get("missing") else None
+    return result
+
+
+def wikitext(title: str) -> str:
+    source = _source.page(title)
+    if source.wikitext is None:
+        raise RuntimeError(f"wiki page not found: {title}")
+    return source.wikitext